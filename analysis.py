@@ -1,87 +1,235 @@
+import operator
+import re
+from collections import Counter
+import numpy as np
 import pandas as pd
-import networkx as nx
 from datetime import datetime, timezone
-import streamlit as st
+from instrumentation import timed
+from keyword_matcher import get_automaton
+from classifiers import ANTI_INDIA_KEYWORDS, PRO_INDIA_KEYWORDS, get_classifier # Keyword lists re-exported for callers
 
-def calculate_bot_score(df):
+# --- BOT SCORING RULES ---
+# Each rule adds `points` to an account's score when `feature <op> threshold`
+# holds. Features are computed once per frame as whole columns, so new rules
+# can be appended here without adding another pass over the data.
+BOT_SCORE_RULES = [
+    # Recently created accounts get a higher score
+    {'feature': 'account_age_days', 'op': '<', 'threshold': 60, 'points': 4},
+    # Accounts with a very low follower-to-following ratio get a higher score
+    {'feature': 'follower_ratio', 'op': '<', 'threshold': 0.1, 'points': 3},
+    # Accounts with very few followers get a higher score
+    {'feature': 'followers_count', 'op': '<', 'threshold': 10, 'points': 2},
+    # Unverified accounts get a small score increase
+    {'feature': 'is_unverified', 'op': '==', 'threshold': True, 'points': 1},
+]
+BOT_SCORE_CAP = 10
+
+_RULE_OPS = {'<': operator.lt, '<=': operator.le, '>': operator.gt,
+             '>=': operator.ge, '==': operator.eq, '!=': operator.ne}
+
+def _bot_score_features(df, now):
+    """
+    Computes the columnar features referenced by BOT_SCORE_RULES.
+    Missing or unparseable values never satisfy a rule.
+    """
+    created_at = pd.to_datetime(df['user_created_at'], errors='coerce', utc=True)
+    followers = pd.to_numeric(df['followers_count'], errors='coerce').to_numpy(dtype=float)
+    following = pd.to_numeric(df['following_count'], errors='coerce').to_numpy(dtype=float)
+
+    # The ratio rule only applies to accounts following > 100 with at least one follower
+    ratio_applies = (following > 100) & (followers > 0)
+    follower_ratio = np.full(len(df), np.nan)
+    np.divide(followers, following, out=follower_ratio, where=ratio_applies)
+
+    return {
+        'account_age_days': (now - created_at).dt.days.to_numpy(dtype=float, na_value=np.nan),
+        'follower_ratio': follower_ratio,
+        'followers_count': followers,
+        # Same truthiness as `not value`: None counts as unverified
+        'is_unverified': ~df['is_verified'].astype(bool).to_numpy(),
+    }
+
+@timed('analysis.bot_score')
+def calculate_bot_score(df, rules=None, now=None):
     """
     Calculates a bot score for Twitter accounts based on several heuristics.
     A higher score indicates a higher probability of being a bot.
+
+    Args:
+        df (pandas.DataFrame): Tweets with user metadata columns.
+        rules (list): Scoring rules, defaults to BOT_SCORE_RULES.
+        now (datetime): Reference time for account age, defaults to the current UTC time.
     """
-    scores = []
     required_cols = ['user_created_at', 'followers_count', 'following_count', 'is_verified']
     if not all(col in df.columns for col in required_cols):
         df['bot_score'] = 0
         return df
-        
-    for index, row in df.iterrows():
-        score = 0
-        # Recently created accounts get a higher score
-        account_age_days = (datetime.now(timezone.utc) - pd.to_datetime(row['user_created_at'])).days
-        if account_age_days < 60: score += 4
-        
-        # Accounts with a very low follower-to-following ratio get a higher score
-        if row['following_count'] > 100 and row['followers_count'] > 0:
-            ratio = row['followers_count'] / row['following_count']
-            if ratio < 0.1: score += 3
-            
-        # Accounts with very few followers get a higher score
-        if row['followers_count'] < 10: score += 2
-        
-        # Unverified accounts get a small score increase
-        if not row['is_verified']: score += 1
-        
-        scores.append(min(score, 10)) # Cap the score at 10
-    df['bot_score'] = scores
+
+    rules = BOT_SCORE_RULES if rules is None else rules
+    now = pd.Timestamp(now or datetime.now(timezone.utc))
+    if now.tzinfo is None:
+        now = now.tz_localize('UTC')
+
+    features = _bot_score_features(df, now)
+    scores = np.zeros(len(df), dtype=np.int64)
+    for rule in rules:
+        matched = _RULE_OPS[rule['op']](features[rule['feature']], rule['threshold'])
+        scores += np.where(matched, rule['points'], 0)
+
+    df['bot_score'] = np.minimum(scores, BOT_SCORE_CAP).astype(np.int8) # Cap the score at 10
     return df
 
+# An @mention is an '@' at the start of a whitespace-separated word
+MENTION_PATTERN = re.compile(r'(?<!\S)@(\S+)')
+
+def mention_pairs(df):
+    """
+    Extracts every @mention in tweets, unresolved.
+
+    Returns:
+        pandas.DataFrame: One row per mention, with columns 'source' (the
+        author's username) and 'mentioned' (the lowercased handle).
+    """
+    pairs = pd.DataFrame(columns=['source', 'mentioned'])
+    if df.empty or 'tweet_text' not in df.columns or 'username' not in df.columns:
+        return pairs
+    mentions = pd.DataFrame({
+        'source': df['username'].astype(str).to_numpy(),
+        'mentioned': df['tweet_text'].astype(str).str.findall(MENTION_PATTERN).to_numpy(),
+    }).explode('mentioned').dropna(subset=['mentioned'])
+    if mentions.empty:
+        return pairs
+    mentions['mentioned'] = mentions['mentioned'].str.strip('@,.').str.lower()
+    return mentions
+
+def username_index(usernames):
+    """
+    Maps lowercased usernames to their first spelling in `usernames`.
+
+    Returns:
+        pandas.Series: Canonical usernames indexed by their lowercase form.
+    """
+    usernames = pd.Series(usernames).astype(str)
+    index = pd.Series(usernames.to_numpy(), index=usernames.str.lower().to_numpy())
+    return index[~index.index.duplicated()]
+
+def resolve_mentions(pairs, index):
+    """
+    Resolves mention_pairs rows to known accounts and counts them (summing
+    a 'weight' column if the pairs are already counted). Mentions of
+    accounts outside the index and self-mentions are dropped.
+
+    Returns:
+        pandas.DataFrame: Columns 'source', 'target' and 'weight'.
+    """
+    edges = pd.DataFrame(columns=['source', 'target', 'weight'])
+    if pairs.empty:
+        return edges
+    position = index.index.get_indexer(pairs['mentioned'])
+    pairs = pairs.assign(target=index.to_numpy()[position])
+    pairs = pairs[(position >= 0) & (pairs['source'].str.lower() != pairs['mentioned']).to_numpy()]
+    if pairs.empty:
+        return edges
+    groups = pairs.groupby(['source', 'target'], sort=False)
+    return (groups['weight'].sum() if 'weight' in pairs.columns else groups.size()).reset_index(name='weight')
+
+def extract_mention_edges(df):
+    """
+    Extracts directed mention edges from tweets in one regex pass.
+
+    Mentions are resolved to the dataset's own usernames through a
+    lowercase -> canonical username index; mentions of accounts outside the
+    dataset and self-mentions are dropped. The input frame is not modified.
+
+    Returns:
+        pandas.DataFrame: Columns 'source', 'target' and 'weight', where weight
+        is the number of times source mentioned target.
+    """
+    pairs = mention_pairs(df)
+    if pairs.empty:
+        return pd.DataFrame(columns=['source', 'target', 'weight'])
+    return resolve_mentions(pairs, username_index(df['username']))
+
+def build_mention_matrix(df):
+    """
+    Builds a directed SciPy sparse adjacency matrix of mention counts.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix, list of usernames). Entry [i, j] is the
+        number of times usernames[i] mentioned usernames[j].
+    """
+    from scipy import sparse
+
+    usernames = pd.Index(pd.unique(df['username'].astype(str)) if 'username' in df.columns else [])
+    edges = extract_mention_edges(df)
+    matrix = sparse.csr_matrix(
+        (edges['weight'].to_numpy(dtype=np.int64),
+         (usernames.get_indexer(edges['source']), usernames.get_indexer(edges['target']))),
+        shape=(len(usernames), len(usernames))
+    )
+    return matrix, usernames.tolist()
+
+@timed('analysis.mention_graph')
 def build_network_graph(df):
     """
     Builds a network graph of Twitter users based on mentions.
     Nodes are usernames, and an edge exists if one user mentions another.
+    Edge 'weight' is the number of mentions between the two users.
     """
+    import networkx as nx # Deferred so importing analysis stays cheap
+
     G = nx.Graph()
     if 'tweet_text' not in df.columns or 'username' not in df.columns:
         return G
 
-    df['username_lower'] = df['username'].str.lower()
-    all_usernames = set(df['username_lower'])
+    # Add all users in the dataset as nodes, keeping each user's latest bot score
+    bot_scores = df['bot_score'] if 'bot_score' in df.columns else pd.Series(0, index=df.index)
+    return mention_graph(dict(zip(df['username'], bot_scores)), extract_mention_edges(df))
+
+def mention_graph(nodes, edges):
+    """
+    Builds the undirected influence graph from accounts and mention edges.
+
+    Args:
+        nodes (dict): Username -> bot score, one node each.
+        edges (pandas.DataFrame): 'source', 'target', 'weight' mention counts.
+
+    Returns:
+        networkx.Graph: Nodes with 'bot_score' and 'influence' (degree
+        centrality), edges with the summed 'weight' of both directions.
+    """
+    import networkx as nx
 
-    # Add all users in the dataset as nodes
-    for index, row in df.iterrows():
-        G.add_node(row['username'], bot_score=row.get('bot_score', 0))
+    G = nx.Graph()
+    G.add_nodes_from((username, {'bot_score': score}) for username, score in nodes.items())
 
-    # Create edges based on mentions
-    for index, row in df.iterrows():
-        mentioned_users = [word.strip("@,.").lower() for word in row['tweet_text'].split() if word.startswith('@')]
-        for mentioned_user in mentioned_users:
-            if mentioned_user in all_usernames and row['username_lower'] != mentioned_user:
-                # Find the original case-sensitive username to add the edge
-                original_mentioned_user_series = df[df['username_lower'] == mentioned_user]['username']
-                if not original_mentioned_user_series.empty:
-                    original_mentioned_user = original_mentioned_user_series.iloc[0]
-                    G.add_edge(row['username'], original_mentioned_user)
+    # Create weighted edges based on mentions; the graph is undirected, so
+    # mentions in both directions between two users add up to one edge
+    if not edges.empty:
+        swap = (edges['source'] > edges['target']).to_numpy()
+        pairs = pd.DataFrame({
+            'u': np.where(swap, edges['target'], edges['source']),
+            'v': np.where(swap, edges['source'], edges['target']),
+            'weight': edges['weight'].to_numpy(),
+        }).groupby(['u', 'v'], sort=False)['weight'].sum().reset_index()
+        G.add_weighted_edges_from(zip(pairs['u'].tolist(), pairs['v'].tolist(), pairs['weight'].tolist()))
 
     # Calculate influence (centrality) for each node
     influence_scores = nx.degree_centrality(G)
     nx.set_node_attributes(G, influence_scores, 'influence')
     return G
 
-def analyze_narrative_sentiment(df):
-    """
-    Performs keyword-based sentiment analysis to classify narratives
-    as pro-India, anti-India, or neutral.
-    """
-    pro_india_keywords = [
-        'proud indian', 'jai hind', 'india shining', 'support india', 'modi government', 
-        'indian army', 'made in india', 'incredible india', 'strong india', 'unified india'
-    ]
-    anti_india_keywords = [
-        'boycott india', 'fascist india', 'kashmir under siege', 'hindutva terror', 
-        'indian government failed', 'muslim genocide', 'endia', 'shame on india', 
-        'free kashmir', 'dalit lives matter', 'farmer protest'
-    ]
-    
+@timed('analysis.sentiment')
+def analyze_narrative_sentiment(df, keywords=None, classifier=None):
+    """
+    Classifies narratives as pro-India, anti-India, or neutral.
+
+    Posts are labelled by a classifier backend (see classifiers.py), by
+    default the keyword rules or the model SENTRY_CLASSIFIER points to.
+    Repeated texts are classified once. When `keywords` is given, their
+    whole-word occurrence totals across anti-India posts are stored in
+    df.attrs['keyword_hits'].
+    """
     # Determine the correct text column to use based on the data source
     if 'tweet_text' in df.columns:
         text_column = 'tweet_text'
@@ -91,19 +239,26 @@ def analyze_narrative_sentiment(df):
         df['sentiment'] = 'unknown' # Return if no text column found
         return df
 
-    sentiments = []
-    for text in df[text_column]:
-        text_lower = str(text).lower()
-        
-        pro_score = sum(1 for word in pro_india_keywords if word in text_lower)
-        anti_score = sum(1 for word in anti_india_keywords if word in text_lower)
-        
-        if anti_score > pro_score:
-            sentiments.append('anti-india')
-        elif pro_score > anti_score:
-            sentiments.append('pro-india')
-        else:
-            sentiments.append('neutral')
-            
-    df['sentiment'] = sentiments
+    sentiments = (classifier or get_classifier()).classify(df[text_column])
+    df['sentiment'] = pd.Categorical(sentiments) # Three labels repeated over every post
+
+    if keywords is not None:
+        hit_keywords = [k.strip().lower() for k in keywords if k and k.strip()]
+        keyword_hits = Counter()
+        if hit_keywords:
+            automaton = get_automaton(hit_keywords)
+            for text in df[text_column].to_numpy()[sentiments == 'anti-india']:
+                keyword_hits.update(automaton.scan(text)[1])
+        df.attrs['keyword_hits'] = {k: keyword_hits[k] for k in hit_keywords if keyword_hits[k]}
     return df
+
+@timed('analysis')
+def analyze_posts(df, platform, keywords):
+    """
+    Runs the narrative analysis, plus bot scoring where account data exists.
+    """
+    df_final = analyze_narrative_sentiment(df, keywords=keywords)
+    if platform in ("Twitter", "All Platforms"):
+        # Account metadata only exists on Twitter rows; other rows score 0
+        df_final = calculate_bot_score(df_final)
+    return df_final
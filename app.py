@@ -1,16 +1,28 @@
 import streamlit as st
 import pandas as pd
-import networkx as nx
-from graphviz import Digraph
-import plotly.express as px
-import re
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+from collections import Counter
+import os
 
 # Import our custom modules
-from collector import get_tweets_df, get_reddit_posts_df, get_youtube_videos_df
-from analysis import calculate_bot_score, build_network_graph, analyze_narrative_sentiment
-from web_scraper import get_news_articles_df
+from collector import iter_tweet_batches
+from analysis import calculate_bot_score, build_network_graph, analyze_narrative_sentiment, analyze_posts
+from chunked import TOP_INFLUENCERS, analyze_archive
+from scanner import PLATFORMS, build_search_query, fetch_platform, resume_at, scan_all_platforms, twitter_since_id
+from store import PostStore, query_key
+from schema import compact_frame
+from artifact_cache import ArtifactCache, fingerprint
+from classifiers import get_classifier
+from youtube_ingest import quota_status as youtube_quota
+from near_duplicates import SignatureCache, find_near_duplicates, duplicate_clusters
+from burst import BurstTracker
+from graph_view import DEFAULT_DETAIL_LEVEL, DETAIL_LEVELS, build_network_view
+from graph_analytics import account_metrics, community_summary
+from term_frequency import TermFrequency
+from query import FrameQuery
+import instrumentation
+from rate_limit import format_resume_at
+
+SENTIMENT_COLORS = {'pro-india': '#28A745', 'anti-india': '#FF4B4B', 'neutral': '#1E90FF'}
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Project Sentry", layout="wide", initial_sidebar_state="expanded")
@@ -25,7 +37,7 @@ st.sidebar.header("Mission Controls")
 
 platform = st.sidebar.selectbox(
     "Select a Platform:",
-    ("News Articles", "Reddit", "YouTube","Twitter")
+    ("News Articles", "Reddit", "YouTube", "Twitter", "All Platforms")
 )
 
 default_keywords = "boycott india, fascist india, kashmir under siege, hindutva terror, endia, shame on india, free kashmir"
@@ -37,15 +49,104 @@ elif platform == "Reddit":
     subreddit = st.sidebar.text_input("Subreddit to Scan (or 'all')", "all")
     max_results = st.sidebar.slider("Number of Posts to Analyze", 25, 200, 50)
 elif platform == "YouTube":
-    max_results = st.sidebar.slider("Number of Videos to Analyze", 10, 50, 25)
+    max_results = st.sidebar.slider("Number of Videos to Analyze", 10, 200, 25)
+    harvest_comments = st.sidebar.checkbox("Include comments from the top videos")
+    if harvest_comments:
+        comment_videos = st.sidebar.slider("Videos to Harvest Comments From", 1, 25, 5)
+    quota_used, daily_quota = youtube_quota()
+    st.sidebar.caption(f"YouTube quota used today: {quota_used:,} / {daily_quota:,} units")
+elif platform == "All Platforms":
+    subreddit = st.sidebar.text_input("Subreddit to Scan (or 'all')", "all")
+    max_results = st.sidebar.slider("Number of Posts per Platform", 10, 200, 50)
 else: # News Articles
     max_results = st.sidebar.slider("Number of Articles to Analyze", 10, 50, 25)
 
+use_store = st.sidebar.checkbox("Keep local history (fetch only new posts)", value=True)
+
+# Rate-limit budgets are shared with other sessions and batch workers (rate_limit.py)
+for name in (PLATFORMS if platform == "All Platforms" else [platform]):
+    limited_until = resume_at(name)
+    if limited_until:
+        st.sidebar.caption(f"{name} rate limit reached; scans resume at {format_resume_at(limited_until)}")
+
 run_button = st.sidebar.button("🛡️ Run Detection")
 st.sidebar.markdown("---")
 st.sidebar.info("This tool analyzes live data based on the keywords provided.")
 st.sidebar.markdown("---")
 
+@st.cache_resource
+def get_post_store():
+    return PostStore()
+
+@st.cache_resource
+def get_signature_cache():
+    return SignatureCache()
+
+@st.cache_resource
+def get_artifact_cache():
+    return ArtifactCache(max_items=128, disk_dir=os.path.join('data', 'artifacts'))
+
+artifact_cache = get_artifact_cache()
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+def session_query(name, scan_key, df, **options):
+    """
+    Returns this session's FrameQuery over a scan's frame, kept across reruns
+    so its sort indexes and filtered selections are built once per scan.
+    """
+    queries = st.session_state.setdefault('frame_queries', {})
+    if name not in queries or queries[name][0] != scan_key:
+        queries[name] = (scan_key, FrameQuery(df, **options))
+    return queries[name][1]
+
+def paged_table(query, key, sort_columns, **filters):
+    """
+    Renders one page of a FrameQuery's rows with sort and paging controls.
+    Only that page is sent to the browser.
+
+    Args:
+        query (FrameQuery): Rows to page through.
+        key (str): Prefix of the controls' widget keys.
+        sort_columns (dict): Column -> label of the sort choices, the first
+            one the default; a None column keeps the frame's order.
+        **filters: FrameQuery.select filters.
+    """
+    controls = st.columns([2, 1, 1, 1])
+    sort_by = controls[0].selectbox("Sort by", list(sort_columns), format_func=sort_columns.get, key=f'{key}_sort')
+    descending = controls[1].selectbox("Order", [True, False], format_func=lambda d: "Descending" if d else "Ascending",
+                                       key=f'{key}_descending')
+    page_size = controls[2].selectbox("Rows per page", PAGE_SIZES, index=1, key=f'{key}_page_size')
+    total = len(query.select(sort_by=sort_by, descending=descending, **filters))
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get(f'{key}_page', 1) > pages: # The filters left fewer pages
+        st.session_state[f'{key}_page'] = 1
+    page = int(controls[3].number_input("Page", min_value=1, max_value=pages, step=1, key=f'{key}_page'))
+
+    if not total:
+        st.info("No rows match the filters.")
+        return
+    frame, _ = query.page(page - 1, page_size, sort_by=sort_by, descending=descending, **filters)
+    first = (page - 1) * page_size
+    st.caption(f"Rows {first + 1:,}-{first + len(frame):,} of {total:,} matching ({len(query):,} in total), "
+               f"page {page:,} of {pages:,}")
+    st.dataframe(frame, use_container_width=True)
+
+
+cache_status = st.sidebar.empty()
+# Filled in at the end of the script, once this rerun's rendering has been timed
+performance_panel = st.sidebar.expander("Performance")
+trace_memory = performance_panel.checkbox("Trace peak memory on the next scan (slower)", key='trace_memory')
+
+# Archives are analyzed chunk by chunk (chunked.py), so they needn't fit in memory
+archive_panel = st.sidebar.expander("Historical Archive")
+archive_input = archive_panel.text_input("Archive files (JSON lines or Parquet, comma-separated)", key='archive_paths')
+archive_layout = archive_panel.selectbox("Column layout", ("All Platforms", "Twitter", "Reddit", "YouTube", "News Articles"),
+                                         key='archive_layout')
+archive_workers = archive_panel.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1, value=1,
+                                             key='archive_workers')
+archive_button = archive_panel.button("Analyze Archive")
+
 # --- Main Application Logic ---
 if run_button:
     if not keyword_input:
@@ -53,36 +154,117 @@ if run_button:
         st.stop()
     
     keywords = [keyword.strip() for keyword in keyword_input.split(',')]
-    search_query = " OR ".join(f'"{k}"' for k in keywords if k)
+    search_query = build_search_query(keywords)
+    store = get_post_store() if use_store else None
+    # Times every stage of the scan, from the API calls to the analysis
+    scan_run = instrumentation.Run('scan', memory=trace_memory, platform=platform, keywords=keywords)
 
-    with st.spinner(f"Scanning {platform} for narratives matching keywords..."):
+    with st.spinner(f"Scanning {platform} for narratives matching keywords..."), scan_run:
         if platform == "Twitter":
-            df = get_tweets_df(search_query, max_results=max_results)
-        elif platform == "Reddit":
-            df = get_reddit_posts_df(subreddit, search_query, limit=max_results)
-        elif platform == "YouTube":
-            df = get_youtube_videos_df(search_query, max_results=max_results)
-        else: # News Articles
-            df = get_news_articles_df(keywords, max_results=max_results)
+            # Analyze each page as it arrives so progress shows before the last page is fetched
+            chunks, keyword_hits = [], Counter()
+            progress = st.empty()
+            since_id = twitter_since_id(store, keywords) if store else None
+            for chunk in iter_tweet_batches(search_query, max_results=max_results, since_id=since_id):
+                if store:
+                    store.save(platform, query_key(keywords), chunk)
+                chunk = calculate_bot_score(analyze_narrative_sentiment(chunk, keywords=keywords))
+                keyword_hits.update(chunk.attrs['keyword_hits'])
+                chunks.append(chunk)
+                fetched = sum(len(c) for c in chunks)
+                anti_found = sum(int((c['sentiment'] == 'anti-india').sum()) for c in chunks)
+                progress.info(f"Analyzed {fetched} of up to {max_results} tweets, {anti_found} anti-India so far...")
+            progress.empty()
+            if store:
+                # New tweets were saved as they arrived; analyze them together with the stored history
+                df = store.load(platform, query_key(keywords))
+                chunks = [artifact_cache.get_or_compute('analysis', fingerprint(df, platform, keywords, get_classifier().fingerprint),
+                                                        lambda: analyze_posts(df, platform, keywords))] if not df.empty else []
+                keyword_hits = Counter(chunks[0].attrs['keyword_hits']) if chunks else Counter()
+            df = compact_frame(pd.concat(chunks, ignore_index=True)).sort_values('engagement', ascending=False) if chunks else pd.DataFrame()
+        elif platform == "All Platforms":
+            df, scan_status = scan_all_platforms(keywords, max_results=max_results, subreddit=subreddit, store=store)
+            failed = {name: s['error'] or "no results" for name, s in scan_status.items() if s['error'] or not s['rows']}
+            if failed and not df.empty:
+                st.warning("Partial results, missing: " + ", ".join(f"{name} ({reason})" for name, reason in failed.items()))
+            limited = [f"{name} at {format_resume_at(s['resume_at'])}" for name, s in scan_status.items() if s['resume_at']]
+            if limited:
+                st.info("Rate limits reached; these sources can be scanned again: " + ", ".join(limited))
+        else: # Reddit, YouTube and News Articles
+            # With comments, YouTube videos and their comments arrive in the shared post schema
+            df = fetch_platform(platform, keywords, max_results=max_results,
+                                subreddit=subreddit if platform == "Reddit" else 'all', store=store,
+                                comment_videos=comment_videos if platform == "YouTube" and harvest_comments else 0)
 
         if df.empty:
+            st.session_state.pop('scan', None)
+            st.session_state['scan_run'] = scan_run.finish()
             st.error(f"Detection Failed: No recent content found on {platform} for the specified keywords. This could be due to no results or a temporary issue with the data source.")
             st.stop()
 
-        df_final = analyze_narrative_sentiment(df)
         if platform == "Twitter":
-            df_final = calculate_bot_score(df_final)
+            df_final = df
+            df_final.attrs['keyword_hits'] = dict(keyword_hits)
+        else:
+            df_final = artifact_cache.get_or_compute('analysis', fingerprint(df, platform, keywords, get_classifier().fingerprint),
+                                                     lambda: analyze_posts(df, platform, keywords))
+
+    # Cluster copy-pasted posts; signatures of posts seen in earlier scans are reused
+    with scan_run:
+        df_final = find_near_duplicates(df_final, cache=get_signature_cache())
+    st.session_state['scan_run'] = scan_run.finish()
+
+    # Keep the results across reruns, so widget interactions re-render from the cache
+    st.session_state['scan'] = {
+        'platform': platform, 'keywords': keywords, 'df_final': df_final,
+        # Frames in the shared post schema use the same columns as All Platforms
+        'layout': "All Platforms" if 'platform' in df_final.columns else platform,
+        'fingerprint': fingerprint(df_final, platform, keywords), 'fetched_at': pd.Timestamp.now(),
+    }
+
+if archive_button:
+    archive_paths = [path.strip() for path in archive_input.split(',') if path.strip()]
+    missing = [path for path in archive_paths if not os.path.exists(path)]
+    if not archive_paths or missing:
+        st.sidebar.error(f"Archive files not found: {', '.join(missing)}" if missing else "Enter at least one archive file.")
+    else:
+        keywords = [keyword.strip() for keyword in keyword_input.split(',') if keyword.strip()]
+        progress = st.empty()
+        with st.spinner("Analyzing archive..."):
+            summary = analyze_archive(archive_paths, archive_layout, keywords, workers=int(archive_workers),
+                                      progress=lambda rows: progress.info(f"Analyzed {rows:,} posts..."))
+        progress.empty()
+        st.session_state['archive'] = {'summary': summary, 'platform': archive_layout, 'keywords': keywords,
+                                       'paths': archive_paths}
+
+scan = st.session_state.get('scan')
+if scan:
+    platform, keywords, df_final = scan['platform'], scan['keywords'], scan['df_final']
+    layout = scan['layout']
+    scan_key = scan['fingerprint']
+
+    # Twitter rows in their collector's column names, for bot scores and the mention graph
+    if platform == "All Platforms":
+        twitter_df = df_final[df_final['platform'] == 'Twitter'].rename(columns={'author': 'username', 'text_content': 'tweet_text'})
+    else:
+        twitter_df = df_final if platform == "Twitter" else pd.DataFrame()
     
     st.success(f"Analysis Complete! Threat assessment for narratives on **{platform}** follows.")
     # --- ADDED TIMESTAMP ---
-    st.info(f"Data last fetched at: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    st.info(f"Data last fetched at: {scan['fetched_at'].strftime('%Y-%m-%d %H:%M:%S')}")
 
 
     # --- Display Results ---
     tab1, tab2, tab3, tab4 = st.tabs(["Threat Dashboard", "Keyword Analysis", "Influence Network", "Raw Data"])
+    # Every rerun renders all tabs; cached artifacts show up as near-zero spans
+    render_run = instrumentation.Run('render', platform=platform)
 
     # --- THREAT DASHBOARD TAB ---
-    with tab1:
+    # Visualization libraries are imported in the tabs that use them, so a
+    # cold start without results doesn't pay for plotly or wordcloud
+    with tab1, render_run:
+        import plotly.express as px
+
         st.header("Campaign Threat Assessment")
         
         # --- Create a 2x2 grid for visualizations ---
@@ -91,11 +273,11 @@ if run_button:
         
         with row1_col1:
             st.subheader("Narrative Distribution")
-            sentiment_counts = df_final['sentiment'].value_counts()
-            fig_pie = px.pie(sentiment_counts, values=sentiment_counts.values, names=sentiment_counts.index, 
-                         color=sentiment_counts.index,
-                         color_discrete_map={'pro-india':'#28A745', 'anti-india':'#FF4B4B', 'neutral':'#1E90FF'},
-                         hole=.4)
+            def sentiment_pie():
+                sentiment_counts = df_final['sentiment'].value_counts()
+                return px.pie(sentiment_counts, values=sentiment_counts.values, names=sentiment_counts.index, 
+                              color=sentiment_counts.index, color_discrete_map=SENTIMENT_COLORS, hole=.4)
+            fig_pie = artifact_cache.get_or_compute('sentiment_pie', scan_key, sentiment_pie)
             st.plotly_chart(fig_pie, use_container_width=True)
 
         with row1_col2:
@@ -103,48 +285,57 @@ if run_button:
             anti_india_df = df_final[df_final['sentiment'] == 'anti-india']
             source_col_map = {
                 'Twitter': 'username', 'Reddit': 'author', 
-                'YouTube': 'channel_title', 'News Articles': 'source'
+                'YouTube': 'channel_title', 'News Articles': 'source',
+                'All Platforms': 'author'
             }
-            source_col = source_col_map.get(platform)
+            source_col = source_col_map.get(layout)
             
             if not anti_india_df.empty and source_col and source_col in anti_india_df.columns:
-                top_sources = anti_india_df[source_col].value_counts().nlargest(5)
-                fig_bar = px.bar(top_sources, x=top_sources.values, y=top_sources.index, orientation='h', 
-                                 labels={'y': 'Source', 'x': 'Number of Posts'}, color_discrete_sequence=['#FF4B4B'])
+                def top_sources_bar():
+                    # As strings, so accounts without anti-India posts aren't listed as categories with 0
+                    top_sources = anti_india_df[source_col].astype(str).value_counts().nlargest(5)
+                    return px.bar(top_sources, x=top_sources.values, y=top_sources.index, orientation='h', 
+                                  labels={'y': 'Source', 'x': 'Number of Posts'}, color_discrete_sequence=['#FF4B4B'])
+                fig_bar = artifact_cache.get_or_compute('top_sources_bar', scan_key, top_sources_bar)
                 st.plotly_chart(fig_bar, use_container_width=True)
             else:
                 st.info("No significant anti-India sources found.")
 
         with row2_col1:
             st.subheader("Activity Over Time")
-            date_col_map = {
-                'Twitter': 'tweet_created_at', 'Reddit': 'created_at', 'YouTube': 'published_at'
-            }
-            date_col = date_col_map.get(platform)
-            
-            if date_col and date_col in df_final.columns:
-                # FIX: Use errors='coerce' to handle unparseable dates gracefully
-                df_final['parsed_date'] = pd.to_datetime(df_final[date_col], errors='coerce')
-                
-                # Drop rows where the date could not be parsed
-                time_df = df_final.dropna(subset=['parsed_date'])
-                
-                if not time_df.empty:
-                    post_counts = time_df.set_index('parsed_date').resample('D').size().reset_index(name='count')
-                    fig_line = px.line(post_counts, x='parsed_date', y='count', title="Posts per Day", labels={'parsed_date': 'Date'})
-                    st.plotly_chart(fig_line, use_container_width=True)
-                else:
-                    st.info("Could not parse dates for time series analysis.")
+            # Minute and hour counts are kept incrementally per session; a scan
+            # only adds the posts the tracker hasn't counted yet
+            tracker = st.session_state.setdefault('burst_tracker', BurstTracker())
+            if st.session_state.get('burst_tracker_scan') != scan_key:
+                tracker.update(df_final, platform=None if layout == "All Platforms" else platform, keywords=keywords)
+                st.session_state['burst_tracker_scan'] = scan_key
+
+            if tracker.keys('hour'):
+                resolution = st.radio("Resolution", ["minute", "hour"], index=1, horizontal=True, key='activity_resolution')
+                series_keys = tracker.keys(resolution)
+                series_key = st.selectbox("Series", series_keys, format_func=lambda key: key[1] if key[0] != 'keyword' else f"Keyword: {key[1]}",
+                                          key='activity_series')
+                def activity_line():
+                    timeline = tracker.timeline(resolution, series_key)
+                    fig = px.line(timeline, x='time', y='count', title=f"Posts per {resolution.capitalize()}",
+                                  labels={'time': 'Time', 'count': 'Posts'})
+                    bursts = timeline[timeline['burst']]
+                    fig.add_scatter(x=bursts['time'], y=bursts['count'], mode='markers', name='Burst',
+                                    marker=dict(color='#FF4B4B', size=10))
+                    return fig
+                fig_line = artifact_cache.get_or_compute(
+                    'activity_line', fingerprint(scan_key, tracker.version, resolution, series_key), activity_line)
+                st.plotly_chart(fig_line, use_container_width=True)
             else:
-                st.info("Time series analysis not available for News Articles.")
+                st.info("Could not parse dates for time series analysis.")
 
         with row2_col2:
-            if platform == "Twitter":
+            if platform in ("Twitter", "All Platforms"):
                 st.subheader("Bot Score Distribution")
-                if 'bot_score' in df_final.columns:
-                    fig_hist = px.histogram(df_final, x='bot_score', nbins=10, 
-                                            title="Distribution of Bot Scores",
-                                            color_discrete_sequence=['#FF4B4B'])
+                if 'bot_score' in twitter_df.columns and not twitter_df.empty:
+                    fig_hist = artifact_cache.get_or_compute('bot_score_hist', scan_key, lambda: px.histogram(
+                        twitter_df, x='bot_score', nbins=10, title="Distribution of Bot Scores",
+                        color_discrete_sequence=['#FF4B4B']))
                     st.plotly_chart(fig_hist, use_container_width=True)
                 else:
                     st.info("Bot score analysis not available.")
@@ -153,7 +344,7 @@ if run_button:
 
         st.subheader("Top Drivers of Anti-India Narrative (by Engagement)")
         sort_col = 'engagement'
-        if platform == 'YouTube': sort_col = 'view_count'
+        if layout == 'YouTube': sort_col = 'view_count'
 
         if sort_col not in df_final.columns:
             st.warning(f"Could not determine top drivers. Missing key column: {sort_col}")
@@ -167,24 +358,49 @@ if run_button:
                     'Twitter': ['username', 'tweet_text', 'engagement', 'bot_score'],
                     'Reddit': ['author', 'title', 'score', 'num_comments', 'engagement'],
                     'YouTube': ['channel_title', 'title', 'view_count', 'like_count', 'engagement'],
-                    'News Articles': ['source', 'headline', 'link']
+                    'News Articles': ['source', 'headline', 'link'],
+                    'All Platforms': ['platform', 'author', 'title', 'text_content', 'engagement', 'url']
                 }
-                st.dataframe(anti_drivers[display_cols_map[platform]])
+                st.dataframe(anti_drivers[display_cols_map[layout]])
+
+        st.subheader("Activity Bursts")
+        burst_df = tracker.burst_table()
+        if burst_df.empty:
+            st.info("No anomalous activity bursts detected.")
+        else:
+            st.dataframe(burst_df, use_container_width=True)
+
+        st.subheader("Copy-Paste Coordination")
+        clusters_df = artifact_cache.get_or_compute('duplicate_clusters', scan_key, lambda: duplicate_clusters(df_final))
+        if clusters_df.empty:
+            st.info("No near-duplicate posts found.")
+        else:
+            dup_col1, dup_col2, dup_col3 = st.columns(3)
+            dup_col1.metric("Near-Duplicate Clusters", len(clusters_df))
+            dup_col2.metric("Posts in Clusters", int(clusters_df['posts'].sum()))
+            if source_col and source_col in df_final.columns:
+                dup_col3.metric("Accounts Involved", df_final.loc[df_final['dup_cluster_id'] >= 0, source_col].nunique())
+            st.dataframe(clusters_df, use_container_width=True)
 
     # --- KEYWORD ANALYSIS TAB ---
-    with tab2:
+    with tab2, render_run:
         st.header("Keyword & Narrative Analysis")
         
         text_col = 'text_content' if 'text_content' in df_final.columns else 'tweet_text'
         if text_col in df_final.columns:
-            anti_content_text = ' '.join(df_final[df_final['sentiment'] == 'anti-india'][text_col].astype(str).tolist())
+            # Counted chunk by chunk once per scan; feeds both the word cloud and the top-terms tables
+            term_counts = artifact_cache.get_or_compute('term_frequency', scan_key, lambda: TermFrequency().update(
+                df_final, text_col, sentiments=['anti-india']))
+            anti_terms = term_counts.frequencies('anti-india')
             
             col1, col2 = st.columns(2)
             with col1:
                 st.subheader("Keyword Performance")
+                # Counted during the sentiment scan, one automaton pass per post
+                hit_counts = df_final.attrs.get('keyword_hits', {})
                 keyword_hits = []
                 for keyword in keywords:
-                    hits = len(re.findall(r'\b' + re.escape(keyword) + r'\b', anti_content_text, re.IGNORECASE))
+                    hits = hit_counts.get(keyword.lower(), 0)
                     if hits > 0:
                         keyword_hits.append({'Keyword': keyword, 'Occurrences': hits})
                 
@@ -196,23 +412,34 @@ if run_button:
 
             with col2:
                 st.subheader("Word Cloud from Anti-India Content")
-                if anti_content_text.strip():
-                    wordcloud = WordCloud(width=800, height=400, background_color='white', colormap='Reds').generate(anti_content_text)
-                    fig_wc, ax = plt.subplots()
-                    ax.imshow(wordcloud, interpolation='bilinear')
-                    ax.axis('off')
-                    st.pyplot(fig_wc)
+                if anti_terms:
+                    from wordcloud import WordCloud
+                    wordcloud_image = artifact_cache.get_or_compute('wordcloud', scan_key, lambda: WordCloud(
+                        width=800, height=400, background_color='white', colormap='Reds').generate_from_frequencies(anti_terms).to_array())
+                    st.image(wordcloud_image, use_container_width=True)
                 else:
                     st.info("Not enough text to generate a word cloud.")
+
+            st.subheader("Top Terms in Anti-India Content")
+            if anti_terms:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.dataframe(term_counts.top_terms('anti-india', n=25).rename(
+                        columns={'term': 'Term', 'count': 'Count', 'max_overcount': 'Max Overcount'}), use_container_width=True)
+                with col2:
+                    st.dataframe(term_counts.top_terms('anti-india', n=25, bigrams=True).rename(
+                        columns={'term': 'Phrase', 'count': 'Count', 'max_overcount': 'Max Overcount'}), use_container_width=True)
+            else:
+                st.info("No terms found in anti-India content.")
         else:
             st.warning("Could not find a text column to analyze for keyword performance.")
 
     # --- INFLUENCE NETWORK TAB ---
-    with tab3:
-        if platform == "Twitter":
+    with tab3, render_run:
+        if platform in ("Twitter", "All Platforms"):
             st.header("Influence & Coordination Network")
             with st.spinner("Building influence network graph..."):
-                network_g = build_network_graph(df_final)
+                network_g = artifact_cache.get_or_compute('network_graph', scan_key, lambda: build_network_graph(twitter_df))
                 if not network_g.nodes() or len(network_g.edges()) == 0:
                     st.warning("Could not generate a network graph. Not enough user interactions (mentions) found.")
                 else:
@@ -220,38 +447,192 @@ if run_button:
 
                     with col1:
                         st.subheader("Network Graph")
-                        dot = Digraph(comment='Influence Network')
-                        dot.attr(rankdir='LR', size='12,8', splines='true', overlap='false')
-                        dot.attr('node', shape='circle', style='filled')
-
-                        for node, attrs in network_g.nodes(data=True):
-                            bot_score = attrs.get('bot_score', 0)
-                            color = '#FF4B4B' if bot_score > 5 else '#1E90FF'
-                            dot.node(node, label=node, color=color, fontcolor='white')
+                        detail_level = st.select_slider("Detail level", options=list(DETAIL_LEVELS), value=DEFAULT_DETAIL_LEVEL,
+                                                        key='network_detail')
+                        # Reduced and laid out server-side once per graph and level
+                        fig_network, view_counts = artifact_cache.get_or_compute(
+                            'network_view', fingerprint(scan_key, detail_level), lambda: build_network_view(network_g, detail_level))
+                        st.plotly_chart(fig_network, use_container_width=True)
+                        st.caption(f"Showing {view_counts['kept']:,} of {view_counts['nodes']:,} accounts; "
+                                   f"{view_counts['collapsed']:,} collapsed into grey aggregate nodes, "
+                                   f"{view_counts['hidden']:,} hidden.")
 
-                        for u, v in network_g.edges():
-                            dot.edge(u, v)
-
-                        st.graphviz_chart(dot, use_container_width=True)
+                    # Communities and PageRank over mentions plus shared hashtags and links
+                    accounts = artifact_cache.get_or_compute('graph_analytics', scan_key, lambda: account_metrics(twitter_df))
 
                     with col2:
                         st.subheader("Top Influencers")
-                        node_data = []
-                        for node, attrs in network_g.nodes(data=True):
-                            node_data.append({
-                                'Username': node,
-                                'Influence': attrs.get('influence', 0),
-                                'Bot Score': attrs.get('bot_score', 0),
-                                'Connections': network_g.degree(node)
-                            })
+                        def influencers_table():
+                            node_data = []
+                            for node, attrs in network_g.nodes(data=True):
+                                node_data.append({
+                                    'Username': node,
+                                    'Influence': attrs.get('influence', 0),
+                                    'Bot Score': attrs.get('bot_score', 0),
+                                    'Connections': network_g.degree(node)
+                                })
+                            metrics = accounts.set_index('username')
+                            table = pd.DataFrame(node_data)
+                            table['PageRank'] = table['Username'].map(metrics['pagerank'])
+                            table['Community'] = table['Username'].map(metrics['community'])
+                            table['Community Bot Score'] = table['Username'].map(metrics['community_bot_score']).round(2)
+                            return table.sort_values(by='Influence', ascending=False).reset_index(drop=True)
                         
-                        influencers_df = pd.DataFrame(node_data).sort_values(by='Influence', ascending=False).reset_index(drop=True)
-                        st.dataframe(influencers_df, use_container_width=True)
+                        influencers_df = artifact_cache.get_or_compute('influencers', scan_key, influencers_table)
+                        influencer_query = session_query('influencers', scan_key, influencers_df, search_columns=['Username'])
+                        username = st.text_input("Search usernames", key='influencers_search')
+                        paged_table(influencer_query, 'influencers',
+                                    {col: col for col in ['Influence', 'PageRank', 'Bot Score', 'Connections', 'Community Bot Score']},
+                                    search=username)
+
+                    st.subheader("Communities")
+                    communities_df = artifact_cache.get_or_compute('communities', scan_key, lambda: community_summary(accounts))
+                    if communities_df.empty:
+                        st.info("No communities of two or more accounts found.")
+                    else:
+                        st.caption("Accounts grouped by label propagation over mentions and shared hashtags and links. "
+                                   "A community with a high mean bot score is a candidate coordinated cluster.")
+                        st.dataframe(communities_df.rename(columns={
+                            'community': 'Community', 'accounts': 'Accounts', 'mean_bot_score': 'Mean Bot Score',
+                            'total_pagerank': 'Total PageRank', 'top_accounts': 'Top Accounts'}), use_container_width=True)
         else:
             st.info("Influence Network visualization is currently available only for Twitter data.")
 
     # --- RAW DATA TAB ---
-    with tab4:
+    with tab4, render_run:
         st.header("Complete Raw Data")
-        st.dataframe(df_final)
+        # Filtered, sorted and paged server-side; only the shown page reaches the browser
+        raw_query = session_query('raw_data', scan_key, df_final)
+        filter_cols = st.columns(4)
+        narratives = filter_cols[0].multiselect("Narrative", raw_query.options('sentiment'), key='raw_sentiment')
+        platforms = filter_cols[1].multiselect("Platform", raw_query.options('platform'), key='raw_platform',
+                                               disabled='platform' not in df_final.columns)
+        source = filter_cols[2].text_input("Source / author", key='raw_source')
+        search = filter_cols[3].text_input("Search text", key='raw_search')
+
+        start = end = None
+        dates = raw_query.dates()
+        if dates is not None and dates.notna().any():
+            first_day, last_day = dates.min().date(), dates.max().date()
+            date_range = st.date_input("Date range", value=(first_day, last_day), min_value=first_day, max_value=last_day,
+                                       key='raw_dates')
+            # Only a narrowed range filters, so undated posts stay listed by default
+            if len(date_range) == 2 and tuple(date_range) != (first_day, last_day):
+                start, end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+
+        sort_labels = {'engagement': "Engagement", 'bot_score': "Bot Score", 'view_count': "Views",
+                       raw_query.date_column: "Date"}
+        sort_columns = {col: label for col, label in sort_labels.items() if col in df_final.columns}
+        sort_columns[None] = "Collection order"
+        paged_table(raw_query, 'raw', sort_columns, search=search, start=start, end=end,
+                    equals={'sentiment': narratives, 'platform': platforms, source_col_map.get(layout): source})
+    st.session_state['render_run'] = render_run.finish()
+
+# --- HISTORICAL ARCHIVE ---
+archive = st.session_state.get('archive')
+if archive:
+    import plotly.express as px
+
+    summary = archive['summary']
+    st.header("Historical Archive")
+    st.caption(f"{summary.rows:,} posts from {', '.join(archive['paths'])}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Narrative Distribution")
+        sentiment_counts = summary.sentiment_counts()
+        st.plotly_chart(px.pie(values=sentiment_counts.values, names=sentiment_counts.index, color=sentiment_counts.index,
+                               color_discrete_map=SENTIMENT_COLORS, hole=.4), use_container_width=True)
+    with col2:
+        st.subheader("Top Anti-India Sources")
+        top_sources = summary.top_sources()
+        if top_sources.empty:
+            st.info("No significant anti-India sources found.")
+        else:
+            st.plotly_chart(px.bar(x=top_sources.values, y=top_sources.index, orientation='h',
+                                   labels={'y': 'Source', 'x': 'Number of Posts'}, color_discrete_sequence=['#FF4B4B']),
+                            use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Posts per Day")
+        daily = summary.daily_counts()
+        if daily.empty:
+            st.info("Could not parse dates for time series analysis.")
+        else:
+            st.plotly_chart(px.line(daily, x='day', y=[c for c in daily.columns if c != 'day'], color_discrete_map=SENTIMENT_COLORS,
+                                    labels={'day': 'Day', 'value': 'Posts', 'variable': 'Narrative'}), use_container_width=True)
+    with col2:
+        st.subheader("Bot Score Distribution")
+        bot_scores = summary.bot_score_counts()
+        if bot_scores.empty:
+            st.info("Bot score analysis is only available for Twitter.")
+        else:
+            st.plotly_chart(px.bar(x=bot_scores.index, y=bot_scores.values, labels={'x': 'Bot Score', 'y': 'Posts'},
+                                   color_discrete_sequence=['#FF4B4B']), use_container_width=True)
+
+    st.subheader("Top Drivers of Anti-India Narrative (by Engagement)")
+    if summary.drivers.empty:
+        st.info("No significant anti-India content found in the archive.")
+    else:
+        st.dataframe(summary.top_drivers(), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Keyword Performance")
+        hits = [{'Keyword': k, 'Occurrences': summary.keyword_hits[k.lower()]} for k in archive['keywords']
+                if summary.keyword_hits[k.lower()]]
+        if hits:
+            st.dataframe(pd.DataFrame(hits).sort_values(by='Occurrences', ascending=False), use_container_width=True)
+        else:
+            st.info("None of the specified keywords were found in detected anti-India content.")
+    with col2:
+        st.subheader("Top Terms in Anti-India Content")
+        st.dataframe(summary.terms.top_terms('anti-india', n=25).rename(
+            columns={'term': 'Term', 'count': 'Count', 'max_overcount': 'Max Overcount'}), use_container_width=True)
+
+    if summary.accounts:
+        st.subheader("Top Influencers")
+        if 'influencers' not in archive:
+            # Built once per archive; the graph covers every account in it
+            graph = summary.network_graph()
+            archive['influencers'] = pd.DataFrame(
+                [{'Username': node, 'Influence': attrs['influence'], 'Bot Score': attrs['bot_score'],
+                  'Connections': graph.degree(node)} for node, attrs in graph.nodes(data=True)],
+                columns=['Username', 'Influence', 'Bot Score', 'Connections']
+            ).nlargest(TOP_INFLUENCERS, 'Influence').reset_index(drop=True)
+        st.dataframe(archive['influencers'], use_container_width=True)
+
+cache_stats = artifact_cache.stats()
+cache_status.caption(f"Artifact cache: {cache_stats['hits']} hits ({cache_stats['disk_hits']} from disk), "
+                     f"{cache_stats['misses']} misses, {cache_stats['items']} in memory")
 
+# --- PERFORMANCE PANEL ---
+with performance_panel:
+    runs = {label: st.session_state[key] for label, key in (("Last scan", 'scan_run'), ("Rendering", 'render_run'))
+            if key in st.session_state}
+    if not runs:
+        st.caption("Stage timings appear here after a scan.")
+    else:
+        run = runs[st.radio("Run", list(runs), horizontal=True, key='performance_run')]
+        waterfall = run.waterfall()
+        top_level = waterfall[waterfall['depth'] == 0]
+        st.caption(f"{run.seconds:.2f}s, {int(top_level['api_calls'].sum())} API calls, "
+                   f"{top_level['bytes'].sum() / 2**20:.2f} MiB fetched")
+        if not waterfall.empty:
+            import plotly.graph_objects as go
+            labels = ["\u2003" * depth + stage for depth, stage in zip(waterfall['depth'], waterfall['stage'])]
+            fig = go.Figure(go.Bar(
+                x=waterfall['seconds'], y=labels, base=waterfall['start'], orientation='h',
+                marker_color=['#FF4B4B' if error else '#1E90FF' for error in waterfall['error']],
+                customdata=waterfall[['rows', 'api_calls', 'bytes']].fillna(0).to_numpy(),
+                hovertemplate="%{y}<br>%{x:.3f}s<br>%{customdata[0]:,} rows, %{customdata[1]} API calls, "
+                              "%{customdata[2]:,} bytes<extra></extra>"))
+            fig.update_layout(height=max(200, 22 * len(labels)), margin=dict(l=0, r=0, t=0, b=0),
+                              xaxis_title="seconds", yaxis=dict(autorange='reversed'))
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(waterfall.drop(columns=['depth']), use_container_width=True)
+        for note in run.messages:
+            st.caption(f"{note['level'].capitalize()} in {note['stage'] or run.name}: {note['message']}")
+        st.download_button("Download as JSON lines", run.to_jsonl(), file_name=f"{run.name}-{run.run_id}.jsonl",
+                           mime='application/x-ndjson')
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from instrumentation import span
+
+def frame_fingerprint(df):
+    """
+    Returns a content hash of a DataFrame: its columns, dtypes and every value.
+    Two frames with the same content get the same fingerprint.
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(list(zip(df.columns, map(str, df.dtypes)))).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts) fall back to their JSON form
+        digest.update(df.to_json(orient='split', date_format='iso').encode())
+    return digest.hexdigest()
+
+def fingerprint(*parts):
+    """
+    Combines frame fingerprints and analysis parameters into one cache key.
+    DataFrames are hashed by content; anything else by its repr.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(frame_fingerprint(part).encode() if isinstance(part, pd.DataFrame) else repr(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class ArtifactCache:
+    """
+    Size-bounded LRU cache of derived artifacts (analyzed frames, graphs,
+    figures, rendered images), with an optional on-disk tier.
+
+    Entries are looked up by (kind, key), where key is normally a fingerprint()
+    of the input frame plus the parameters that produced the artifact.
+    Artifacts evicted from memory stay on disk when a disk_dir is set; ones
+    that can't be pickled are kept in memory only.
+    """
+
+    def __init__(self, max_items=128, disk_dir=None, max_disk_items=512):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self.max_disk_items = max_disk_items
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get_or_compute(self, kind, key, compute):
+        """
+        Returns the cached artifact for (kind, key), calling compute() and
+        caching its result on a miss. Recorded as an 'artifact.<kind>' span
+        whose 'cache' attribute says where the artifact came from.
+        """
+        entry_key = f"{kind}-{key}"
+        with span(f"artifact.{kind}") as current:
+            with self._lock:
+                if entry_key in self._entries:
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    current.attrs['cache'] = 'memory'
+                    return self._entries[entry_key]
+
+            value = self._read_disk(entry_key)
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(entry_key, value)
+                current.attrs['cache'] = 'disk'
+                return value
+
+            value = compute()
+            with self._lock:
+                self.misses += 1
+                self._remember(entry_key, value)
+            self._write_disk(entry_key, value)
+            current.attrs['cache'] = 'computed'
+            return value
+
+    def stats(self):
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses, 'items': len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, entry_key, value):
+        self._entries[entry_key] = value
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, entry_key):
+        return os.path.join(self.disk_dir, f"{entry_key}.pkl")
+
+    def _read_disk(self, entry_key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(entry_key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path) # Refresh the file's position in the disk LRU
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def _write_disk(self, entry_key, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(entry_key)
+        try:
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+        except Exception:
+            # Some artifacts (e.g. live matplotlib figures) can't be pickled
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+            return
+
+        files = [os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir) if name.endswith('.pkl')]
+        if len(files) > self.max_disk_items:
+            files.sort(key=os.path.getmtime)
+            for stale in files[:len(files) - self.max_disk_items]:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
@@ -0,0 +1,290 @@
+"""
+Headless batch scans: every keyword set in a manifest, on every listed
+platform, run across a process pool without the Streamlit UI.
+
+    python batch_runner.py manifest.json [--workers 8] [--store] [--force]
+                           [--trace trace.jsonl] [--metrics-file sentry.prom] [--metrics-port 9108]
+
+Manifest layout:
+
+    {
+        "output_dir": "runs/nightly",
+        "platforms": ["Twitter", "Reddit", "YouTube", "News Articles"],
+        "max_results": 100,
+        "subreddit": "all",
+        "keyword_sets": [
+            {"name": "kashmir", "keywords": ["free kashmir", "kashmir under siege"]},
+            {"name": "boycott", "keywords": ["boycott india"], "platforms": ["Twitter"], "max_results": 500}
+        ]
+    }
+
+A keyword set may override platforms, max_results and subreddit. Each job
+(keyword set x platform) writes its results to <output_dir>/<set>/<platform>/,
+finishing with result.json. Jobs whose result.json already exists are skipped,
+so an interrupted sweep picks up where it stopped.
+
+Workers share one rate-limit budget per platform (see rate_limit.py) and
+never sleep on it: a job that runs out keeps the posts it has and records
+"resume_at" in its result.json. Such partial jobs are run again by the first
+sweep started after that time.
+
+Every stage of a job is timed (see instrumentation.py) and saved with it as
+trace.jsonl. --trace collects all jobs' stage records into one JSON lines
+file, and the per-stage totals are exported in Prometheus text format to
+--metrics-file at the end or served at --metrics-port while the sweep runs.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import instrumentation
+from scanner import PLATFORMS, fetch_platform, resume_at
+
+RESULT_FILE = 'result.json'
+ERROR_FILE = 'error.json'
+TRACE_FILE = 'trace.jsonl'
+SUMMARY_FILE = 'summary.json'
+TOP_INFLUENCERS = 50
+HIGH_RISK_BOT_SCORE = 5 # Same cut-off the dashboard uses to colour likely bots
+
+log = logging.getLogger('sentry.batch')
+
+def _slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-')
+
+def _write_json(path, data):
+    # Written under a temporary name and renamed, so a half-written file never counts as done
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(path + '.tmp', path)
+
+def load_jobs(manifest):
+    """
+    Expands a manifest into one job per (keyword set, platform).
+
+    Returns:
+        list: Job dicts with 'id', 'name', 'platform', 'keywords',
+        'max_results' and 'subreddit'.
+    """
+    jobs, seen = [], set()
+    for entry in manifest['keyword_sets']:
+        keywords = [k.strip() for k in entry['keywords'] if k and k.strip()]
+        if not keywords:
+            raise ValueError(f"Keyword set '{entry.get('name')}' has no keywords")
+        name = entry.get('name') or keywords[0]
+        for platform in entry.get('platforms', manifest.get('platforms', PLATFORMS)):
+            if platform not in PLATFORMS:
+                raise ValueError(f"Unknown platform '{platform}' in keyword set '{name}'")
+            job_id = f"{_slug(name)}/{_slug(platform)}"
+            if job_id in seen:
+                raise ValueError(f"Duplicate job '{job_id}'; keyword set names must be unique")
+            seen.add(job_id)
+            jobs.append({
+                'id': job_id, 'name': name, 'platform': platform, 'keywords': keywords,
+                'max_results': entry.get('max_results', manifest.get('max_results', 50)),
+                'subreddit': entry.get('subreddit', manifest.get('subreddit', 'all')),
+            })
+    return jobs
+
+def run_job(job, output_dir, use_store=False):
+    """
+    Collects and analyzes one job in a worker process and writes its results:
+    posts.jsonl (analyzed posts with near-duplicate clusters), plus network_edges.csv and influencers.csv
+    for Twitter, and result.json with the job's summary.
+
+    Returns:
+        dict: The contents of result.json.
+    """
+    from analysis import analyze_posts, build_network_graph
+    from near_duplicates import find_near_duplicates
+
+    started = time.monotonic()
+    job_dir = os.path.join(output_dir, job['id'])
+    os.makedirs(job_dir, exist_ok=True)
+
+    store = None
+    if use_store:
+        from store import PostStore
+        store = PostStore()
+    df = fetch_platform(job['platform'], job['keywords'], max_results=job['max_results'],
+                        subreddit=job['subreddit'], store=store)
+    fetch_seconds = time.monotonic() - started
+
+    result = {**job, 'rows': len(df), 'fetch_seconds': round(fetch_seconds, 2)}
+    limited_until = resume_at(job['platform'])
+    if limited_until:
+        result['resume_at'] = datetime.fromtimestamp(limited_until, timezone.utc).isoformat()
+    if not df.empty:
+        df = analyze_posts(df, job['platform'], job['keywords'])
+        result['sentiment'] = df['sentiment'].value_counts().to_dict()
+        result['keyword_hits'] = df.attrs.get('keyword_hits', {})
+        df = find_near_duplicates(df)
+        result['duplicate_clusters'] = int(df['dup_cluster_id'].max()) + 1
+        result['duplicated_posts'] = int((df['dup_cluster_id'] >= 0).sum())
+        if 'bot_score' in df.columns:
+            if 'username' in df.columns:
+                result['high_risk_accounts'] = int(df.loc[df['bot_score'] > HIGH_RISK_BOT_SCORE, 'username'].nunique())
+            result['mean_bot_score'] = round(float(df['bot_score'].mean()), 2)
+        df.to_json(os.path.join(job_dir, 'posts.jsonl'), orient='records', lines=True, date_format='iso')
+
+        if job['platform'] == 'Twitter':
+            graph = build_network_graph(df)
+            pd.DataFrame(
+                [(u, v, d['weight']) for u, v, d in graph.edges(data=True)], columns=['source', 'target', 'weight']
+            ).to_csv(os.path.join(job_dir, 'network_edges.csv'), index=False)
+            pd.DataFrame(
+                [(u, d['influence'], d['bot_score']) for u, d in graph.nodes(data=True)],
+                columns=['username', 'influence', 'bot_score']
+            ).nlargest(TOP_INFLUENCERS, 'influence').to_csv(os.path.join(job_dir, 'influencers.csv'), index=False)
+            result['network'] = {'nodes': graph.number_of_nodes(), 'edges': graph.number_of_edges()}
+
+    result['seconds'] = round(time.monotonic() - started, 2)
+    result['finished_at'] = datetime.now(timezone.utc).isoformat()
+    _write_json(os.path.join(job_dir, RESULT_FILE), result)
+    error_path = os.path.join(job_dir, ERROR_FILE)
+    if os.path.exists(error_path):
+        os.remove(error_path)
+    return result
+
+def _run_job_safely(job, output_dir, use_store):
+    """
+    run_job for the pool: failures are written to error.json and returned
+    instead of raised, so one bad job doesn't stop the sweep. The job's
+    stage records are saved as trace.jsonl and returned under 'trace'.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    job_dir = os.path.join(output_dir, job['id'])
+    with instrumentation.record('batch.job', job=job['id'], platform=job['platform']) as run:
+        try:
+            result = run_job(job, output_dir, use_store)
+        except Exception as e:
+            result = {**job, 'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc(),
+                      'finished_at': datetime.now(timezone.utc).isoformat()}
+            os.makedirs(job_dir, exist_ok=True)
+            _write_json(os.path.join(job_dir, ERROR_FILE), result)
+    with open(os.path.join(job_dir, TRACE_FILE), 'w', encoding='utf-8') as f:
+        f.write(run.to_jsonl())
+    return {**result, 'trace': run.to_records()}
+
+def _read_result(output_dir, job):
+    path = os.path.join(output_dir, job['id'], RESULT_FILE)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def _is_done(output_dir, job):
+    """
+    Whether a job has a result.json that needs no re-run: complete, or
+    partial with its rate limit not yet reset.
+    """
+    result = _read_result(output_dir, job)
+    if result is None:
+        return False
+    return 'resume_at' not in result or datetime.fromisoformat(result['resume_at']) > datetime.now(timezone.utc)
+
+def write_summary(output_dir, jobs, failures):
+    """
+    Collects every finished job's result.json into summary.json, with
+    totals per platform and the keywords hit most across the sweep.
+    """
+    results = [r for r in (_read_result(output_dir, job) for job in jobs) if r]
+    per_platform = {}
+    keyword_hits = Counter()
+    for r in results:
+        totals = per_platform.setdefault(r['platform'], {'jobs': 0, 'rows': 0, 'anti-india': 0})
+        totals['jobs'] += 1
+        totals['rows'] += r['rows']
+        totals['anti-india'] += r.get('sentiment', {}).get('anti-india', 0)
+        keyword_hits.update(r.get('keyword_hits', {}))
+
+    summary = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'jobs': len(jobs), 'completed': len(results), 'failed': len(failures),
+        'platforms': per_platform,
+        'top_keywords': dict(keyword_hits.most_common(20)),
+        'results': results,
+        'failures': [{k: f[k] for k in ('id', 'error')} for f in failures],
+    }
+    _write_json(os.path.join(output_dir, SUMMARY_FILE), summary)
+    return summary
+
+def run_batch(manifest, output_dir=None, workers=None, use_store=False, force=False, trace_path=None):
+    """
+    Runs every job of a manifest across a process pool and writes the summary.
+
+    Args:
+        manifest (dict): Parsed manifest, see the module docstring.
+        output_dir (str): Overrides the manifest's output_dir.
+        workers (int): Worker processes, defaults to the CPU count.
+        use_store (bool): Fetch incrementally through the local post store.
+        force (bool): Re-run jobs that already have a result.json.
+        trace_path (str): JSON lines file every job's stage records are
+            appended to. They are always added to instrumentation.registry.
+
+    Returns:
+        dict: The summary written to summary.json.
+    """
+    output_dir = output_dir or manifest.get('output_dir', os.path.join('runs', 'batch'))
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = load_jobs(manifest)
+    pending = [job for job in jobs if force or not _is_done(output_dir, job)]
+    log.info("%d jobs, %d already done, %d to run", len(jobs), len(jobs) - len(pending), len(pending))
+
+    failures = []
+    if pending:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_job_safely, job, output_dir, use_store): job for job in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                trace = result.pop('trace', [])
+                instrumentation.registry.observe(trace)
+                if trace_path:
+                    with open(trace_path, 'a', encoding='utf-8') as f:
+                        f.writelines(json.dumps(record, default=str) + "\n" for record in trace)
+                if 'error' in result:
+                    failures.append(result)
+                    log.warning("[%d/%d] %s failed: %s", done, len(pending), result['id'], result['error'])
+                elif 'resume_at' in result:
+                    log.warning("[%d/%d] %s: %d posts in %.1fs, rate limited until %s", done, len(pending),
+                                result['id'], result['rows'], result['seconds'], result['resume_at'])
+                else:
+                    log.info("[%d/%d] %s: %d posts in %.1fs", done, len(pending), result['id'], result['rows'], result['seconds'])
+    return write_summary(output_dir, jobs, failures)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifest', help="Path to the JSON manifest.")
+    parser.add_argument('--output-dir', help="Overrides the manifest's output_dir.")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count).")
+    parser.add_argument('--store', action='store_true', help="Fetch incrementally through the local post store.")
+    parser.add_argument('--force', action='store_true', help="Re-run jobs that already finished.")
+    parser.add_argument('--trace', help="JSON lines file to append every job's stage timings to.")
+    parser.add_argument('--metrics-file', help="Write per-stage Prometheus metrics here when the sweep ends.")
+    parser.add_argument('--metrics-port', type=int, help="Serve per-stage Prometheus metrics at :PORT/metrics.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    with open(args.manifest, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if args.metrics_port:
+        instrumentation.serve_metrics(args.metrics_port)
+    summary = run_batch(manifest, output_dir=args.output_dir, workers=args.workers,
+                        use_store=args.store, force=args.force, trace_path=args.trace)
+    if args.metrics_file:
+        instrumentation.write_metrics(args.metrics_file)
+    print(f"{summary['completed']}/{summary['jobs']} jobs complete, {summary['failed']} failed this run")
+
+if __name__ == '__main__':
+    main()
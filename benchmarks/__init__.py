@@ -0,0 +1,6 @@
+"""
+Offline benchmarks for the analysis pipeline.
+
+Run a benchmark from the repository root, e.g.:
+    python -m benchmarks.bot_score
+"""
@@ -0,0 +1,58 @@
+"""
+Benchmarks analysis.calculate_bot_score against the original row-by-row
+implementation and checks that both produce identical scores.
+
+    python -m benchmarks.bot_score [--sizes 10000 100000 1000000] [--legacy-max 100000]
+"""
+import argparse
+import time
+import pandas as pd
+from datetime import datetime, timezone
+
+from analysis import calculate_bot_score
+from benchmarks.synthetic import generate_tweets
+
+def legacy_bot_scores(df, now):
+    """
+    The original iterrows() implementation, kept as the reference for scores.
+    """
+    scores = []
+    for index, row in df.iterrows():
+        score = 0
+        account_age_days = (now - pd.to_datetime(row['user_created_at'])).days
+        if account_age_days < 60: score += 4
+        if row['following_count'] > 100 and row['followers_count'] > 0:
+            ratio = row['followers_count'] / row['following_count']
+            if ratio < 0.1: score += 3
+        if row['followers_count'] < 10: score += 2
+        if not row['is_verified']: score += 1
+        scores.append(min(score, 10))
+    return scores
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=100_000,
+                        help="Largest size the row-by-row reference is run at.")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    print(f"{'rows':>10} {'vectorized (s)':>15} {'legacy (s)':>12} {'speedup':>9}  match")
+    for n in args.sizes:
+        df = generate_tweets(n, seed=n, now=now)
+
+        start = time.perf_counter()
+        scored = calculate_bot_score(df.copy(), now=now)
+        vectorized = time.perf_counter() - start
+
+        if n <= args.legacy_max:
+            start = time.perf_counter()
+            expected = legacy_bot_scores(df, now)
+            legacy = time.perf_counter() - start
+            match = scored['bot_score'].tolist() == expected
+            print(f"{n:>10} {vectorized:>15.4f} {legacy:>12.4f} {legacy / vectorized:>8.1f}x  {match}")
+        else:
+            print(f"{n:>10} {vectorized:>15.4f} {'-':>12} {'-':>9}  -")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmarks the narrative classifier backends (classifiers.py) in posts/s.
+Synthetic Reddit-style posts are labelled by the keyword rules, and an
+n-gram model is trained on the first --train of them; the rest are
+classified by every backend:
+
+    cold    - a fresh classifier, every text predicted
+    workers - the same on 1 and --workers threads
+    cached  - the same posts again, all answered by the text-hash cache
+
+The n-gram model's agreement with the keyword labels on the held-out posts
+is reported too. Synthetic posts only carry the listed phrases, so this
+measures fit and speed, not how well the model generalizes.
+
+    python -m benchmarks.classifiers [--posts 100000] [--train 20000] [--workers 4]
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import generate_posts
+from classifiers import KeywordClassifier, train_ngram_model
+
+def posts_per_second(classifier, texts):
+    start = time.perf_counter()
+    labels = classifier.classify(texts)
+    return len(texts) / (time.perf_counter() - start), labels
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=100_000, help="Posts classified by each backend.")
+    parser.add_argument('--train', type=int, default=20_000, help="Posts the n-gram model is trained on.")
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    texts = generate_posts('Reddit', args.train + args.posts, keyword_share=0.3)['text_content'].tolist()
+    labels = KeywordClassifier().classify(texts)
+    start = time.perf_counter()
+    model = train_ngram_model(texts[:args.train], labels[:args.train].tolist())
+    print(f"n-gram model trained on {args.train:,} posts in {time.perf_counter() - start:.1f}s\n")
+    texts, labels = texts[args.train:], labels[args.train:]
+
+    backends = {
+        'keyword': lambda workers: KeywordClassifier(max_workers=workers),
+        'ngram': lambda workers: type(model)(model.weights, model.bias, labels=model.labels, max_workers=workers),
+    }
+    print(f"{'backend':<9} {'workers':>7} {'cold posts/s':>13} {'cached posts/s':>15} {'agreement':>10}")
+    for name, build in backends.items():
+        for workers in sorted({1, args.workers}):
+            classifier = build(workers)
+            cold, predicted = posts_per_second(classifier, texts)
+            cached, _ = posts_per_second(classifier, texts)
+            print(f"{name:<9} {workers:>7} {cold:>13,.0f} {cached:>15,.0f} {(predicted == labels).mean():>10.2%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Reports the memory of collected post frames before and after
+schema.compact_frame, in bytes per post. It uses synthetic frames shaped
+like each collector's output plus the analysis columns (sentiment, bot
+score). "object" is the frame with Python-object strings, the default
+before pandas 3. "default" is the frame as pandas builds it here, and
+"compact" is the frame after compact_frame, which is also timed.
+
+    python -m benchmarks.frame_memory [--posts 1000000] [--columns]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import PLATFORMS, generate_posts
+from schema import compact_frame, memory_report
+
+def with_analysis_columns(df, seed=0):
+    """
+    Adds the columns analysis.analyze_posts adds, in their previous dtypes:
+    sentiment labels as strings and an int64 bot score.
+    """
+    rng = np.random.default_rng(seed)
+    df['sentiment'] = np.array(['neutral', 'anti-india', 'pro-india'], dtype=object)[rng.integers(0, 3, size=len(df))]
+    df['bot_score'] = rng.integers(0, 11, size=len(df))
+    return df
+
+def as_object_strings(df):
+    """
+    Copy of a frame with every string column as Python objects.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_string_dtype(df[column]) and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(object)
+    return df
+
+def bytes_per_post(df):
+    return memory_report(df)['bytes_per_post'].iloc[-1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--columns', action='store_true', help="Also print the per-column report of each compact frame.")
+    args = parser.parse_args()
+
+    print(f"{'platform':<14} {'posts':>9} | {'object B/post':>13} {'default B/post':>14} {'compact B/post':>14} | "
+          f"{'saved vs object':>15} {'vs default':>10} {'compact (s)':>11}")
+    for seed, platform in enumerate(PLATFORMS):
+        df = with_analysis_columns(generate_posts(platform, args.posts, seed=seed), seed=seed)
+        object_bytes = bytes_per_post(as_object_strings(df))
+        default_bytes = bytes_per_post(df)
+        start = time.perf_counter()
+        compact = compact_frame(df)
+        seconds = time.perf_counter() - start
+        compact['bot_score'] = compact['bot_score'].astype(np.int8) # As calculate_bot_score now stores it
+        compact_bytes = bytes_per_post(compact)
+        print(f"{platform:<14} {args.posts:>9} | {object_bytes:>13.1f} {default_bytes:>14.1f} {compact_bytes:>14.1f} | "
+              f"{1 - compact_bytes / object_bytes:>15.1%} {1 - compact_bytes / default_bytes:>10.1%} {seconds:>11.2f}")
+        if args.columns:
+            print(memory_report(compact).to_string(index=False), end="\n\n")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmarks sparse community detection and PageRank
+(graph_analytics.label_propagation and graph_analytics.pagerank) against
+networkx on the same synthetic mention graphs, in which accounts mostly
+mention others in their own planted group. It checks that PageRank
+matches networkx and reports how many communities each method finds and
+how well they match the planted groups.
+
+    python -m benchmarks.graph_analytics [--tweets 100000 1000000 1500000] [--louvain-max-edges 200000]
+"""
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from analysis import build_network_graph
+from benchmarks.synthetic import generate_tweets
+from graph_analytics import interaction_matrix, label_propagation, pagerank
+
+def planted_tweets(n, seed=0, group_size=100, in_group=0.9, mentions=2):
+    """
+    Synthetic tweets whose mentions stay inside groups of group_size
+    accounts with probability in_group.
+
+    Returns:
+        tuple: (pandas.DataFrame shaped like collector.get_tweets_df output,
+                numpy.ndarray of the planted group per user id).
+    """
+    rng = np.random.default_rng(seed)
+    df = generate_tweets(n, seed=seed)
+    users = int(df['author_id'].max()) + 1
+    groups = np.arange(users) // group_size
+    authors = df['author_id'].to_numpy()
+    targets = np.where(
+        rng.random((n, mentions)) < in_group,
+        groups[authors][:, None] * group_size + rng.integers(0, group_size, size=(n, mentions)),
+        rng.integers(0, users, size=(n, mentions)),
+    ).clip(max=users - 1)
+    df['tweet_text'] = [f"post {i} about india " + " ".join(f"@user_{t}" for t in row) for i, row in enumerate(targets.tolist())]
+    return df, groups
+
+def purity(labels, truth):
+    """
+    Share of accounts whose community's most common planted group is their own.
+    """
+    counts = pd.crosstab(labels, truth)
+    return counts.max(axis=1).sum() / len(labels)
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tweets', type=int, nargs='+', default=[100_000, 1_000_000, 1_500_000])
+    parser.add_argument('--group-size', type=int, default=100, help="Accounts per planted group.")
+    parser.add_argument('--louvain-max-edges', type=int, default=200_000,
+                        help="Largest graph networkx's Louvain is run on.")
+    args = parser.parse_args()
+
+    print(f"{'tweets':>9} {'accounts':>9} {'edges':>9} | {'nx graph':>9} {'nx pagerank':>12} {'nx lpa':>8} "
+          f"{'nx louvain':>11} | {'matrix':>7} {'lpa':>6} {'pagerank':>9} | {'pr max diff':>11} "
+          f"{'communities nx/ours':>20} {'purity nx/ours':>15}")
+    for n in args.tweets:
+        df, groups = planted_tweets(n, seed=n, group_size=args.group_size)
+
+        G, graph_time = timed(build_network_graph, df)
+        nx_rank, nx_pagerank_time = timed(nx.pagerank, G, weight='weight')
+        nx_communities, nx_lpa_time = timed(lambda: list(nx.community.label_propagation_communities(G)))
+        louvain_time = '-'
+        if G.number_of_edges() <= args.louvain_max_edges:
+            _, seconds = timed(nx.community.louvain_communities, G, weight='weight', seed=0)
+            louvain_time = f"{seconds:.2f}"
+
+        (matrix, usernames), matrix_time = timed(interaction_matrix, df, hashtags=False, urls=False)
+        communities, lpa_time = timed(label_propagation, matrix)
+        # networkx treats the undirected graph as two directed edges per pair
+        symmetric = (matrix + matrix.T).tocsr()
+        rank, pagerank_time = timed(pagerank, symmetric)
+
+        expected = np.array([nx_rank[u] for u in usernames])
+        truth = groups[[int(u.split('_')[1]) for u in usernames]]
+        nx_labels = {u: i for i, members in enumerate(nx_communities) for u in members}
+        nx_purity = purity(np.array([nx_labels[u] for u in usernames]), truth)
+        print(f"{n:>9} {len(usernames):>9} {G.number_of_edges():>9} | {graph_time:>9.2f} {nx_pagerank_time:>12.2f} "
+              f"{nx_lpa_time:>8.2f} {louvain_time:>11} | {matrix_time:>7.2f} {lpa_time:>6.2f} {pagerank_time:>9.2f} | "
+              f"{np.abs(rank - expected).max():>11.2e} {len(nx_communities):>9} / {communities.max() + 1:<9} "
+              f"{nx_purity:>6.3f} / {purity(communities, truth):.3f}")
+
+if __name__ == '__main__':
+    main()
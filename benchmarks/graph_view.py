@@ -0,0 +1,46 @@
+"""
+Benchmarks the influence network view (graph_view.build_network_view):
+reduction, server-side layout and figure construction at each detail
+level, for mention graphs of increasing size, plus the size of the figure
+sent to the browser.
+
+    python -m benchmarks.graph_view [--users 1000 10000 100000]
+"""
+import argparse
+import time
+
+from analysis import build_network_graph, calculate_bot_score
+from benchmarks.synthetic import generate_tweets
+from graph_view import DETAIL_LEVELS, compute_layout, network_figure, reduce_graph
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--tweets-per-user', type=int, default=5)
+    parser.add_argument('--mentions', type=float, default=1.5, help="Average mentions per tweet.")
+    args = parser.parse_args()
+
+    print(f"{'accounts':>9} {'edges':>9} {'level':>9} {'drawn':>6} {'collapsed':>10} "
+          f"{'reduce (s)':>11} {'layout (s)':>11} {'figure (s)':>11} {'json (KB)':>10}")
+    for users in args.users:
+        df = generate_tweets(users * args.tweets_per_user, seed=users, users=users, mentions_per_tweet=args.mentions)
+        G = build_network_graph(calculate_bot_score(df))
+        for level, params in DETAIL_LEVELS.items():
+            start = time.perf_counter()
+            view, counts = reduce_graph(G, **params)
+            reduce_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            positions = compute_layout(view)
+            layout_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            fig = network_figure(view, positions)
+            figure_time = time.perf_counter() - start
+            size_kb = len(fig.to_json()) / 1024
+
+            print(f"{G.number_of_nodes():>9} {G.number_of_edges():>9} {level:>9} {view.number_of_nodes():>6} "
+                  f"{counts['collapsed']:>10} {reduce_time:>11.3f} {layout_time:>11.3f} {figure_time:>11.3f} {size_kb:>10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmarks mention-graph construction (analysis.build_network_graph and
+analysis.build_mention_matrix) and checks the graph against the original
+per-mention DataFrame filtering implementation at small sizes.
+
+    python -m benchmarks.mention_graph [--sizes 10000 100000 1000000] [--legacy-max 2000]
+"""
+import argparse
+import time
+import networkx as nx
+
+from analysis import build_mention_matrix, build_network_graph
+from benchmarks.synthetic import generate_tweets
+
+def legacy_network_graph(df):
+    """
+    The original implementation, kept as the reference for the edge set.
+    """
+    df = df.copy()
+    G = nx.Graph()
+    df['username_lower'] = df['username'].str.lower()
+    all_usernames = set(df['username_lower'])
+    for index, row in df.iterrows():
+        G.add_node(row['username'], bot_score=row.get('bot_score', 0))
+    for index, row in df.iterrows():
+        mentioned_users = [word.strip("@,.").lower() for word in row['tweet_text'].split() if word.startswith('@')]
+        for mentioned_user in mentioned_users:
+            if mentioned_user in all_usernames and row['username_lower'] != mentioned_user:
+                original = df[df['username_lower'] == mentioned_user]['username']
+                if not original.empty:
+                    G.add_edge(row['username'], original.iloc[0])
+    return G
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=2_000,
+                        help="Largest size the original implementation is run at.")
+    parser.add_argument('--mentions', type=float, default=1.5, help="Average mentions per tweet.")
+    args = parser.parse_args()
+
+    sizes = sorted(set(args.sizes + [args.legacy_max])) if args.legacy_max else args.sizes
+    print(f"{'tweets':>10} {'edges':>10} {'graph (s)':>10} {'sparse (s)':>11} {'legacy (s)':>11}  match")
+    for n in sizes:
+        df = generate_tweets(n, seed=n, mentions_per_tweet=args.mentions)
+
+        start = time.perf_counter()
+        graph = build_network_graph(df)
+        graph_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build_mention_matrix(df)
+        sparse_time = time.perf_counter() - start
+
+        legacy_time, match = '-', '-'
+        if n <= args.legacy_max:
+            start = time.perf_counter()
+            expected = legacy_network_graph(df)
+            legacy_time = f"{time.perf_counter() - start:.3f}"
+            match = ({frozenset(e) for e in graph.edges()} == {frozenset(e) for e in expected.edges()}
+                     and set(graph.nodes()) == set(expected.nodes()))
+        print(f"{n:>10} {graph.number_of_edges():>10} {graph_time:>10.3f} {sparse_time:>11.3f} {legacy_time:>11}  {match}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmarks near-duplicate clustering (near_duplicates.find_near_duplicates)
+on synthetic posts with planted copy-paste campaigns. It reports run time,
+how many planted copies were recovered, and how many organic posts were
+wrongly clustered. It also times a re-run through the signature cache with
+1% new posts, and checks the result against exact pairwise Jaccard at
+small sizes.
+
+    python -m benchmarks.near_duplicates [--sizes 10000 100000 1000000] [--pairwise-max 2000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from near_duplicates import SignatureCache, find_near_duplicates, token_hashes
+
+def generate_campaign_posts(n, seed=0, campaign_share=0.1, copies=50, vocab=5000):
+    """
+    Generates n posts: organic posts of random words, plus campaigns in which
+    `copies` accounts post the same template with one or two words swapped
+    and their own @mention and link.
+
+    Returns:
+        pandas.DataFrame: tweet_id, username, tweet_text and campaign
+        (the planted template index, or -1 for organic posts).
+    """
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(vocab)], dtype=object)
+    campaign_posts = int(n * campaign_share) // copies * copies
+    templates = [rng.integers(0, vocab, size=rng.integers(12, 30)) for _ in range(campaign_posts // copies)]
+
+    texts, campaign = [], []
+    for index, template in enumerate(templates):
+        for _ in range(copies):
+            copy = template.copy()
+            edits = rng.integers(0, len(copy), size=rng.integers(0, 3))
+            copy[edits] = rng.integers(0, vocab, size=len(edits))
+            texts.append(" ".join(words[copy]) + f" @user{rng.integers(0, n)} https://t.co/{rng.integers(0, 1 << 30):x}")
+            campaign.append(index)
+    for _ in range(n - campaign_posts):
+        texts.append(" ".join(words[rng.integers(0, vocab, size=rng.integers(8, 30))]))
+        campaign.append(-1)
+
+    order = rng.permutation(n)
+    return pd.DataFrame({
+        'tweet_id': np.arange(n),
+        'username': [f"user{i}" for i in rng.integers(0, max(1, n // 5), size=n)],
+        'tweet_text': np.array(texts, dtype=object)[order],
+        'campaign': np.array(campaign)[order],
+    })
+
+def score(df):
+    """
+    Returns (share of planted copies in their campaign's largest cluster,
+             organic posts placed in any cluster).
+    """
+    planted = df[df['campaign'] >= 0]
+    recovered = planted.groupby('campaign')['dup_cluster_id'].agg(
+        lambda ids: ids[ids >= 0].value_counts().iloc[0] if (ids >= 0).any() else 0).sum()
+    false_positives = int((df.loc[df['campaign'] < 0, 'dup_cluster_id'] >= 0).sum())
+    return recovered / max(1, len(planted)), false_positives
+
+def pairwise_clusters(texts, threshold, shingle_size):
+    """
+    Exact O(n^2) reference: links every pair with shingle Jaccard >= threshold.
+    """
+    shingle_sets = []
+    for text in texts:
+        tokens = token_hashes(text)
+        shingle_sets.append({tuple(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)})
+    parent = list(range(len(texts)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            a, b = shingle_sets[i], shingle_sets[j]
+            if a and b and len(a & b) / len(a | b) >= threshold:
+                parent[find(i)] = find(j)
+    return [find(i) for i in range(len(texts))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--pairwise-max', type=int, default=2_000,
+                        help="Largest size the exact pairwise comparison is run at.")
+    args = parser.parse_args()
+
+    print(f"{'posts':>10} {'clusters':>9} {'minhash+lsh (s)':>16} {'cached rerun (s)':>17} "
+          f"{'recall':>7} {'false pos':>10} {'pairwise (s)':>13}  pair agreement")
+    for n in sorted(set(args.sizes + ([args.pairwise_max] if args.pairwise_max else []))):
+        df = generate_campaign_posts(n, seed=n)
+        cache = SignatureCache(max_items=2 * n)
+
+        start = time.perf_counter()
+        find_near_duplicates(df, cache=cache)
+        first_time = time.perf_counter() - start
+        recall, false_positives = score(df)
+
+        # A re-run over the same posts plus 1% new ones only hashes the new posts
+        grown = pd.concat([df, generate_campaign_posts(max(1, n // 100), seed=n + 1).assign(
+            tweet_id=lambda d: d['tweet_id'] + n)], ignore_index=True)
+        start = time.perf_counter()
+        find_near_duplicates(grown, cache=cache)
+        rerun_time = time.perf_counter() - start
+
+        pairwise_time, agreement = '-', '-'
+        if n <= args.pairwise_max:
+            from near_duplicates import SHINGLE_SIZE, SIMILARITY_THRESHOLD
+            start = time.perf_counter()
+            exact = np.array(pairwise_clusters(df['tweet_text'].tolist(), SIMILARITY_THRESHOLD, SHINGLE_SIZE))
+            pairwise_time = f"{time.perf_counter() - start:.2f}"
+            # Share of exact same-cluster pairs (within planted campaigns) that LSH also groups
+            same_exact = exact[:, None] == exact[None, :]
+            ids = df['dup_cluster_id'].to_numpy()
+            same_lsh = (ids[:, None] == ids[None, :]) & (ids[:, None] >= 0)
+            upper = np.triu(np.ones_like(same_exact), k=1)
+            agreement = f"{(same_lsh & same_exact & upper).sum() / max(1, (same_exact & upper).sum()):.3f}"
+
+        clusters = int(df['dup_cluster_id'].max()) + 1
+        print(f"{n:>10} {clusters:>9} {first_time:>16.2f} {rerun_time:>17.2f} "
+              f"{recall:>7.3f} {false_positives:>10} {pairwise_time:>13}  {agreement}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark suite for the analysis pipeline. Each stage runs on seeded
+synthetic corpora of every platform (benchmarks.synthetic.generate_posts),
+and its time and peak memory are recorded at each size. Results are
+written as JSON. Pass an earlier run as --baseline to flag the stages that
+got slower or bigger since then.
+
+Peak memory is measured with tracemalloc in a second, separate run of each
+stage. It counts Python and NumPy allocations; Arrow string buffers are
+not included.
+
+    python -m benchmarks.pipeline [--sizes 1000 10000 100000 1000000] [--platforms Twitter Reddit]
+                                  [--stages sentiment bot_score] [--output results.json]
+                                  [--baseline earlier.json] [--repeat 3] [--no-memory]
+"""
+import argparse
+import gc
+import json
+import os
+import platform as host
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from analysis import analyze_narrative_sentiment, build_network_graph, calculate_bot_score
+from benchmarks.synthetic import PLATFORMS, generate_posts
+from burst import BurstTracker
+from graph_analytics import account_metrics
+from near_duplicates import find_near_duplicates
+from schema import compact_frame
+from term_frequency import TermFrequency
+
+KEYWORDS = ['boycott india', 'free kashmir']
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+REGRESSION_THRESHOLD = 1.25 # New / baseline ratio flagged as a regression
+NOISE_FLOOR_SECONDS = 0.05 # Timings below this are too noisy to compare
+NOISE_FLOOR_MIB = 1.0
+REPEAT = 3 # Best-of runs per stage; the first also pays for lazy imports
+LONG_RUN_SECONDS = 2.0 # Slower runs are timed once; noise is small next to them
+
+def dashboard_aggregations(df):
+    """
+    The Threat Dashboard's per-scan aggregations: narrative counts, top
+    anti-India sources and daily activity.
+    """
+    source_col = next(c for c in ('username', 'author', 'channel_title', 'source') if c in df.columns)
+    date_col = next(c for c in ('tweet_created_at', 'created_at', 'published_at') if c in df.columns)
+    sentiment_counts = df['sentiment'].value_counts()
+    top_sources = df.loc[df['sentiment'] == 'anti-india', source_col].astype(str).value_counts().nlargest(5)
+    daily = df.set_index(date_col).resample('D').size()
+    return sentiment_counts, top_sources, daily
+
+# Stage -> (platforms it applies to or None for all, input frame, function).
+# 'raw' stages get the collector frame, 'analyzed' stages the frame after
+# compaction, sentiment and bot scoring, as the app hands it on.
+STAGES = {
+    'compact': (None, 'raw', compact_frame),
+    'sentiment': (None, 'compacted', lambda df: analyze_narrative_sentiment(df, keywords=KEYWORDS)),
+    'bot_score': (['Twitter'], 'compacted', calculate_bot_score),
+    'mention_graph': (['Twitter'], 'analyzed', build_network_graph),
+    'graph_analytics': (['Twitter'], 'analyzed', account_metrics),
+    'near_duplicates': (None, 'analyzed', find_near_duplicates),
+    'term_frequency': (None, 'analyzed', lambda df: TermFrequency().update(df, sentiments=['anti-india'])),
+    'bursts': (None, 'analyzed', lambda df: BurstTracker().update(df, keywords=KEYWORDS)),
+    'dashboard': (None, 'analyzed', dashboard_aggregations),
+}
+
+def prepare_inputs(platform, n, seed):
+    """
+    Returns the frames stages start from: 'raw', 'compacted' and 'analyzed'.
+    """
+    raw = generate_posts(platform, n, seed=seed)
+    compacted = compact_frame(raw.copy())
+    analyzed = analyze_narrative_sentiment(compacted.copy(), keywords=KEYWORDS)
+    if platform == 'Twitter':
+        analyzed = calculate_bot_score(analyzed)
+    return {'raw': raw, 'compacted': compacted, 'analyzed': analyzed}
+
+def run_stage(func, df, repeat=REPEAT, memory=True):
+    """
+    Times func on a copy of df, keeping the best of up to `repeat` runs
+    (runs longer than LONG_RUN_SECONDS aren't repeated), then (with memory)
+    runs it once more under tracemalloc.
+
+    Returns:
+        tuple: (seconds, peak MiB or None).
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        work = df.copy() # Stages add columns to their input
+        gc.collect()
+        gc.disable() # Like timeit, so a collection triggered by earlier garbage isn't billed to this stage
+        try:
+            start = time.perf_counter()
+            func(work)
+            seconds = min(seconds, time.perf_counter() - start)
+        finally:
+            gc.enable()
+        if seconds > LONG_RUN_SECONDS:
+            break
+    if not memory:
+        return seconds, None
+    work = df.copy()
+    tracemalloc.start()
+    func(work)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2**20
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Matches results against a baseline run by (platform, stage, rows).
+
+    Returns:
+        list: One dict per matched result with the time and memory ratios
+        (new / baseline) and whether either is a regression. Ratios are None
+        where both values are below the noise floor.
+    """
+    previous = {(r['platform'], r['stage'], r['rows']): r for r in baseline['results']}
+    compared = []
+    for result in results:
+        old = previous.get((result['platform'], result['stage'], result['rows']))
+        if old is None:
+            continue
+        time_ratio = (result['seconds'] / max(old['seconds'], 1e-9)
+                      if max(result['seconds'], old['seconds']) >= NOISE_FLOOR_SECONDS else None)
+        memory_ratio = None
+        if result.get('peak_mib') is not None and old.get('peak_mib') is not None \
+                and max(result['peak_mib'], old['peak_mib']) >= NOISE_FLOOR_MIB:
+            memory_ratio = result['peak_mib'] / max(old['peak_mib'], 1e-9)
+        compared.append({
+            **result, 'time_ratio': time_ratio, 'memory_ratio': memory_ratio,
+            'regression': any(ratio is not None and ratio > threshold for ratio in (time_ratio, memory_ratio)),
+        })
+    return compared
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--platforms', nargs='+', default=PLATFORMS, choices=PLATFORMS)
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="JSON results path, defaults to benchmarks/results/pipeline-<commit>.json.")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against.")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="New / baseline ratio reported as a regression.")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="Timed runs per stage; the best is kept.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc runs.")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = []
+    print(f"{'platform':<14} {'stage':<16} {'rows':>9} {'seconds':>9} {'peak MiB':>9} {'rows/s':>11}")
+    for platform in args.platforms:
+        for n in args.sizes:
+            inputs = prepare_inputs(platform, n, seed=args.seed)
+            for stage in args.stages:
+                platforms, source, func = STAGES[stage]
+                if platforms is not None and platform not in platforms:
+                    continue
+                seconds, peak = run_stage(func, inputs[source], repeat=args.repeat, memory=not args.no_memory)
+                results.append({'platform': platform, 'stage': stage, 'rows': n,
+                                'seconds': round(seconds, 4), 'peak_mib': None if peak is None else round(peak, 2)})
+                print(f"{platform:<14} {stage:<16} {n:>9} {seconds:>9.3f} {'-' if peak is None else f'{peak:.1f}':>9} "
+                      f"{n / max(seconds, 1e-9):>11,.0f}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit, 'generated_at': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0], 'pandas': pd.__version__, 'numpy': np.__version__,
+            'machine': host.machine(), 'seed': args.seed, 'results': results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        compared = compare(results, baseline, threshold=args.threshold)
+        print(f"\nAgainst {baseline.get('commit', args.baseline)}:")
+        print(f"{'platform':<14} {'stage':<16} {'rows':>9} {'time x':>8} {'memory x':>9}")
+        for row in compared:
+            time_ratio = '-' if row['time_ratio'] is None else f"{row['time_ratio']:.2f}"
+            memory_ratio = '-' if row['memory_ratio'] is None else f"{row['memory_ratio']:.2f}"
+            flag = "  REGRESSION" if row['regression'] else ""
+            print(f"{row['platform']:<14} {row['stage']:<16} {row['rows']:>9} {time_ratio:>8} {memory_ratio:>9}{flag}")
+        if any(row['regression'] for row in compared):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
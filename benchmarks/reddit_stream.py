@@ -0,0 +1,95 @@
+"""
+Measures sustained throughput and end-to-end latency of the continuous
+Reddit ingestion path (reddit_stream.RedditStreamIngestor) against a local
+fake of PRAW's submission and comment streams.
+
+    python -m benchmarks.reddit_stream [--duration 10] [--rate 0] [--match 0.2]
+"""
+import argparse
+import itertools
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from reddit_stream import RedditStreamIngestor, format_stats
+
+KEYWORDS = ['boycott india', 'free kashmir', 'shame on india']
+
+class FakeStream:
+    """
+    Stand-in for praw's SubredditStream: endless submissions and comments,
+    a `match` share of which contain a keyword, produced at `rate` items per
+    second per stream (0 means as fast as they are read).
+    """
+
+    def __init__(self, rate, match, seed=0):
+        self.rate = rate
+        self.match = match
+        self.rng = np.random.default_rng(seed)
+        self.ids = itertools.count()
+
+    def _items(self, make, pause_after):
+        interval = 1.0 / self.rate if self.rate else 0
+        next_at = time.monotonic()
+        while True:
+            if interval:
+                now = time.monotonic()
+                if now < next_at:
+                    # Mimic PRAW: yield None when nothing new has arrived yet
+                    if pause_after is not None:
+                        yield None
+                    time.sleep(min(interval, next_at - now))
+                    continue
+                next_at += interval
+            yield make(next(self.ids))
+
+    def _text(self):
+        words = "india news today people said government report".split()
+        text = " ".join(self.rng.choice(words, size=20))
+        if self.rng.random() < self.match:
+            text += " " + KEYWORDS[self.rng.integers(len(KEYWORDS))]
+        return text
+
+    def submissions(self, skip_existing=True, pause_after=None):
+        author = SimpleNamespace(name="fake_author")
+        return self._items(lambda i: SimpleNamespace(
+            id=f"s{i}", title=f"Post {i}", author=author, score=int(i % 100), num_comments=int(i % 7),
+            url=f"https://reddit.example/s{i}", created_utc=time.time(), selftext=self._text()
+        ), pause_after)
+
+    def comments(self, skip_existing=True, pause_after=None):
+        author = SimpleNamespace(name="fake_commenter")
+        return self._items(lambda i: SimpleNamespace(
+            id=f"c{i}", author=author, score=int(i % 10), permalink=f"/r/fake/comments/c{i}",
+            created_utc=time.time(), body=self._text()
+        ), pause_after)
+
+class FakeReddit:
+    def __init__(self, rate=0, match=0.2):
+        self.stream = FakeStream(rate, match)
+
+    def subreddit(self, name):
+        return SimpleNamespace(stream=self.stream)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--rate', type=float, default=0, help="Items per second per stream; 0 is unthrottled.")
+    parser.add_argument('--match', type=float, default=0.2, help="Share of items containing a keyword.")
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--batch-seconds', type=float, default=1.0)
+    parser.add_argument('--queue-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    ingestor = RedditStreamIngestor(
+        KEYWORDS, reddit=FakeReddit(args.rate, args.match), batch_size=args.batch_size,
+        batch_seconds=args.batch_seconds, queue_size=args.queue_size, keep_results=False
+    )
+    ingestor.start()
+    time.sleep(args.duration)
+    ingestor.stop()
+    print(format_stats(ingestor.stats()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Reports module import cost at app startup, in the style of `python -X importtime`.
+
+Compares what app.py used to import eagerly (every client and visualization
+library) with what it imports now before any results are shown, plus a
+non-Streamlit reuse of the collector. Each configuration runs in a fresh
+interpreter several times and the median is reported.
+
+    python -m benchmarks.startup [--repeat 5] [--top 10]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+CONFIGURATIONS = {
+    'eager (previous app.py imports)': (
+        "import streamlit, pandas, networkx, graphviz, plotly.express, wordcloud, "
+        "matplotlib.pyplot, tweepy, praw, googleapiclient.discovery, requests, bs4"
+    ),
+    'lazy (current app.py startup)': (
+        "import streamlit, pandas, collector, analysis, scanner, store, artifact_cache"
+    ),
+    'collector without Streamlit': "import collector",
+}
+
+def import_times(statement, exclude=()):
+    """
+    Runs one statement under -X importtime in a fresh interpreter.
+
+    Returns:
+        tuple: (total cumulative microseconds of top-level imports,
+                dict of top-level module -> cumulative microseconds).
+        Modules in `exclude` (interpreter startup) are left out.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Top-level imports are the ones importtime doesn't indent
+        if not name.startswith('  ') and name.strip() not in exclude:
+            modules[name.strip()] = int(cumulative)
+    return sum(modules.values()), modules
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="Heaviest modules to list per configuration.")
+    args = parser.parse_args()
+
+    startup_modules = set(import_times('pass')[1])
+    for label, statement in CONFIGURATIONS.items():
+        runs = [import_times(statement, exclude=startup_modules) for _ in range(args.repeat)]
+        totals = [total for total, _ in runs]
+        print(f"\n{label}: median {statistics.median(totals) / 1000:.0f} ms over {args.repeat} runs")
+        heaviest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for name, cumulative in heaviest:
+            print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+        loaded = import_loaded_modules(statement)
+        print(f"  loaded: {', '.join(sorted(loaded)) or '-'}")
+
+def import_loaded_modules(statement):
+    """
+    Lists which of the heavy third-party libraries a statement ends up loading
+    (Streamlit itself pulls in plotly).
+    """
+    heavy = ['streamlit', 'networkx', 'scipy', 'graphviz', 'plotly', 'wordcloud', 'matplotlib',
+             'tweepy', 'praw', 'googleapiclient']
+    check = f"{statement}; import sys; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', check], capture_output=True, text=True, check=True)
+    return [m for m in result.stdout.strip().split(',') if m]
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+
+def generate_tweets(n, seed=0, users=None, now=None, mentions_per_tweet=0.0):
+    """
+    Generates a synthetic frame shaped like collector.get_tweets_df output.
+
+    Args:
+        n (int): Number of tweets.
+        seed (int): Seed for the random generator, so runs are reproducible.
+        users (int): Number of distinct accounts, defaults to n // 10.
+        now (datetime): Reference time for timestamps.
+        mentions_per_tweet (float): Average number of @mentions of other
+            accounts in the dataset per tweet.
+
+    Returns:
+        pandas.DataFrame: Synthetic tweets with user metadata.
+    """
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now(timezone.utc)
+    users = users or max(1, n // 10)
+
+    user_ids = rng.integers(0, users, size=n)
+    usernames = np.array([f"user_{i}" for i in range(users)], dtype=object)
+    # A share of accounts are young, follow many and have few followers
+    user_age_days = rng.integers(1, 4000, size=users)
+    user_followers = rng.lognormal(5, 2, size=users).astype(np.int64)
+    user_following = rng.lognormal(5, 1.5, size=users).astype(np.int64)
+    user_verified = rng.random(users) < 0.05
+
+    df = pd.DataFrame({
+        'author_id': user_ids,
+        'username': usernames[user_ids],
+        'user_created_at': pd.Timestamp(now) - pd.to_timedelta(user_age_days[user_ids], unit='D'),
+        'followers_count': user_followers[user_ids],
+        'following_count': user_following[user_ids],
+        'tweet_count': rng.integers(0, 50000, size=n),
+        'is_verified': user_verified[user_ids],
+        'tweet_text': _tweet_texts(rng, n, usernames, mentions_per_tweet),
+        'tweet_created_at': pd.Timestamp(now) - pd.to_timedelta(rng.integers(0, 7 * 24 * 3600, size=n), unit='s'),
+        'retweet_count': rng.integers(0, 1000, size=n),
+        'like_count': rng.integers(0, 5000, size=n),
+    })
+    df['engagement'] = df['retweet_count'] + df['like_count']
+    return df
+
+def _tweet_texts(rng, n, usernames, mentions_per_tweet):
+    if not mentions_per_tweet:
+        return [f"post {i} about india" for i in range(n)]
+    mention_counts = rng.poisson(mentions_per_tweet, size=n)
+    mentioned = iter(usernames[rng.integers(0, len(usernames), size=mention_counts.sum())])
+    return [
+        f"post {i} about india " + " ".join(f"@{next(mentioned)}," for _ in range(count))
+        for i, count in enumerate(mention_counts)
+    ]
+
+# --- MULTI-PLATFORM CORPUS ---
+PLATFORMS = ['Twitter', 'Reddit', 'YouTube', 'News Articles']
+VOCABULARY = 5000
+
+def _word_texts(rng, n, low, high, vocab=VOCABULARY):
+    """
+    n texts of low..high-1 random filler words.
+    """
+    words = np.array([f"w{i}" for i in range(vocab)], dtype=object)
+    lengths = rng.integers(low, high, size=n)
+    tokens = words[rng.integers(0, vocab, size=lengths.sum())]
+    return [" ".join(chunk) for chunk in np.split(tokens, np.cumsum(lengths)[:-1])]
+
+def _with_keywords(rng, texts, keyword_share):
+    """
+    Appends a narrative keyword to keyword_share of the texts: two thirds
+    from analysis.ANTI_INDIA_KEYWORDS, the rest from PRO_INDIA_KEYWORDS.
+    """
+    from analysis import ANTI_INDIA_KEYWORDS, PRO_INDIA_KEYWORDS
+
+    if not keyword_share:
+        return texts
+    hits = np.flatnonzero(rng.random(len(texts)) < keyword_share)
+    anti = rng.random(len(hits)) < 2 / 3
+    keywords = np.where(anti, np.array(ANTI_INDIA_KEYWORDS, dtype=object)[rng.integers(0, len(ANTI_INDIA_KEYWORDS), size=len(hits))],
+                        np.array(PRO_INDIA_KEYWORDS, dtype=object)[rng.integers(0, len(PRO_INDIA_KEYWORDS), size=len(hits))])
+    texts = list(texts)
+    for index, keyword in zip(hits.tolist(), keywords.tolist()):
+        texts[index] = f"{texts[index]} {keyword}"
+    return texts
+
+def generate_posts(platform, n, seed=0, keyword_share=0.1, mentions_per_post=1.0, bot_share=0.05, now=None):
+    """
+    Generates a synthetic frame in the column layout of one collector, with
+    values shaped like the API's: datetimes for Twitter and Reddit, ISO or
+    RSS date strings for YouTube and news.
+
+    Args:
+        platform (str): One of PLATFORMS.
+        n (int): Number of posts.
+        seed (int): Seed for the random generator, so runs are reproducible.
+        keyword_share (float): Share of posts containing a narrative keyword.
+        mentions_per_post (float): Average @mentions per tweet (Twitter only).
+        bot_share (float): Share of Twitter accounts with bot-like metadata:
+            young, few followers, following many, unverified.
+        now (datetime): Reference time for timestamps.
+
+    Returns:
+        pandas.DataFrame: Posts as the platform's collector returns them.
+    """
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp(now or datetime.now(timezone.utc))
+    if platform == 'Twitter':
+        df = generate_tweets(n, seed=seed, now=now, mentions_per_tweet=mentions_per_post)
+        df['tweet_text'] = [f"{words} {tail}" for words, tail in
+                            zip(_with_keywords(rng, _word_texts(rng, n, 6, 25), keyword_share), df['tweet_text'])]
+        users = int(df['author_id'].max()) + 1
+        bots = rng.random(users) < bot_share
+        is_bot = bots[df['author_id'].to_numpy()]
+        count = int(is_bot.sum())
+        df.loc[is_bot, 'user_created_at'] = now - pd.to_timedelta(rng.integers(1, 60, size=count), unit='D')
+        df.loc[is_bot, 'followers_count'] = rng.integers(0, 10, size=count)
+        df.loc[is_bot, 'following_count'] = rng.integers(200, 5000, size=count)
+        df.loc[is_bot, 'is_verified'] = False
+        return df
+
+    created = now - pd.to_timedelta(rng.integers(0, 7 * 24 * 3600, size=n), unit='s')
+    authors = np.array([f"account_{i}" for i in range(max(1, n // 20))], dtype=object)
+    if platform == 'Reddit':
+        score, comments = rng.integers(0, 5000, size=n), rng.integers(0, 500, size=n)
+        texts = _with_keywords(rng, _word_texts(rng, n, 8, 40), keyword_share)
+        return pd.DataFrame({
+            'post_id': [f"{i:x}" for i in range(n)], 'title': [text[:60] for text in texts],
+            'author': authors[rng.integers(0, len(authors), size=n)], 'score': score, 'num_comments': comments,
+            'url': [f"https://www.reddit.com/r/all/comments/{i:x}/" for i in range(n)],
+            'created_at': created.tz_localize(None).to_pydatetime(), 'text_content': texts,
+            'engagement': score + comments,
+        })
+    if platform == 'YouTube':
+        views, likes, comments = rng.integers(0, 10**7, size=n), rng.integers(0, 10**5, size=n), rng.integers(0, 10**4, size=n)
+        titles = _word_texts(rng, n, 4, 12)
+        descriptions = _with_keywords(rng, _word_texts(rng, n, 8, 40), keyword_share)
+        return pd.DataFrame({
+            'video_id': [f"v{i:010d}" for i in range(n)], 'title': titles,
+            'channel_title': authors[rng.integers(0, len(authors), size=n)],
+            'published_at': created.strftime('%Y-%m-%dT%H:%M:%SZ'), 'view_count': views, 'like_count': likes,
+            'comment_count': comments, 'video_url': [f"https://www.youtube.com/watch?v=v{i:010d}" for i in range(n)],
+            'description': descriptions, 'engagement': views + likes + comments,
+            'text_content': [f"{title} {description}" for title, description in zip(titles, descriptions)],
+        })
+    if platform == 'News Articles':
+        headlines = _with_keywords(rng, _word_texts(rng, n, 6, 14), keyword_share)
+        sources = np.array([f"Outlet {i}" for i in range(200)], dtype=object)
+        return pd.DataFrame({
+            'headline': headlines, 'source': sources[rng.integers(0, len(sources), size=n)],
+            'link': [f"https://news.example.com/articles/{i}" for i in range(n)],
+            'published_at': created.strftime('%a, %d %b %Y %H:%M:%S GMT'), 'text_content': headlines, 'engagement': 0,
+        })
+    raise ValueError(f"Unknown platform: {platform}")
@@ -0,0 +1,88 @@
+"""
+Benchmarks the streaming term counter (term_frequency.TermFrequency)
+against the previous word-cloud path, which joined all anti-India posts
+into one string and let WordCloud re-tokenize it. Both count the same
+synthetic posts with Zipf-distributed words. The streaming counter is
+timed on the same work (anti-India terms) and on the job the app runs
+(anti-India terms and bigrams). The script reports time and
+peak Python memory (tracemalloc) for each, and how closely a small
+Space-Saving table matches exact counts for the top terms.
+
+    python -m benchmarks.term_frequency [--posts 10000 100000 1000000] [--capacity 2000]
+"""
+import argparse
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from term_frequency import TermFrequency, tokenize
+
+def generate_posts(n, seed=0, vocab=50_000):
+    """
+    Generates n posts of 8-30 Zipf-distributed words, a third of them
+    labelled anti-india.
+
+    Returns:
+        pandas.DataFrame: tweet_text and sentiment columns.
+    """
+    rng = np.random.default_rng(seed)
+    words = np.array([f"word{i}" for i in range(vocab)], dtype=object)
+    lengths = rng.integers(8, 31, size=n)
+    ids = (rng.zipf(1.3, size=lengths.sum()) - 1) % vocab
+    texts = [" ".join(chunk) for chunk in np.split(words[ids], np.cumsum(lengths)[:-1])]
+    sentiment = np.where(rng.random(n) < 1 / 3, 'anti-india', 'neutral')
+    return pd.DataFrame({'tweet_text': texts, 'sentiment': sentiment})
+
+def measure(func):
+    """
+    Returns (result, seconds, peak MiB). Timed and memory-traced in separate
+    runs, since tracing slows allocation-heavy code several times over.
+    """
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+def joined_wordcloud_counts(df):
+    from wordcloud import WordCloud
+    text = ' '.join(df[df['sentiment'] == 'anti-india']['tweet_text'].astype(str).tolist())
+    return WordCloud().process_text(text)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--capacity', type=int, default=2_000,
+                        help="Space-Saving capacity for the accuracy check.")
+    parser.add_argument('--top', type=int, default=100, help="Top terms compared in the accuracy check.")
+    args = parser.parse_args()
+
+    print(f"{'posts':>9} | {'joined (s)':>10} {'peak MiB':>9} | {'streaming (s)':>13} {'peak MiB':>9} | "
+          f"{'app job (s)':>12} {'peak MiB':>9} | {'top-K recall':>12} {'max rel error':>13}")
+    for n in args.posts:
+        df = generate_posts(n, seed=n)
+        _, joined_time, joined_peak = measure(lambda: joined_wordcloud_counts(df))
+        anti = df[df['sentiment'] == 'anti-india']
+        _, stream_time, stream_peak = measure(lambda: TermFrequency(bigrams=False).update(anti, 'tweet_text'))
+        _, full_time, full_peak = measure(lambda: TermFrequency().update(df, 'tweet_text', sentiments=['anti-india']))
+
+        # Exact counts against a deliberately small sketch
+        exact = Counter(token for text in anti['tweet_text']
+                        for token in tokenize(text) if token is not None)
+        sketch = TermFrequency(capacity=args.capacity, bigrams=False).update(df, 'tweet_text')
+        estimated = sketch.frequencies('anti-india', n=args.top)
+        true_top = [term for term, _ in exact.most_common(args.top)]
+        recall = len(set(true_top) & set(estimated)) / max(1, len(true_top))
+        error = max((abs(estimated[t] - exact[t]) / exact[t] for t in true_top if t in estimated), default=0.0)
+
+        print(f"{n:>9} | {joined_time:>10.2f} {joined_peak:>9.1f} | {stream_time:>13.2f} {stream_peak:>9.1f} | "
+              f"{full_time:>12.2f} {full_peak:>9.1f} | {recall:>12.3f} {error:>13.4f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+import math
+import threading
+from collections import OrderedDict, deque
+from itertools import compress
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from keyword_matcher import get_automaton
+
+# --- BURST DETECTION ---
+# Post counts are kept per key (all posts, each platform, each keyword) in
+# fixed-size ring buffers of minute and hour buckets. When a bucket closes,
+# its count is scored against an exponentially weighted mean and variance of
+# the buckets before it, so each post costs O(1) to add no matter how much
+# history is kept, and nothing is re-aggregated on a rerun.
+
+# Resolution name -> (bucket seconds, buckets kept)
+RESOLUTIONS = {'minute': (60, 24 * 60), 'hour': (3600, 14 * 24)}
+EWMA_ALPHA = 0.1 # Weight of the newest bucket in the running mean and variance
+Z_THRESHOLD = 3.0 # Standard deviations above the running mean that count as a burst
+MIN_BURST_COUNT = 10 # Buckets with fewer posts are never flagged
+WARMUP_BUCKETS = 10 # Buckets a series needs to see before it can flag anything
+MAX_SEEN_POSTS = 1_000_000
+MAX_BURSTS = 1000
+
+DATE_COLUMNS = ('tweet_created_at', 'created_at', 'published_at')
+TEXT_COLUMNS = ('tweet_text', 'text_content')
+ID_COLUMNS = ('tweet_id', 'post_id', 'video_id', 'link')
+
+ALL_POSTS = ('all', 'All posts')
+
+class BurstSeries:
+    """
+    Ring buffer of per-bucket counts with a streaming EWMA z-score detector.
+
+    Buckets are numbered by integer bucket index (epoch seconds // resolution).
+    The newest bucket is open and keeps counting; when a later bucket arrives
+    it closes, is scored, and folded into the running mean and variance.
+    Late posts for a bucket that already closed are added to it and the
+    bucket is re-scored against the baseline it closed with, but they don't
+    change the running statistics; posts older than the buffer are dropped.
+    """
+
+    def __init__(self, resolution, size, alpha=EWMA_ALPHA, z_threshold=Z_THRESHOLD,
+                 min_count=MIN_BURST_COUNT, warmup=WARMUP_BUCKETS):
+        self.resolution = resolution
+        self.size = size
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.warmup = warmup
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.expected = np.zeros(size, dtype=np.float64)
+        self.scores = np.zeros(size, dtype=np.float64)
+        self.scales = np.zeros(size, dtype=np.float64) # 0 until a bucket closes in the slot: never scored
+        self.flags = np.zeros(size, dtype=bool)
+        self.head = None # Index of the open (newest) bucket
+        self.mean = 0.0
+        self.var = 0.0
+        self.closed = 0
+        self.dropped = 0
+
+    def add(self, bucket, n=1):
+        """
+        Counts n posts in a bucket.
+
+        Returns:
+            list: (bucket, count, expected, z) for each bucket this closed as a burst.
+        """
+        if self.head is None:
+            self.head = bucket
+        bursts = []
+        if bucket > self.head:
+            bursts = self._advance(bucket)
+        elif bucket <= self.head - self.size:
+            self.dropped += n
+            return bursts
+        slot = bucket % self.size
+        self.counts[slot] += n
+        if bucket < self.head and not self.flags[slot] and self.scales[slot] > 0:
+            count, expected = int(self.counts[slot]), self.expected[slot]
+            z = self.scores[slot] = (count - expected) / self.scales[slot]
+            if count >= self.min_count and z >= self.z_threshold:
+                self.flags[slot] = True
+                bursts.append((bucket, count, expected, z))
+        return bursts
+
+    def _advance(self, bucket):
+        bursts = []
+        burst = self._close(self.head)
+        if burst:
+            bursts.append(burst)
+        # Empty buckets in between still pull the mean down. An idle stretch
+        # longer than the buffer is replayed as a buffer's worth of empty
+        # buckets, which decays the state almost as far, so catch-up is bounded
+        for closing in range(max(self.head + 1, bucket - self.size), bucket):
+            self.counts[closing % self.size] = 0
+            self._close(closing)
+        slot = bucket % self.size
+        self.counts[slot], self.expected[slot], self.scores[slot], self.flags[slot] = 0, self.mean, 0.0, False
+        self.head = bucket
+        return bursts
+
+    def _close(self, bucket):
+        slot = bucket % self.size
+        count = int(self.counts[slot])
+        z = self.score(count)
+        is_burst = self.closed >= self.warmup and count >= self.min_count and z >= self.z_threshold
+        self.expected[slot], self.scores[slot], self.flags[slot] = self.mean, z, is_burst
+        # A zero scale marks warm-up buckets, which late posts can't flag either
+        self.scales[slot] = self.scale() if self.closed >= self.warmup else 0.0
+        expected = self.mean
+
+        if self.closed:
+            # West's incremental EWMA mean and variance
+            diff = count - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.var = (1 - self.alpha) * (self.var + diff * increment)
+        else:
+            self.mean, self.var = float(count), 0.0
+        self.closed += 1
+        return (bucket, count, expected, z) if is_burst else None
+
+    def score(self, count):
+        """
+        z-score of a count against the running mean. The deviation is floored
+        at the Poisson spread sqrt(mean) (and at 1), so quiet series don't
+        flag a handful of posts.
+        """
+        return (count - self.mean) / self.scale()
+
+    def scale(self):
+        return math.sqrt(max(self.var, self.mean, 1.0))
+
+    def live_score(self):
+        """
+        z-score of the open bucket so far, for flagging a burst in progress.
+        """
+        if self.head is None or self.closed < self.warmup:
+            return 0.0
+        return self.score(int(self.counts[self.head % self.size]))
+
+    def live_burst(self):
+        count = int(self.counts[self.head % self.size]) if self.head is not None else 0
+        return count >= self.min_count and self.live_score() >= self.z_threshold
+
+    def frame(self):
+        """
+        Returns the buffered buckets, oldest first, as a DataFrame with
+        bucket start time, count, expected count, z-score and burst flag.
+        """
+        if self.head is None:
+            return pd.DataFrame(columns=['time', 'count', 'expected', 'z', 'burst'])
+        buckets = np.arange(self.head - self.size + 1, self.head + 1)
+        slots = buckets % self.size
+        z = self.scores[slots].copy()
+        z[-1] = self.live_score()
+        expected = self.expected[slots].copy()
+        expected[-1] = self.mean
+        flags = self.flags[slots].copy()
+        flags[-1] = self.live_burst()
+        frame = pd.DataFrame({
+            'time': pd.to_datetime(buckets * self.resolution, unit='s', utc=True),
+            'count': self.counts[slots], 'expected': expected, 'z': z, 'burst': flags,
+        })
+        # Drop the empty lead-in before the series' first post
+        first = np.flatnonzero(frame['count'].to_numpy())
+        return frame.iloc[first[0]:].reset_index(drop=True) if len(first) else frame.iloc[-1:].reset_index(drop=True)
+
+class BurstTracker:
+    """
+    Incremental minute- and hour-resolution activity counts for all posts,
+    each platform and each keyword, with burst flags.
+
+    update() only counts posts it hasn't seen before (by post id), so it can
+    be fed the full result of every scan, including history from the post
+    store, without counting anything twice.
+    """
+
+    def __init__(self, resolutions=None, alpha=EWMA_ALPHA, z_threshold=Z_THRESHOLD,
+                 min_count=MIN_BURST_COUNT, warmup=WARMUP_BUCKETS, max_seen=MAX_SEEN_POSTS):
+        self.resolutions = resolutions or RESOLUTIONS
+        self.detector_args = {'alpha': alpha, 'z_threshold': z_threshold, 'min_count': min_count, 'warmup': warmup}
+        self.max_seen = max_seen
+        self.series = {} # (resolution name, key) -> BurstSeries
+        self.bursts = deque(maxlen=MAX_BURSTS)
+        self.version = 0
+        self._seen = OrderedDict()
+        self._origin = {} # Resolution -> earliest bucket the tracker has counted
+        self._lock = threading.Lock()
+
+    def _series(self, resolution, key, first):
+        series = self.series.get((resolution, key))
+        if series is None:
+            seconds, size = self.resolutions[resolution]
+            series = self.series[(resolution, key)] = BurstSeries(seconds, size, **self.detector_args)
+            # A platform or keyword seen for the first time starts from when the
+            # tracker started watching, so its quiet stretch before counts as
+            # baseline and a sudden first appearance can be flagged. It never
+            # starts after its own first post (`first`), so it is built forward
+            # and no post lands in a bucket that was never closed
+            newest = max((s.head for (res, _), s in self.series.items() if res == resolution and s.head is not None), default=None)
+            if newest is not None:
+                series.head = min(first, max(self._origin[resolution], newest - size + 1))
+        return series
+
+    @timed('analysis.bursts')
+    def update(self, df, platform=None, keywords=None):
+        """
+        Counts new posts from a collector or merged frame.
+
+        Args:
+            df (pandas.DataFrame): Posts; the date column is found by name.
+            platform (str): Platform of every row, for frames without a
+                'platform' column.
+            keywords (list): Keywords to keep separate series for.
+
+        Returns:
+            int: Number of posts counted.
+        """
+        date_column = next((col for col in DATE_COLUMNS if col in df.columns), None)
+        if date_column is None or df.empty:
+            return 0
+        id_column = next((col for col in ID_COLUMNS if col in df.columns), None)
+
+        with self._lock:
+            if id_column is not None:
+                prefixes = df['platform'].astype(str).tolist() if 'platform' in df.columns else [platform] * len(df)
+                ids = [f"{p}:{i}" for p, i in zip(prefixes, df[id_column].tolist())]
+                seen = self._seen
+                new = np.fromiter((i not in seen for i in ids), dtype=bool, count=len(ids))
+                df, ids = df[new], list(compress(ids, new))
+            times = pd.to_datetime(df[date_column], errors='coerce', utc=True, format='mixed')
+            valid = times.notna().to_numpy()
+            if not valid.any():
+                return 0
+            df, times = df[valid], times[valid]
+            if id_column is not None:
+                self._seen.update(dict.fromkeys(compress(ids, valid)))
+                while len(self._seen) > self.max_seen:
+                    self._seen.popitem(last=False)
+
+            seconds = ((times - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+            groups = {ALL_POSTS: np.ones(len(df), dtype=bool)}
+            platforms = df['platform'].astype(str).to_numpy() if 'platform' in df.columns else None
+            if platforms is not None:
+                for name in pd.unique(platforms):
+                    groups[('platform', name)] = platforms == name
+            elif platform:
+                groups[('platform', platform)] = groups[ALL_POSTS]
+            if keywords:
+                text_column = next((col for col in TEXT_COLUMNS if col in df.columns), None)
+                if text_column is not None:
+                    automaton = get_automaton(keywords)
+                    present = [automaton.scan(text)[0] for text in df[text_column].fillna('').astype(str)]
+                    for keyword in automaton.keywords:
+                        groups[('keyword', keyword)] = np.fromiter((keyword in p for p in present), dtype=bool, count=len(present))
+
+            for resolution, (bucket_seconds, _) in self.resolutions.items():
+                buckets = seconds // bucket_seconds
+                self._origin[resolution] = min(self._origin.get(resolution, buckets.min()), buckets.min())
+                for key, mask in groups.items():
+                    if not mask.any():
+                        continue
+                    values, counts = np.unique(buckets[mask], return_counts=True) # Sorted, oldest first
+                    series = self._series(resolution, key, int(values[0]))
+                    for bucket, count in zip(values.tolist(), counts.tolist()):
+                        for closed, n, expected, z in series.add(bucket, count):
+                            self._record(resolution, key, closed * bucket_seconds, n, expected, z)
+
+                # Bring quiet series up to the newest bucket, so a keyword that
+                # stopped appearing closes its last bucket like the others
+                newest = max(s.head for (res, _), s in self.series.items() if res == resolution)
+                for (res, key), series in self.series.items():
+                    if res == resolution and series.head < newest:
+                        for closed, n, expected, z in series.add(newest, 0):
+                            self._record(resolution, key, closed * bucket_seconds, n, expected, z)
+            self.version += 1
+            return len(df)
+
+    def _record(self, resolution, key, seconds, count, expected, z):
+        self.bursts.append({
+            'resolution': resolution, 'kind': key[0], 'key': key[1],
+            'time': pd.Timestamp(seconds, unit='s', tz='UTC'),
+            'count': count, 'expected': round(float(expected), 2), 'z': round(float(z), 2),
+        })
+
+    def keys(self, resolution):
+        with self._lock:
+            return [key for res, key in self.series if res == resolution]
+
+    def timeline(self, resolution, key=ALL_POSTS):
+        """
+        Returns a key's buffered buckets, see BurstSeries.frame.
+        """
+        with self._lock:
+            series = self.series.get((resolution, key))
+            if series is None:
+                return pd.DataFrame(columns=['time', 'count', 'expected', 'z', 'burst'])
+            return series.frame()
+
+    def burst_table(self, resolution=None):
+        """
+        Returns flagged bursts, newest first, optionally for one resolution.
+        Bursts still in progress (open buckets over the threshold) are included.
+        """
+        with self._lock:
+            rows = [b for b in self.bursts if resolution in (None, b['resolution'])]
+            for (res, key), series in self.series.items():
+                if resolution not in (None, res) or series.head is None:
+                    continue
+                if series.live_burst():
+                    rows.append({
+                        'resolution': res, 'kind': key[0], 'key': key[1],
+                        'time': pd.Timestamp(series.head * series.resolution, unit='s', tz='UTC'),
+                        'count': int(series.counts[series.head % series.size]), 'expected': round(series.mean, 2),
+                        'z': round(series.live_score(), 2), 'in_progress': True,
+                    })
+        columns = ['time', 'resolution', 'kind', 'key', 'count', 'expected', 'z', 'in_progress']
+        if not rows:
+            return pd.DataFrame(columns=columns)
+        table = pd.DataFrame(rows).reindex(columns=columns)
+        table['in_progress'] = table['in_progress'].fillna(False).astype(bool)
+        return table.sort_values('time', ascending=False).reset_index(drop=True)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from burst import BurstTracker
+
+def flat_posts(days, per_hour):
+    """
+    Posts spread evenly over `days`, from two platforms, so the tracker keeps
+    per-platform series next to the all-posts one.
+    """
+    seconds = np.arange(days * 24 * per_hour) * (3600 // per_hour)
+    return pd.DataFrame({
+        'post_id': np.arange(len(seconds)).astype(str),
+        'created_at': pd.Timestamp('2024-01-01', tz='UTC') + pd.to_timedelta(seconds, unit='s'),
+        'platform': np.where(np.arange(len(seconds)) % 2, 'Reddit', 'YouTube'),
+        'text_content': "boycott india",
+    })
+
+def test_flat_hourly_series_has_no_bursts():
+    tracker = BurstTracker()
+    tracker.update(flat_posts(days=30, per_hour=12), keywords=['boycott india'])
+    assert tracker.burst_table().empty
+
+def test_flat_minute_series_has_no_bursts():
+    tracker = BurstTracker()
+    tracker.update(flat_posts(days=3, per_hour=60 * 12), keywords=['boycott india'])
+    assert tracker.burst_table().empty
+
+def test_flat_series_fed_in_scans_has_no_bursts():
+    posts = flat_posts(days=20, per_hour=12)
+    tracker = BurstTracker()
+    for scan in np.array_split(np.arange(len(posts)), 10):
+        tracker.update(posts.iloc[scan], keywords=['boycott india'])
+    assert tracker.burst_table().empty
+
+def spike_posts(at, n):
+    """
+    n posts in the same minute, split between the two platforms like flat_posts.
+    """
+    return pd.DataFrame({
+        'post_id': [f"spike-{at}-{i}" for i in range(n)],
+        'created_at': pd.Timestamp(at, tz='UTC'),
+        'platform': np.where(np.arange(n) % 2, 'Reddit', 'YouTube'),
+        'text_content': "boycott india",
+    })
+
+def assert_flagged(tracker, at):
+    """
+    The all-posts series flags the spike's minute and hour, and nothing else.
+    """
+    table = tracker.burst_table()
+    table = table[table['kind'] == 'all']
+    at = pd.Timestamp(at, tz='UTC')
+    flagged = {(row.resolution, row.time) for row in table.itertuples()}
+    assert flagged == {('minute', at.floor('min')), ('hour', at.floor('h'))}, table
+    assert (table['z'] > 10).all(), table
+
+def test_spike_is_flagged_at_minute_and_hour():
+    posts = pd.concat([flat_posts(days=10, per_hour=12), spike_posts('2024-01-08 12:30', 300)])
+    tracker = BurstTracker()
+    tracker.update(posts, keywords=['boycott india'])
+    assert_flagged(tracker, '2024-01-08 12:30')
+    assert {'platform', 'keyword'} <= set(tracker.burst_table()['kind'])
+
+def test_spike_in_a_later_scan_is_flagged():
+    tracker = BurstTracker()
+    tracker.update(flat_posts(days=10, per_hour=12), keywords=['boycott india'])
+    assert tracker.burst_table().empty
+    later = flat_posts(days=11, per_hour=12).iloc[10 * 24 * 12:]
+    tracker.update(pd.concat([later, spike_posts('2024-01-11 09:30', 300)]), keywords=['boycott india'])
+    assert_flagged(tracker, '2024-01-11 09:30')
+
+def test_late_posts_into_closed_buckets_are_flagged():
+    tracker = BurstTracker()
+    tracker.update(flat_posts(days=10, per_hour=12), keywords=['boycott india'])
+    tracker.update(spike_posts('2024-01-10 12:30', 300), keywords=['boycott india'])
+    assert_flagged(tracker, '2024-01-10 12:30')
@@ -0,0 +1,311 @@
+"""
+Out-of-core analysis of archived posts too large to load at once.
+
+An archive (JSON lines or Parquet files, in a collector's column layout or
+the shared post schema) is read in fixed-size chunks. Each chunk goes
+through the same analysis as a scan: sentiment, bot scoring and mention
+extraction. It is then reduced to partial aggregates (an ArchiveSummary),
+which merge into the dashboard's outputs. Peak memory depends on the chunk
+size and the number of distinct accounts, not on the archive length.
+
+    python chunked.py archive.jsonl [more.parquet ...] --platform Twitter
+                      --keywords "free kashmir, boycott india" [--chunk-rows 100000]
+                      [--workers 4] [--output-dir runs/archive]
+
+With --workers, chunks are analyzed in worker processes while the next ones
+are read. At most two chunks per worker are in flight, so memory stays bounded.
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from analysis import analyze_posts, mention_graph, mention_pairs, resolve_mentions, username_index
+from burst import DATE_COLUMNS
+from instrumentation import span, timed
+from term_frequency import TermFrequency
+
+CHUNK_ROWS = 100_000
+TOP_DRIVERS = 5
+TOP_INFLUENCERS = 50
+SOURCE_COLUMNS = ('username', 'author', 'channel_title', 'source') # Account or outlet of a post, first one present
+MENTION_BUFFER_ROWS = 1_000_000 # Unmerged mention counts held before they are summed
+
+def iter_chunks(paths, chunk_rows=CHUNK_ROWS):
+    """
+    Reads archive files one chunk of at most chunk_rows posts at a time.
+    Files ending in .parquet are read by row batches, anything else as JSON
+    lines (compressed if the extension says so, e.g. .jsonl.gz).
+
+    Yields:
+        pandas.DataFrame: The next chunk of posts.
+    """
+    for path in paths:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+        else:
+            with pd.read_json(path, lines=True, chunksize=chunk_rows) as reader:
+                yield from reader
+
+def _twitter_rows(df):
+    """
+    Twitter rows in their collector's column names, for bot scores and mentions.
+    """
+    if 'platform' not in df.columns:
+        return df if 'username' in df.columns else pd.DataFrame()
+    return df[df['platform'] == 'Twitter'].rename(columns={'author': 'username', 'text_content': 'tweet_text'})
+
+class ArchiveSummary:
+    """
+    Mergeable partial aggregates of analyzed posts: everything the Threat
+    Dashboard, Keyword Analysis and Influence Network tabs show, except
+    what needs all posts at once (near-duplicate clusters, bursts).
+
+    Summaries of consecutive chunks merge in order; accounts keep their
+    first spelling and latest bot score, as when the posts are analyzed
+    together. Term tables are Space-Saving sketches (term_frequency.py).
+
+    Args:
+        top_n (int): Anti-India posts kept as top drivers.
+    """
+
+    def __init__(self, top_n=TOP_DRIVERS):
+        self.top_n = top_n
+        self.rows = 0
+        self.sentiment = Counter()
+        self.sources = Counter() # Anti-India posts per source
+        self.daily = Counter() # (day, sentiment) -> posts
+        self.bot_scores = Counter() # Bot score -> Twitter posts
+        self.keyword_hits = Counter()
+        self.accounts = {} # Username -> latest bot score, in first-seen order
+        self.terms = TermFrequency()
+        self.drivers = pd.DataFrame()
+        self.sort_column = None
+        self._mentions = [] # Frames of (source, mentioned, weight), summed lazily
+        self._mention_rows = 0
+
+    def add(self, df, platform):
+        """
+        Aggregates a frame already run through analysis.analyze_posts.
+
+        Returns:
+            ArchiveSummary: self.
+        """
+        self.rows += len(df)
+        if df.empty:
+            return self
+        sentiments = df['sentiment'].astype(str)
+        self.sentiment.update(sentiments.value_counts().to_dict())
+        anti = df[(sentiments == 'anti-india').to_numpy()]
+        self.keyword_hits.update(df.attrs.get('keyword_hits', {}))
+
+        source_column = next((col for col in SOURCE_COLUMNS if col in df.columns), None)
+        if source_column is not None:
+            self.sources.update(anti[source_column].astype(str).value_counts().to_dict())
+
+        date_column = next((col for col in DATE_COLUMNS if col in df.columns), None)
+        if date_column is not None:
+            days = pd.to_datetime(df[date_column], errors='coerce', utc=True, format='mixed').dt.normalize()
+            self.daily.update(pd.DataFrame({'day': days, 'sentiment': sentiments}).dropna()
+                              .value_counts().to_dict())
+
+        text_column = 'text_content' if 'text_content' in df.columns else 'tweet_text'
+        if text_column in df.columns:
+            self.terms.update(anti, text_column, sentiments=['anti-india'])
+
+        self.sort_column = 'view_count' if platform == 'YouTube' else 'engagement'
+        if self.sort_column in df.columns:
+            self.drivers = pd.concat([self.drivers, anti.nlargest(self.top_n, self.sort_column)]) \
+                .nlargest(self.top_n, self.sort_column)
+
+        twitter = _twitter_rows(df)
+        if not twitter.empty:
+            scores = twitter['bot_score'] if 'bot_score' in twitter.columns else pd.Series(0, index=twitter.index)
+            self.bot_scores.update(scores.value_counts().to_dict())
+            self.accounts.update(zip(twitter['username'].astype(str), scores.astype(int).tolist()))
+            pairs = mention_pairs(twitter)
+            if not pairs.empty:
+                self._add_mentions(pairs.groupby(['source', 'mentioned'], sort=False).size().reset_index(name='weight'))
+        return self
+
+    def _add_mentions(self, counts):
+        self._mentions.append(counts)
+        self._mention_rows += len(counts)
+        # Summed again once the new rows outnumber the summed ones, so each pair is re-summed O(log n) times
+        if len(self._mentions) > 1 and self._mention_rows > max(MENTION_BUFFER_ROWS, 2 * len(self._mentions[0])):
+            self._mentions = [self._mention_counts()]
+            self._mention_rows = len(self._mentions[0])
+
+    def _mention_counts(self):
+        if not self._mentions:
+            return pd.DataFrame(columns=['source', 'mentioned', 'weight'])
+        return pd.concat(self._mentions, ignore_index=True) \
+            .groupby(['source', 'mentioned'], sort=False)['weight'].sum().reset_index()
+
+    def merge(self, other):
+        """
+        Adds the summary of the chunks that follow this one's.
+
+        Returns:
+            ArchiveSummary: self.
+        """
+        self.rows += other.rows
+        for counts, other_counts in ((self.sentiment, other.sentiment), (self.sources, other.sources),
+                                     (self.daily, other.daily), (self.bot_scores, other.bot_scores),
+                                     (self.keyword_hits, other.keyword_hits)):
+            counts.update(other_counts)
+        self.accounts.update(other.accounts)
+        self.terms.merge(other.terms)
+        if not other.drivers.empty:
+            self.sort_column = other.sort_column
+            self.drivers = pd.concat([self.drivers, other.drivers]).nlargest(self.top_n, self.sort_column)
+        for counts in other._mentions:
+            self._add_mentions(counts)
+        return self
+
+    # --- DASHBOARD OUTPUTS ---
+    def sentiment_counts(self):
+        return pd.Series(self.sentiment, dtype='int64').sort_values(ascending=False)
+
+    def top_sources(self, n=5):
+        return pd.Series(dict(self.sources.most_common(n)), dtype='int64')
+
+    def daily_counts(self):
+        """
+        Returns:
+            pandas.DataFrame: One row per day, a posts column per sentiment.
+        """
+        if not self.daily:
+            return pd.DataFrame(columns=['day'])
+        counts = pd.Series(self.daily).unstack(fill_value=0).sort_index()
+        return counts.rename_axis('day').reset_index()
+
+    def bot_score_counts(self):
+        return pd.Series(self.bot_scores, dtype='int64').sort_index()
+
+    def top_drivers(self):
+        return self.drivers.reset_index(drop=True)
+
+    def mention_edges(self):
+        """
+        Mention edges between the archive's accounts, as analysis.extract_mention_edges
+        would find them in all posts at once.
+        """
+        return resolve_mentions(self._mention_counts(), username_index(list(self.accounts)))
+
+    def network_graph(self):
+        return mention_graph(self.accounts, self.mention_edges())
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'sentiment': {k: int(v) for k, v in self.sentiment_counts().items()},
+            'keyword_hits': dict(self.keyword_hits.most_common()),
+            'top_sources': dict(self.sources.most_common(TOP_DRIVERS)),
+            'bot_scores': {int(k): int(v) for k, v in self.bot_score_counts().items()},
+            'accounts': len(self.accounts),
+        }
+
+def summarize_chunk(df, platform, keywords):
+    """
+    Analyzes one chunk and reduces it to an ArchiveSummary (runs in workers).
+    """
+    with span('archive.chunk', rows=len(df)):
+        return ArchiveSummary().add(analyze_posts(df, platform, keywords), platform)
+
+@timed('analysis.archive')
+def analyze_archive(paths, platform, keywords, chunk_rows=CHUNK_ROWS, workers=1, progress=None):
+    """
+    Streams archive files through the analysis chunk by chunk.
+
+    Args:
+        paths (list): JSON lines or Parquet files, read in order.
+        platform (str): Column layout of the posts, as in analyze_posts.
+        keywords (list): Keywords to count hits of.
+        chunk_rows (int): Posts per chunk.
+        workers (int): Worker processes; 1 analyzes chunks in this process.
+        progress (callable): Called with the number of posts analyzed after
+            each chunk.
+
+    Returns:
+        ArchiveSummary: Aggregates of the whole archive.
+    """
+    summary = ArchiveSummary()
+    chunks = iter_chunks(paths, chunk_rows)
+    if workers <= 1:
+        for chunk in chunks:
+            summary.merge(summarize_chunk(chunk, platform, keywords))
+            if progress: progress(summary.rows)
+        return summary
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(summarize_chunk, chunk, platform, keywords))
+            del chunk
+            while len(pending) >= 2 * workers: # Merged in submission order, so first spellings match a serial run
+                summary.merge(pending.popleft().result())
+                if progress: progress(summary.rows)
+        while pending:
+            summary.merge(pending.popleft().result())
+            if progress: progress(summary.rows)
+    return summary
+
+def write_outputs(summary, output_dir):
+    """
+    Writes summary.json, daily_counts.csv, top_drivers.csv and top_terms.csv,
+    plus network_edges.csv and influencers.csv when there are mentions (the
+    same files as a batch_runner job).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary.to_dict(), f, indent=2)
+    summary.daily_counts().to_csv(os.path.join(output_dir, 'daily_counts.csv'), index=False)
+    summary.top_drivers().to_csv(os.path.join(output_dir, 'top_drivers.csv'), index=False)
+    pd.concat([summary.terms.top_terms('anti-india', n=100).assign(kind='term'),
+               summary.terms.top_terms('anti-india', n=100, bigrams=True).assign(kind='bigram')]) \
+        .to_csv(os.path.join(output_dir, 'top_terms.csv'), index=False)
+
+    edges = summary.mention_edges()
+    if not edges.empty:
+        edges.to_csv(os.path.join(output_dir, 'network_edges.csv'), index=False)
+        graph = mention_graph(summary.accounts, edges)
+        pd.DataFrame(
+            [(u, d['influence'], d['bot_score']) for u, d in graph.nodes(data=True)],
+            columns=['username', 'influence', 'bot_score']
+        ).nlargest(TOP_INFLUENCERS, 'influence').to_csv(os.path.join(output_dir, 'influencers.csv'), index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help="JSON lines or Parquet files.")
+    parser.add_argument('--platform', default='All Platforms',
+                        choices=['Twitter', 'Reddit', 'YouTube', 'News Articles', 'All Platforms'],
+                        help="Column layout of the posts.")
+    parser.add_argument('--keywords', default='', help="Comma-separated keywords to count.")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--output-dir', default=os.path.join('runs', 'archive'))
+    args = parser.parse_args()
+
+    keywords = [k.strip() for k in args.keywords.split(',') if k.strip()]
+    started = time.perf_counter()
+    summary = analyze_archive(args.paths, args.platform, keywords, chunk_rows=args.chunk_rows, workers=args.workers,
+                              progress=lambda rows: print(f"\r{rows:,} posts analyzed", end='', flush=True))
+    seconds = time.perf_counter() - started
+    write_outputs(summary, args.output_dir)
+    try:
+        import resource
+        peak = f", peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.0f} MiB"
+    except ImportError: # Windows
+        peak = ""
+    print(f"\n{summary.rows:,} posts in {seconds:.1f}s ({summary.rows / max(seconds, 1e-9):,.0f} posts/s){peak}. "
+          f"Results in {args.output_dir}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+"""
+Narrative classifier backends for analysis.analyze_narrative_sentiment.
+
+Every backend labels posts 'anti-india', 'pro-india' or 'neutral' through
+Classifier.classify, which caches predictions by text hash and runs the
+uncached texts in batches, on a worker pool when there are several:
+
+    keyword - the phrase rules (PRO_INDIA_KEYWORDS / ANTI_INDIA_KEYWORDS),
+              the default
+    ngram   - a linear model over hashed word unigrams and bigrams, loaded
+              from a local .npz file; catches phrasings the rules don't list
+
+SENTRY_CLASSIFIER picks the default backend: 'keyword' or the path of an
+n-gram model. A model is trained from labelled posts (e.g. batch_runner's
+posts.jsonl, hand-corrected or as keyword-labelled weak supervision) with
+
+    python classifiers.py train posts.jsonl [more.jsonl ...] --out data/models/sentiment.npz
+"""
+import argparse
+import hashlib
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import propagate
+from keyword_matcher import get_automaton
+
+LABELS = ('anti-india', 'neutral', 'pro-india')
+
+PRO_INDIA_KEYWORDS = [
+    'proud indian', 'jai hind', 'india shining', 'support india', 'modi government',
+    'indian army', 'made in india', 'incredible india', 'strong india', 'unified india'
+]
+ANTI_INDIA_KEYWORDS = [
+    'boycott india', 'fascist india', 'kashmir under siege', 'hindutva terror',
+    'indian government failed', 'muslim genocide', 'endia', 'shame on india',
+    'free kashmir', 'dalit lives matter', 'farmer protest'
+]
+
+BATCH_CHARS = 250_000 # Text per batch; batches of long articles hold fewer posts than batches of tweets
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+CACHE_SIZE = 500_000 # Predictions kept per classifier
+
+def text_hashes(texts):
+    """
+    64-bit content hashes of texts, stable across processes.
+    """
+    return pd.util.hash_array(np.asarray(texts, dtype=object), categorize=False)
+
+def _batches(texts, batch_chars):
+    """
+    Splits texts into consecutive batches of about batch_chars characters
+    each (at least one text per batch).
+
+    Returns:
+        list: (start, end) index ranges.
+    """
+    ends = np.cumsum([len(text) for text in texts])
+    ranges, start = [], 0
+    while start < len(texts):
+        limit = (ends[start - 1] if start else 0) + batch_chars
+        end = max(start + 1, int(np.searchsorted(ends, limit, side='right')))
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+class Classifier(ABC):
+    """
+    Base of the backends: batching, the worker pool and the prediction
+    cache. Subclasses set name and implement predict_batch and fingerprint.
+
+    Args:
+        max_workers (int): Threads batches run on; 1 runs them in the caller.
+        batch_chars (int): Approximate text length of one batch.
+        cache_size (int): Predictions kept, least recently used dropped first.
+    """
+
+    name = None
+
+    def __init__(self, max_workers=MAX_WORKERS, batch_chars=BATCH_CHARS, cache_size=CACHE_SIZE):
+        self.max_workers = max_workers
+        self.batch_chars = batch_chars
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    @abstractmethod
+    def fingerprint(self):
+        """
+        Identifies the backend and its parameters, e.g. in artifact cache keys.
+        """
+
+    @abstractmethod
+    def predict_batch(self, texts):
+        """
+        Labels a batch of texts.
+
+        Returns:
+            list: One label from LABELS per text.
+        """
+
+    def classify(self, texts):
+        """
+        Labels posts, predicting only texts that aren't cached, each once.
+
+        Args:
+            texts (iterable): Post texts; non-strings are labelled by str().
+
+        Returns:
+            numpy.ndarray: Object array of labels, one per text.
+        """
+        texts = [text if isinstance(text, str) else str(text) for text in texts]
+        keys = text_hashes(texts).tolist()
+        labels = np.empty(len(texts), dtype=object)
+
+        pending = {} # Text hash -> rows with that text
+        with self._lock:
+            for row, key in enumerate(keys):
+                label = self._cache.get(key)
+                if label is not None:
+                    self._cache.move_to_end(key)
+                    labels[row] = label
+                else:
+                    pending.setdefault(key, []).append(row)
+            self.hits += len(texts) - sum(map(len, pending.values()))
+            self.misses += len(pending)
+        if not pending:
+            return labels
+
+        unique = [texts[rows[0]] for rows in pending.values()]
+        ranges = _batches(unique, self.batch_chars)
+        if self.max_workers > 1 and len(ranges) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(ranges)),
+                                    thread_name_prefix='classify') as executor:
+                predicted = list(executor.map(propagate(lambda r: self.predict_batch(unique[r[0]:r[1]])), ranges))
+        else:
+            predicted = [self.predict_batch(unique[start:end]) for start, end in ranges]
+
+        with self._lock:
+            for (key, rows), label in zip(pending.items(), chain.from_iterable(predicted)):
+                labels[rows] = label
+                self._cache[key] = label
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return labels
+
+class KeywordClassifier(Classifier):
+    """
+    The phrase rules: a post is anti-India or pro-India when it contains more
+    distinct phrases of that side than of the other, neutral otherwise.
+    """
+
+    name = 'keyword'
+
+    def __init__(self, pro_keywords=None, anti_keywords=None, max_workers=1, **kwargs):
+        # The scan is pure Python and holds the GIL, so extra threads would only add overhead
+        super().__init__(max_workers=max_workers, **kwargs)
+        self.pro_keywords = list(PRO_INDIA_KEYWORDS if pro_keywords is None else pro_keywords)
+        self.anti_keywords = list(ANTI_INDIA_KEYWORDS if anti_keywords is None else anti_keywords)
+        self._automaton = get_automaton(self.pro_keywords + self.anti_keywords)
+        keywords = self._automaton.keywords
+        pro = {k.strip().lower() for k in self.pro_keywords}
+        anti = {k.strip().lower() for k in self.anti_keywords}
+        self._pro = {i for i, k in enumerate(keywords) if k in pro}
+        self._anti = {i for i, k in enumerate(keywords) if k in anti}
+
+    @property
+    def fingerprint(self):
+        return f"keyword:{self.pro_keywords!r}:{self.anti_keywords!r}"
+
+    def predict_batch(self, texts):
+        labels = []
+        for text in texts:
+            present = {index for index, _, _ in self._automaton.iter_matches(text)}
+            pro_score, anti_score = len(present & self._pro), len(present & self._anti)
+            labels.append('anti-india' if anti_score > pro_score else 'pro-india' if pro_score > anti_score else 'neutral')
+        return labels
+
+# --- HASHED N-GRAM MODEL ---
+TOKEN_PATTERN = re.compile(r"[#@]?\w[\w']*")
+N_FEATURES = 2**18
+BIGRAM_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15) # Mixes the pair's hashes in order
+
+def featurize(texts, n_features=N_FEATURES):
+    """
+    Hashes each text's lowercased word unigrams and bigrams into feature ids.
+
+    Returns:
+        tuple: (docs, features, scale): int64 arrays with one entry per
+        n-gram occurrence, and the per-text factor 1 / sqrt(n-gram count)
+        that keeps long articles and short tweets on one scale.
+    """
+    token_lists = [TOKEN_PATTERN.findall(text.lower()) for text in texts]
+    lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+    tokens = np.fromiter(chain.from_iterable(token_lists), dtype=object, count=int(lengths.sum()))
+    hashes = pd.util.hash_array(tokens) if tokens.size else np.empty(0, dtype=np.uint64)
+    docs = np.repeat(np.arange(len(token_lists), dtype=np.int64), lengths)
+
+    adjacent = docs[1:] == docs[:-1] # Pairs within one text
+    bigrams = hashes[:-1][adjacent] * BIGRAM_MULTIPLIER + hashes[1:][adjacent]
+    features = (np.concatenate([hashes, bigrams]) % np.uint64(n_features)).astype(np.int64)
+    docs = np.concatenate([docs, docs[:-1][adjacent]])
+    scale = 1 / np.sqrt(np.maximum(np.bincount(docs, minlength=len(token_lists)), 1))
+    return docs, features, scale
+
+def _scores(weights, bias, docs, features, scale, n_docs):
+    columns = [np.bincount(docs, weights=weights[features, j], minlength=n_docs) for j in range(weights.shape[1])]
+    return np.column_stack(columns) * scale[:, None] + bias
+
+class HashedNgramClassifier(Classifier):
+    """
+    Multinomial logistic regression over hashed word unigrams and bigrams.
+    Inference is a few vectorized passes per batch, so it runs on plain CPU
+    at tens of thousands of posts per second.
+
+    Args:
+        weights (numpy.ndarray): (n_features, labels) weight matrix.
+        bias (numpy.ndarray): Per-label bias.
+        labels (sequence): Label of each weight column.
+        source (str): File the model was loaded from, if any.
+    """
+
+    name = 'ngram'
+
+    def __init__(self, weights, bias, labels=LABELS, source=None, **kwargs):
+        super().__init__(**kwargs)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.labels = np.array(labels, dtype=object)
+        self.source = source
+        self._digest = hashlib.sha1(self.weights.tobytes() + self.bias.tobytes()).hexdigest()[:16]
+
+    @property
+    def n_features(self):
+        return self.weights.shape[0]
+
+    @property
+    def fingerprint(self):
+        return f"ngram:{self._digest}"
+
+    def predict_batch(self, texts):
+        docs, features, scale = featurize(texts, self.n_features)
+        scores = _scores(self.weights, self.bias, docs, features, scale, len(texts))
+        return self.labels[scores.argmax(axis=1)].tolist()
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, labels=self.labels.astype(str))
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with np.load(path, allow_pickle=False) as model:
+            return cls(model['weights'], model['bias'], labels=model['labels'].tolist(), source=path, **kwargs)
+
+def train_ngram_model(texts, labels, n_features=N_FEATURES, epochs=5, batch_size=256,
+                      learning_rate=0.5, l2=1e-6, seed=0):
+    """
+    Fits a HashedNgramClassifier with mini-batch SGD on the softmax loss.
+
+    Args:
+        texts (list): Post texts.
+        labels (list): Their labels.
+        n_features (int): Hash space size; larger means fewer collisions and
+            a larger model file (4 bytes x labels per feature).
+
+    Returns:
+        HashedNgramClassifier: The trained model.
+    """
+    classes = sorted(set(labels))
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(texts))
+    texts = [str(texts[i]) for i in order]
+    y = np.searchsorted(classes, np.asarray(labels, dtype=object)[order].astype(str))
+
+    docs, features, scale = featurize(texts, n_features)
+    by_doc = np.argsort(docs, kind='stable')
+    docs, features = docs[by_doc], features[by_doc]
+    offsets = np.searchsorted(docs, np.arange(len(texts) + 1))
+
+    weights = np.zeros((n_features, len(classes)))
+    bias = np.zeros(len(classes))
+    batch_starts = np.arange(0, len(texts), batch_size)
+    for epoch in range(epochs):
+        rate = learning_rate / (1 + epoch)
+        for start in rng.permutation(batch_starts):
+            end = min(start + batch_size, len(texts))
+            lo, hi = offsets[start], offsets[end]
+            batch_docs, batch_features = docs[lo:hi] - start, features[lo:hi]
+            scores = _scores(weights, bias, batch_docs, batch_features, scale[start:end], end - start)
+            probs = np.exp(scores - scores.max(axis=1, keepdims=True))
+            probs /= probs.sum(axis=1, keepdims=True)
+            probs[np.arange(end - start), y[start:end]] -= 1 # Softmax loss gradient per post
+            grad = probs * scale[start:end, None]
+            touched = np.unique(batch_features)
+            for j in range(len(classes)):
+                step = np.bincount(batch_features, weights=grad[batch_docs, j], minlength=n_features)[touched]
+                weights[touched, j] -= rate * (step + l2 * weights[touched, j])
+            bias -= rate * grad.sum(axis=0)
+    return HashedNgramClassifier(weights, bias, labels=classes)
+
+# --- BACKEND SELECTION ---
+_default = None
+_default_lock = threading.Lock()
+
+def load_classifier(spec='keyword'):
+    """
+    Builds a backend from 'keyword' or the path of an n-gram model (.npz).
+    """
+    if spec == 'keyword':
+        return KeywordClassifier()
+    if spec.endswith('.npz'):
+        return HashedNgramClassifier.load(spec)
+    raise ValueError(f"Unknown classifier {spec!r}; expected 'keyword' or the path of an .npz model")
+
+def get_classifier():
+    """
+    Returns the process's default backend, chosen by SENTRY_CLASSIFIER.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = load_classifier(os.environ.get('SENTRY_CLASSIFIER') or 'keyword')
+        return _default
+
+def set_classifier(classifier):
+    """
+    Replaces the default backend, e.g. with a freshly trained model.
+    """
+    global _default
+    with _default_lock:
+        _default = classifier
+
+def _text_column(df):
+    return 'tweet_text' if 'tweet_text' in df.columns else 'text_content'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    train = commands.add_parser('train', help="Train an n-gram model from labelled posts in JSON lines files.")
+    train.add_argument('files', nargs='+')
+    train.add_argument('--out', required=True, help="Model file to write (.npz).")
+    train.add_argument('--label-column', default='sentiment')
+    train.add_argument('--epochs', type=int, default=5)
+    train.add_argument('--features', type=int, default=N_FEATURES, help="Hash space size.")
+    args = parser.parse_args()
+
+    df = pd.concat([pd.read_json(path, lines=True) for path in args.files], ignore_index=True)
+    texts = df[_text_column(df)].astype(str).tolist()
+    model = train_ngram_model(texts, df[args.label_column].astype(str).tolist(),
+                              n_features=args.features, epochs=args.epochs)
+    model.save(args.out)
+    agreement = (model.classify(texts) == df[args.label_column].astype(str).to_numpy()).mean()
+    print(f"Trained on {len(df):,} posts; {agreement:.1%} agree with their labels. Saved to {args.out}")
+
+if __name__ == '__main__':
+    main()
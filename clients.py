@@ -0,0 +1,129 @@
+import os
+import threading
+
+try:
+    import tomllib
+except ImportError: # Python < 3.11
+    import tomli as tomllib
+
+import transport
+
+# Same file Streamlit reads st.secrets from; SENTRY_SECRETS overrides the path
+SECRETS_PATH = os.environ.get('SENTRY_SECRETS', os.path.join('.streamlit', 'secrets.toml'))
+
+# Stand-in credentials for when the transport never reaches a real platform
+# (replay or a stand-in server) and there is no secrets file
+OFFLINE_SECRETS = {
+    'twitter': {'bearer_token': 'offline', 'api_key': 'offline', 'api_secret': 'offline',
+                'access_token': 'offline', 'access_secret': 'offline'},
+    'reddit': {'client_id': 'offline', 'client_secret': 'offline', 'user_agent': 'sentry-offline'},
+    'youtube': {'api_key': 'offline'},
+}
+
+_factories = {}
+_clients = {}
+_errors = {}
+_lock = threading.Lock()
+_secrets = None
+
+def load_secrets():
+    """
+    Reads API credentials from the secrets file once, without importing Streamlit.
+    Without a secrets file, an offline transport gets placeholder credentials.
+    """
+    global _secrets
+    if _secrets is None:
+        try:
+            with open(SECRETS_PATH, 'rb') as f:
+                _secrets = tomllib.load(f)
+        except FileNotFoundError:
+            if not transport.get_transport().offline:
+                raise
+            return OFFLINE_SECRETS
+    return _secrets
+
+def register_client(name, factory):
+    """
+    Registers a zero-argument factory that builds the client for a platform.
+    """
+    with _lock:
+        _factories[name] = factory
+
+def set_client(name, client):
+    """
+    Installs a ready-made client, e.g. a fake or a replaying client.
+    """
+    with _lock:
+        _clients[name] = client
+        _errors.pop(name, None)
+
+def reset_client(name=None):
+    """
+    Forgets a built client (or all of them) so the next get_client rebuilds it.
+    """
+    with _lock:
+        for key in [name] if name else list(_clients) + list(_errors):
+            _clients.pop(key, None)
+            _errors.pop(key, None)
+
+def get_client(name):
+    """
+    Returns the client for a platform, building it on first use.
+
+    Construction happens once per process under a lock, so concurrent
+    callers share one client. If construction fails, None is returned and
+    the failure is kept in client_error(name) until reset_client(name).
+    """
+    client = _clients.get(name)
+    if client is not None or name in _errors:
+        return client
+    with _lock:
+        if name not in _clients and name not in _errors:
+            try:
+                _clients[name] = _factories[name]()
+            except Exception as e:
+                _errors[name] = e
+        return _clients.get(name)
+
+def client_error(name):
+    return _errors.get(name)
+
+# --- PLATFORM CLIENT FACTORIES ---
+# Client libraries are imported inside the factories, so importing this
+# module (or collector) doesn't pay for platforms that are never used. Each
+# client's HTTP goes through the transport layer (live, record or replay).
+def _twitter_client():
+    import tweepy
+    secrets = load_secrets()['twitter']
+    client = tweepy.Client(
+        bearer_token=secrets["bearer_token"],
+        consumer_key=secrets["api_key"],
+        consumer_secret=secrets["api_secret"],
+        access_token=secrets["access_token"],
+        access_token_secret=secrets["access_secret"],
+        wait_on_rate_limit=False # The shared scheduler (rate_limit.py) paces calls; a 429 ends a scan early instead of sleeping
+    )
+    transport.mount(client.session)
+    return client
+
+def _reddit_client():
+    import praw
+    import requests
+    secrets = load_secrets()['reddit']
+    options = {'check_for_updates': False} if transport.get_transport().offline else {}
+    return praw.Reddit(
+        client_id=secrets["client_id"],
+        client_secret=secrets["client_secret"],
+        user_agent=secrets["user_agent"],
+        requestor_kwargs={'session': transport.mount(requests.Session())},
+        **options
+    )
+
+def _youtube_client():
+    from googleapiclient.discovery import build
+    return build('youtube', 'v3', developerKey=load_secrets()["youtube"]["api_key"],
+                 http=transport.httplib2_http(timeout=60))
+
+register_client('twitter', _twitter_client)
+register_client('reddit', _reddit_client)
+register_client('youtube', _youtube_client)
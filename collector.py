@@ -1,132 +1,183 @@
-import tweepy
 import pandas as pd
-import praw
-from googleapiclient.discovery import build
 from datetime import datetime
-import streamlit as st
 import time
+import itertools
 
+import notify
+from clients import client_error, get_client
+from instrumentation import span, timed
+from rate_limit import RateLimited, format_resume_at, get_scheduler
+from schema import compact_frame
+from youtube_ingest import fetch_video_details, search_video_ids
 
-# Initialize Twitter Client
-try:
-    twitter_client = tweepy.Client(
-        bearer_token=st.secrets["twitter"]["bearer_token"],
-        consumer_key=st.secrets["twitter"]["api_key"],
-        consumer_secret=st.secrets["twitter"]["api_secret"],
-        access_token=st.secrets["twitter"]["access_token"],
-        access_token_secret=st.secrets["twitter"]["access_secret"],
-        wait_on_rate_limit=True
-    )
-except Exception as e:
-    st.error("Could not initialize Twitter client. Please check your credentials in secrets.toml.")
-    twitter_client = None
-
-# Initialize Reddit Client
-try:
-    reddit_client = praw.Reddit(
-        client_id=st.secrets["reddit"]["client_id"],
-        client_secret=st.secrets["reddit"]["client_secret"],
-        user_agent=st.secrets["reddit"]["user_agent"]
-    )
-except Exception as e:
-    st.error("Could not initialize Reddit client. Please check your credentials in secrets.toml.")
-    reddit_client = None
-
-# Initialize YouTube Client
-try:
-    youtube_client = build('youtube', 'v3', developerKey=st.secrets["youtube"]["api_key"])
-except Exception as e:
-    st.error("Could not initialize YouTube client. Please check your credentials in secrets.toml.")
-    youtube_client = None
+def _unavailable(platform, name):
+    """
+    Reports that a platform's client could not be built.
+    """
+    notify.warning(f"{platform} client is not available due to initialization error: {client_error(name)}. "
+                   "Please check your credentials in secrets.toml.")
 
 # --- TWITTER DATA FETCHER ---
-def get_tweets_df(query, max_results=100):
-    if not twitter_client:
-        st.warning("Twitter client is not available due to initialization error.")
-        return pd.DataFrame()
+TWITTER_PAGE_SIZE = 100 # search_recent_tweets accepts 10-100 results per page
+
+def _tweet_records(response, seen_ids):
+    """
+    Normalizes one search_recent_tweets page into records, skipping tweets
+    whose id is already in seen_ids.
+    """
+    users = {user.id: user for user in response.includes.get('users', [])}
+    records = []
+    for tweet in response.data:
+        if tweet.id in seen_ids:
+            continue
+        seen_ids.add(tweet.id)
+        user = users[tweet.author_id]
+        records.append({
+            'tweet_id': tweet.id,
+            'author_id': tweet.author_id, 'username': user.username,
+            'user_created_at': user.created_at, 'followers_count': user.public_metrics['followers_count'],
+            'following_count': user.public_metrics['following_count'], 'tweet_count': user.public_metrics['tweet_count'],
+            'is_verified': user.verified, 'tweet_text': tweet.text,
+            'tweet_created_at': tweet.created_at, 'retweet_count': tweet.public_metrics['retweet_count'],
+            'like_count': tweet.public_metrics['like_count']
+        })
+    return records
+
+def iter_tweet_batches(query, max_results=100, client=None, since_id=None):
+    """
+    Streams recent tweets page by page, following next_token pagination.
+
+    Args:
+        query (str): Twitter search query.
+        max_results (int): Total number of tweets to fetch across all pages.
+        client: Object with tweepy.Client's search_recent_tweets method,
+            defaults to the configured Twitter client.
+        since_id (int): Only fetch tweets newer than this tweet id.
+
+    Yields:
+        pandas.DataFrame: One batch of normalized, de-duplicated tweets per
+        page, as soon as the page arrives. On an API error, or when the
+        shared rate limit runs out, the stream stops after reporting it,
+        keeping the batches already yielded.
+    """
+    client = client or get_client('twitter')
+    if not client:
+        _unavailable("Twitter", 'twitter')
+        return
+
+    seen_ids = set()
+    remaining = max_results
+    next_token = None
     try:
-        response = twitter_client.search_recent_tweets(
-            query=f"{query} -is:retweet lang:en",
-            max_results=min(100, max_results),
-            tweet_fields=['created_at', 'public_metrics', 'text'],
-            user_fields=['username', 'public_metrics', 'created_at', 'verified'],
-            expansions=['author_id']
-        )
-        # Handle case where there is no data
-        if not response.data: return pd.DataFrame()
-
-        users = {user.id: user for user in response.includes['users']}
-        records = []
-        for tweet in response.data:
-            user = users[tweet.author_id]
-            records.append({
-                'author_id': tweet.author_id, 'username': user.username,
-                'user_created_at': user.created_at, 'followers_count': user.public_metrics['followers_count'],
-                'following_count': user.public_metrics['following_count'], 'tweet_count': user.public_metrics['tweet_count'],
-                'is_verified': user.verified, 'tweet_text': tweet.text,
-                'tweet_created_at': tweet.created_at, 'retweet_count': tweet.public_metrics['retweet_count'],
-                'like_count': tweet.public_metrics['like_count']
-            })
-        
-        df = pd.DataFrame(records)
-        df['engagement'] = df['retweet_count'] + df['like_count']
-        return df.sort_values('engagement', ascending=False)
-    except tweepy.errors.TooManyRequests:
-        st.error("Twitter Rate Limit Exceeded. Please wait 15 minutes before trying again.")
-        return pd.DataFrame()
+        while remaining > 0:
+            with span('collect.twitter.page') as page:
+                response = client.search_recent_tweets(
+                    query=f"{query} -is:retweet lang:en",
+                    max_results=max(10, min(TWITTER_PAGE_SIZE, remaining)),
+                    next_token=next_token,
+                    since_id=since_id,
+                    tweet_fields=['created_at', 'public_metrics', 'text'],
+                    user_fields=['username', 'public_metrics', 'created_at', 'verified'],
+                    expansions=['author_id']
+                )
+                # Handle case where there is no data
+                if not response.data: return
+
+                records = _tweet_records(response, seen_ids)[:remaining]
+                page.rows = len(records)
+                if records:
+                    remaining -= len(records)
+                    df = pd.DataFrame(records)
+                    df['engagement'] = df['retweet_count'] + df['like_count']
+                    df = compact_frame(df)
+            # Yielded outside the span, so time the caller spends on the page isn't billed to the fetch
+            if records:
+                yield df
+
+            next_token = (response.meta or {}).get('next_token')
+            if not next_token: return
+    except RateLimited as e:
+        notify.warning(f"{e}. Results are partial.")
     except Exception as e:
-        st.error(f"An error occurred while fetching tweets: {str(e)}")
-        return pd.DataFrame()
+        import tweepy # Already loaded by the client factory
+        if isinstance(e, tweepy.errors.TooManyRequests):
+            # The 429's reset time is already in the shared scheduler
+            resume_at = get_scheduler().resume_at('twitter')
+            when = f"resume at {format_resume_at(resume_at)}" if resume_at else "please wait 15 minutes"
+            notify.warning(f"Twitter rate limit exceeded; {when}. Results are partial.")
+        else:
+            notify.error(f"An error occurred while fetching tweets: {str(e)}")
+
+@timed('collect.twitter')
+def get_tweets_df(query, max_results=100, client=None, since_id=None):
+    batches = list(iter_tweet_batches(query, max_results=max_results, client=client, since_id=since_id))
+    if not batches: return pd.DataFrame()
+    return compact_frame(pd.concat(batches, ignore_index=True)).sort_values('engagement', ascending=False)
 
 # --- REDDIT DATA FETCHER ---
-def get_reddit_posts_df(subreddit_name, query, limit=50):
+@timed('collect.reddit')
+def get_reddit_posts_df(subreddit_name, query, limit=50, created_after=None):
+    reddit_client = get_client('reddit')
     if not reddit_client:
-        st.warning("Reddit client is not available due to initialization error.")
+        _unavailable("Reddit", 'reddit')
         return pd.DataFrame()
     try:
         subreddit = reddit_client.subreddit(subreddit_name)
-        # PRAW handles rate limits automatically, so we just need a generic catch
-        records = [{
-            'title': post.title, 'author': post.author.name if post.author else '[deleted]',
-            'score': post.score, 'num_comments': post.num_comments, 'url': post.url,
-            'created_at': datetime.utcfromtimestamp(post.created_utc),
-            'text_content': post.title + " " + post.selftext
-        } for post in subreddit.search(query, limit=limit, sort='new')]
-            
+        posts = subreddit.search(query, limit=limit, sort='new')
+        if created_after is not None:
+            # Results are newest first, so stop at the first post already seen
+            posts = itertools.takewhile(lambda post: post.created_utc > created_after, posts)
+        records = []
+        try:
+            for post in posts:
+                records.append({
+                    'post_id': post.id, 'title': post.title, 'author': post.author.name if post.author else '[deleted]',
+                    'score': post.score, 'num_comments': post.num_comments, 'url': post.url,
+                    'created_at': datetime.utcfromtimestamp(post.created_utc),
+                    'text_content': post.title + " " + post.selftext
+                })
+        except Exception as e:
+            # prawcore wraps transport errors, a RateLimited from the scheduler included
+            limited = getattr(e, 'original_exception', e)
+            if not isinstance(limited, RateLimited): raise
+            notify.warning(f"{limited}. Results are partial.")
+
         if not records: return pd.DataFrame()
         df = pd.DataFrame(records)
         df['engagement'] = df['score'] + df['num_comments']
-        return df.sort_values('engagement', ascending=False)
+        return compact_frame(df).sort_values('engagement', ascending=False)
     except Exception as e:
-        st.error(f"Error fetching Reddit posts: {e}")
+        notify.error(f"Error fetching Reddit posts: {e}")
         return pd.DataFrame()
 
 # --- YOUTUBE DATA FETCHER ---
-def get_youtube_videos_df(query, max_results=25):
+@timed('collect.youtube')
+def get_youtube_videos_df(query, max_results=25, published_after=None):
+    youtube_client = get_client('youtube')
     if not youtube_client:
-        st.warning("YouTube client is not available due to initialization error.")
+        _unavailable("YouTube", 'youtube')
         return pd.DataFrame()
     try:
-        search_response = youtube_client.search().list(q=query, part='snippet', maxResults=max_results, type='video').execute()
-        video_ids = [item['id']['videoId'] for item in search_response.get('items', [])]
+        # Paged search and 50-id detail batches, charged to the shared YouTube quota
+        video_ids = search_video_ids(youtube_client, query, max_results, published_after=published_after)
         if not video_ids: return pd.DataFrame()
 
-        video_response = youtube_client.videos().list(part='snippet,statistics', id=','.join(video_ids)).execute()
         records = []
-        for video in video_response.get('items', []):
+        for video in fetch_video_details(youtube_client, video_ids):
             stats = video.get('statistics', {})
             records.append({
-                'title': video['snippet']['title'], 'channel_title': video['snippet']['channelTitle'],
+                'video_id': video['id'], 'title': video['snippet']['title'], 'channel_title': video['snippet']['channelTitle'],
                 'published_at': video['snippet']['publishedAt'], 'view_count': int(stats.get('viewCount', 0)),
                 'like_count': int(stats.get('likeCount', 0)), 'comment_count': int(stats.get('commentCount', 0)),
                 'video_url': f"https://www.youtube.com/watch?v={video['id']}",
                 'description': video['snippet']['description']
             })
 
+        if not records: return pd.DataFrame()
         df = pd.DataFrame(records)
         df['engagement'] = df['view_count'] + df['like_count'] + df['comment_count']
         df['text_content'] = df['title'] + " " + df['description']
-        return df.sort_values('engagement', ascending=False)
+        return compact_frame(df).sort_values('engagement', ascending=False)
     except Exception as e:
-        st.error(f"Error fetching YouTube videos: {e}")
+        notify.error(f"Error fetching YouTube videos: {e}")
         return pd.DataFrame()
@@ -0,0 +1,221 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from analysis import build_mention_matrix
+from instrumentation import timed
+
+# --- INTERACTION GRAPH ANALYTICS ---
+# Accounts are linked by mentions and, optionally, by sharing the same
+# hashtags or URLs. The combined graph is a SciPy sparse matrix, and
+# communities (label propagation) and PageRank are computed with vectorized
+# sparse operations instead of networkx's per-node Python loops.
+
+HASHTAG_PATTERN = re.compile(r'(?<!\S)#(\w+)')
+URL_PATTERN = re.compile(r'https?://\S+')
+
+HASHTAG_WEIGHT = 0.5 # Sharing a hashtag is weaker evidence than a mention
+URL_WEIGHT = 1.0
+# Hashtags or URLs used by more accounts than this are topics, not coordination,
+# and would add a dense block of edges between all of their users
+MAX_SHARED_ACCOUNTS = 200
+
+PAGERANK_ALPHA = 0.85
+LPA_MAX_ITER = 30
+LPA_SEED = 0
+LPA_MIN_CHANGE = 1e-3 # Stop once fewer than this share of accounts would change community
+
+def _co_occurrence(usernames, accounts, items, max_accounts):
+    """
+    Links accounts that used the same item (hashtag, URL). Entry [i, j] is
+    the number of distinct items accounts i and j both used.
+    """
+    from scipy import sparse
+
+    pairs = pd.DataFrame({'account': accounts, 'item': items}).drop_duplicates()
+    users_per_item = pairs.groupby('item')['account'].transform('size')
+    pairs = pairs[(users_per_item >= 2) & (users_per_item <= max_accounts)]
+    n = len(usernames)
+    if pairs.empty:
+        return sparse.csr_matrix((n, n))
+
+    rows = usernames.get_indexer(pairs['account'])
+    cols = pd.factorize(pairs['item'])[0]
+    incidence = sparse.csr_matrix((np.ones(len(pairs)), (rows, cols)), shape=(n, cols.max() + 1))
+    co = (incidence @ incidence.T).tocsr()
+    co.setdiag(0)
+    co.eliminate_zeros()
+    return co
+
+def _tagged_items(df, pattern, normalize):
+    exploded = pd.DataFrame({
+        'account': df['username'].astype(str).to_numpy(),
+        'item': df['tweet_text'].astype(str).str.findall(pattern).to_numpy(),
+    }).explode('item').dropna(subset=['item'])
+    return exploded['account'].to_numpy(), normalize(exploded['item']).to_numpy()
+
+def interaction_matrix(df, hashtags=True, urls=True, hashtag_weight=HASHTAG_WEIGHT,
+                       url_weight=URL_WEIGHT, max_shared_accounts=MAX_SHARED_ACCOUNTS):
+    """
+    Builds the account interaction graph of a tweets frame as a directed
+    sparse matrix.
+
+    Mentions are directed (mentioner -> mentioned, weighted by count).
+    Co-hashtag and co-URL links are added in both directions, weighted by
+    the number of shared items times hashtag_weight / url_weight.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix, list of usernames).
+    """
+    mentions, usernames = build_mention_matrix(df)
+    matrix = mentions.astype(np.float64)
+    index = pd.Index(usernames)
+    if len(index) and hashtags:
+        accounts, items = _tagged_items(df, HASHTAG_PATTERN, lambda s: s.str.lower())
+        matrix = matrix + hashtag_weight * _co_occurrence(index, accounts, items, max_shared_accounts)
+    if len(index) and urls:
+        accounts, items = _tagged_items(df, URL_PATTERN, lambda s: s.str.rstrip('/.,)'))
+        matrix = matrix + url_weight * _co_occurrence(index, accounts, items, max_shared_accounts)
+    return matrix.tocsr(), usernames
+
+def _row_argmax(matrix, priority):
+    """
+    Column of the largest entry in each row of a canonical csr matrix, ties
+    broken by priority[column]. Rows without entries get -1.
+    """
+    data = matrix.data + priority[matrix.indices]
+    counts = np.diff(matrix.indptr)
+    nonempty = counts > 0
+    row_of = np.repeat(np.arange(matrix.shape[0]), counts)
+    row_max = np.full(matrix.shape[0], -np.inf)
+    row_max[nonempty] = np.maximum.reduceat(data, matrix.indptr[:-1][nonempty])
+    best = np.flatnonzero(data == row_max[row_of])
+    best_rows = row_of[best]
+    first = np.ones(len(best), dtype=bool)
+    first[1:] = best_rows[1:] != best_rows[:-1]
+    result = np.full(matrix.shape[0], -1, dtype=np.int64)
+    result[best_rows[first]] = matrix.indices[best[first]]
+    return result
+
+def label_propagation(matrix, max_iter=LPA_MAX_ITER, seed=LPA_SEED, min_change=LPA_MIN_CHANGE):
+    """
+    Community detection by label propagation on a weighted sparse graph
+    (directions are ignored).
+
+    Every account starts in its own community and repeatedly adopts the
+    community with the largest total edge weight among its neighbours. Each
+    round updates a random half of the accounts, which stops the label
+    swapping that fully synchronous updates fall into. A round is one
+    sparse matrix build and a vectorized row-wise argmax over its entries.
+
+    Returns:
+        numpy.ndarray: Community id per account, numbered from 0 by size
+        (largest first).
+    """
+    from scipy import sparse
+
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    graph = (matrix + matrix.T).tocoo()
+    keep = graph.row != graph.col
+    rows, cols, weights = graph.row[keep], graph.col[keep], graph.data[keep]
+    priority = rng.random(n) * 1e-6 # Random tie-break between equally heavy labels
+    has_neighbours = np.bincount(rows, minlength=n) > 0
+
+    labels = np.arange(n, dtype=np.int64)
+    for _ in range(max_iter):
+        # Row i of label_weights holds the total edge weight from i to each
+        # community; building it sums duplicate (node, label) pairs in C
+        label_weights = sparse.csr_matrix((weights, (rows, labels[cols])), shape=(n, n))
+        label_weights.sum_duplicates()
+        proposal = labels.copy()
+        proposal[has_neighbours] = _row_argmax(label_weights, priority)[has_neighbours]
+
+        moved = proposal != labels
+        if moved.mean() < min_change:
+            labels = proposal
+            break
+        update = moved & (rng.random(n) < 0.5)
+        labels[update] = proposal[update]
+
+    _, communities, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.lexsort((np.arange(len(sizes)), -sizes))] = np.arange(len(sizes))
+    return rank[communities]
+
+def pagerank(matrix, alpha=PAGERANK_ALPHA, max_iter=100, tol=1e-6):
+    """
+    PageRank by power iteration on a weighted directed sparse graph, with
+    the same conventions as networkx.pagerank: rank of dangling accounts is
+    spread uniformly, and iteration stops once the L1 change is below n * tol.
+
+    Returns:
+        numpy.ndarray: PageRank per account, summing to 1.
+    """
+    from scipy import sparse
+
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out_weight = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    transition_t = (sparse.diags(inverse) @ matrix).T.tocsr()
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = rank
+        rank = alpha * (transition_t @ previous) + (alpha * previous[dangling].sum() + 1 - alpha) / n
+        if np.abs(rank - previous).sum() < n * tol:
+            break
+    return rank
+
+@timed('analysis.graph_metrics')
+def account_metrics(df, hashtags=True, urls=True):
+    """
+    Community and PageRank metrics per account of a tweets frame.
+
+    Returns:
+        pandas.DataFrame: One row per account, by PageRank descending:
+        username, community, community_size, community_bot_score (mean bot
+        score of the community's accounts), bot_score and pagerank.
+    """
+    columns = ['username', 'community', 'community_size', 'community_bot_score', 'bot_score', 'pagerank']
+    if df.empty or 'username' not in df.columns or 'tweet_text' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    matrix, usernames = interaction_matrix(df, hashtags=hashtags, urls=urls)
+    accounts = pd.DataFrame({'username': usernames})
+    accounts['community'] = label_propagation(matrix)
+    accounts['pagerank'] = pagerank(matrix)
+    if 'bot_score' in df.columns:
+        # Each account's latest bot score, like the mention graph's nodes
+        latest = df.assign(username=df['username'].astype(str)).drop_duplicates('username', keep='last')
+        accounts['bot_score'] = accounts['username'].map(latest.set_index('username')['bot_score']).fillna(0).to_numpy()
+    else:
+        accounts['bot_score'] = 0
+    communities = accounts.groupby('community')
+    accounts['community_size'] = communities['username'].transform('size')
+    accounts['community_bot_score'] = communities['bot_score'].transform('mean')
+    return accounts[columns].sort_values('pagerank', ascending=False).reset_index(drop=True)
+
+def community_summary(accounts, min_size=2, top_accounts=5):
+    """
+    Summarizes account_metrics by community, largest first, leaving out
+    communities smaller than min_size.
+    """
+    columns = ['community', 'accounts', 'mean_bot_score', 'total_pagerank', 'top_accounts']
+    groups = accounts[accounts['community_size'] >= min_size].groupby('community', sort=False)
+    if not groups.ngroups:
+        return pd.DataFrame(columns=columns)
+    summary = pd.DataFrame({
+        'accounts': groups.size(),
+        'mean_bot_score': groups['bot_score'].mean().round(2),
+        'total_pagerank': groups['pagerank'].sum(),
+        # accounts is sorted by PageRank, so each group's first rows are its top accounts
+        'top_accounts': groups['username'].agg(lambda names: ", ".join(names.iloc[:top_accounts])),
+    })
+    return summary.sort_values('accounts', ascending=False).reset_index()[columns]
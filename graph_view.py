@@ -0,0 +1,203 @@
+from collections import defaultdict
+
+import numpy as np
+
+from instrumentation import timed
+
+# --- INFLUENCE NETWORK VIEW ---
+# Large mention graphs are reduced before they are drawn: accounts below a
+# k-core are pruned, the most influential remaining accounts are kept, and
+# the neighbours of each kept account that didn't make the cut are collapsed
+# into one aggregate node. The layout is computed here, once per graph and
+# detail level, so the browser only draws points and lines.
+
+# Detail level -> how much of the graph is drawn
+DETAIL_LEVELS = {
+    'Overview': {'max_nodes': 100, 'min_core': 2},
+    'Standard': {'max_nodes': 300, 'min_core': 1},
+    'Detailed': {'max_nodes': 500, 'min_core': 1},
+}
+DEFAULT_DETAIL_LEVEL = 'Standard'
+LAYOUT_ITERATIONS = 50
+LAYOUT_SEED = 42
+HIGH_BOT_SCORE = 5 # Accounts above this are drawn as likely bots
+
+def k_core_nodes(G, k):
+    """
+    Returns the accounts in the k-core of G (every account left has at least
+    k neighbours left), by peeling off low-degree accounts in one pass over
+    the edges. Self-loops are ignored.
+    """
+    adj = G.adj
+    degree = {node: len(neighbours) - (node in neighbours) for node, neighbours in adj.items()}
+    queue = [node for node, d in degree.items() if d < k]
+    removed = set(queue)
+    while queue:
+        node = queue.pop()
+        for neighbour in adj[node]:
+            if neighbour not in removed:
+                degree[neighbour] -= 1
+                if degree[neighbour] < k:
+                    removed.add(neighbour)
+                    queue.append(neighbour)
+    return [node for node in adj if node not in removed]
+
+def reduce_graph(G, max_nodes, min_core=1, collapse_leaves=True):
+    """
+    Reduces a mention graph to at most max_nodes accounts for display.
+
+    Accounts outside the min_core k-core are pruned; of the rest, the
+    max_nodes with the highest 'influence' are kept. With collapse_leaves,
+    every pruned account adjacent to a kept one is folded into an aggregate
+    node attached to its most influential kept neighbour, so the view still
+    shows how much activity surrounds each account.
+
+    Returns:
+        tuple: (networkx.Graph, dict of counts: 'nodes', 'kept', 'collapsed', 'hidden').
+            Aggregate nodes have aggregate=True, 'members', and the members'
+            mean and max bot score.
+    """
+    import networkx as nx
+
+    total = G.number_of_nodes()
+    if total == 0:
+        return nx.Graph(), {'nodes': 0, 'kept': 0, 'collapsed': 0, 'hidden': 0}
+
+    candidates = list(G.nodes())
+    if min_core > 1 and total > max_nodes:
+        cored = k_core_nodes(G, min_core)
+        # A sparse graph may have (almost) no core; fall back to every account
+        if len(cored) >= min(max_nodes, total) // 2:
+            candidates = cored
+
+    attrs = G.nodes
+    if len(candidates) > max_nodes:
+        scores = np.fromiter((attrs[node].get('influence', 0.0) for node in candidates), dtype=np.float64, count=len(candidates))
+        top = np.argpartition(-scores, max_nodes - 1)[:max_nodes]
+        candidates = [candidates[i] for i in top]
+    kept = set(candidates)
+
+    view = nx.Graph()
+    view.add_nodes_from((node, dict(G.nodes[node])) for node in kept)
+    view.add_edges_from((u, v, d) for u, v, d in G.edges(kept, data=True) if u in kept and v in kept)
+
+    collapsed = 0
+    if collapse_leaves and len(kept) < total:
+        groups = defaultdict(list) # Kept account -> pruned neighbours folded into it
+        for node in G.nodes():
+            if node in kept:
+                continue
+            anchors = [n for n in G.adj[node] if n in kept]
+            if anchors:
+                anchor = max(anchors, key=lambda n: (attrs[n].get('influence', 0.0), n))
+                groups[anchor].append(node)
+        for anchor, members in groups.items():
+            bot_scores = [G.nodes[m].get('bot_score', 0) for m in members]
+            weight = sum(G.adj[m][anchor].get('weight', 1) for m in members)
+            aggregate = f"+{len(members)} around {anchor}"
+            view.add_node(aggregate, aggregate=True, members=len(members), influence=0.0,
+                          bot_score=float(np.mean(bot_scores)), max_bot_score=max(bot_scores))
+            view.add_edge(anchor, aggregate, weight=weight)
+            collapsed += len(members)
+
+    return view, {'nodes': total, 'kept': len(kept), 'collapsed': collapsed,
+                  'hidden': total - len(kept) - collapsed}
+
+def compute_layout(view, iterations=LAYOUT_ITERATIONS, seed=LAYOUT_SEED):
+    """
+    Fruchterman-Reingold force-directed positions for a reduced graph,
+    vectorized over all node pairs at once in float32. A reduced graph has
+    at most a couple of thousand nodes, so the dense pairwise arrays stay
+    small. The seed makes the same graph always get the same picture.
+    """
+    import networkx as nx
+
+    nodes = list(view.nodes())
+    n = len(nodes)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {nodes[0]: np.zeros(2)}
+
+    adjacency = nx.to_numpy_array(view, nodelist=nodes, weight='weight', dtype=np.float32)
+    adjacency = np.log1p(adjacency) # Heavy mention pairs pull harder, but not by orders of magnitude
+    positions = np.random.default_rng(seed).random((n, 2), dtype=np.float32)
+    k = np.float32(1.5 / np.sqrt(n)) # Optimal distance between nodes
+    temperature = np.float32(0.1)
+    cooling = temperature / (iterations + 1)
+    x, y = positions[:, 0].copy(), positions[:, 1].copy()
+    for _ in range(iterations):
+        dx = x[:, None] - x[None, :]
+        dy = y[:, None] - y[None, :]
+        distance_sq = np.maximum(dx * dx + dy * dy, np.float32(1e-4))
+        # Repulsion between every pair, attraction along edges
+        force = k * k / distance_sq - adjacency * np.sqrt(distance_sq) / k
+        move_x = (dx * force).sum(axis=1)
+        move_y = (dy * force).sum(axis=1)
+        step = temperature / np.maximum(np.sqrt(move_x * move_x + move_y * move_y), np.float32(0.01))
+        x += move_x * step
+        y += move_y * step
+        temperature -= cooling
+    positions = np.column_stack((x, y))
+
+    positions -= positions.mean(axis=0)
+    positions /= np.abs(positions).max() or 1
+    return dict(zip(nodes, positions.astype(np.float64)))
+
+def network_figure(view, positions):
+    """
+    Builds a plotly figure of a reduced graph: all edges as one line trace,
+    accounts coloured by bot score and sized by influence, aggregate nodes
+    as grey diamonds.
+    """
+    import plotly.graph_objects as go
+
+    edge_x, edge_y = [], []
+    for u, v in view.edges():
+        (x0, y0), (x1, y1) = positions[u], positions[v]
+        edge_x += [x0, x1, None]
+        edge_y += [y0, y1, None]
+
+    accounts = [n for n, d in view.nodes(data=True) if not d.get('aggregate')]
+    aggregates = [n for n, d in view.nodes(data=True) if d.get('aggregate')]
+    max_influence = max((view.nodes[n].get('influence', 0.0) for n in accounts), default=0.0) or 1.0
+
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=edge_x, y=edge_y, mode='lines', hoverinfo='skip',
+                               line=dict(width=0.5, color='#AAAAAA'), showlegend=False))
+    fig.add_trace(go.Scattergl(
+        x=[positions[n][0] for n in accounts], y=[positions[n][1] for n in accounts],
+        mode='markers', name='Accounts',
+        marker=dict(
+            size=[8 + 22 * view.nodes[n].get('influence', 0.0) / max_influence for n in accounts],
+            color=['#FF4B4B' if view.nodes[n].get('bot_score', 0) > HIGH_BOT_SCORE else '#1E90FF' for n in accounts],
+            line=dict(width=0.5, color='white'),
+        ),
+        text=[f"{n}<br>Influence: {view.nodes[n].get('influence', 0.0):.3f}<br>Bot score: {view.nodes[n].get('bot_score', 0)}"
+              f"<br>Connections: {view.degree(n)}" for n in accounts],
+        hoverinfo='text',
+    ))
+    if aggregates:
+        fig.add_trace(go.Scattergl(
+            x=[positions[n][0] for n in aggregates], y=[positions[n][1] for n in aggregates],
+            mode='markers', name='Collapsed accounts',
+            marker=dict(symbol='diamond', size=[6 + 2 * np.log2(1 + view.nodes[n]['members']) for n in aggregates],
+                        color='#BBBBBB'),
+            text=[f"{view.nodes[n]['members']} more accounts<br>Mean bot score: {view.nodes[n]['bot_score']:.1f}"
+                  f"<br>Max bot score: {view.nodes[n]['max_bot_score']}" for n in aggregates],
+            hoverinfo='text',
+        ))
+    fig.update_layout(showlegend=True, hovermode='closest', height=650, margin=dict(l=10, r=10, t=10, b=10),
+                      xaxis=dict(visible=False), yaxis=dict(visible=False), plot_bgcolor='white')
+    return fig
+
+@timed('render.network_view')
+def build_network_view(G, level=DEFAULT_DETAIL_LEVEL):
+    """
+    Reduces, lays out and draws a mention graph at a detail level.
+
+    Returns:
+        tuple: (plotly Figure, dict of counts from reduce_graph).
+    """
+    view, counts = reduce_graph(G, **DETAIL_LEVELS[level])
+    return network_figure(view, compute_layout(view)), counts
@@ -0,0 +1,437 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# --- PIPELINE INSTRUMENTATION ---
+# Spans time the stages of a scan: wall time, rows produced, API calls and
+# bytes fetched (counted by the transport layer), and optionally peak
+# memory. A span records only while a Run is active in the current context.
+# Otherwise span() hands back a shared no-op and timed() calls straight
+# through, so instrumented code costs one context-variable lookup when
+# nobody is watching. Worker threads don't inherit the context; wrap the
+# function they run with propagate().
+
+# Every finished run is appended here as JSON lines when set
+TRACE_FILE = os.environ.get('SENTRY_TRACE_FILE')
+# tracemalloc slows allocation-heavy stages several times over, so peak memory is opt-in
+TRACE_MEMORY = os.environ.get('SENTRY_TRACE_MEMORY') == '1'
+
+_run = contextvars.ContextVar('sentry_run', default=None)
+_span = contextvars.ContextVar('sentry_span', default=None)
+
+class Span:
+    """
+    One timed stage of a run. `rows` may be set by the code inside the span;
+    api_calls and bytes include those of nested spans.
+    """
+    __slots__ = ('name', 'parent', 'depth', 'start', 'seconds', 'rows', 'bytes', 'api_calls', 'peak_mib',
+                 'error', 'attrs', 'thread', '_started', '_traced', '_peak')
+
+    def __init__(self, name, parent, start, attrs):
+        self.name = name
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+        self.start = start
+        self.seconds = None
+        self.rows = None
+        self.bytes = 0
+        self.api_calls = 0
+        self.peak_mib = None
+        self.error = None
+        self.attrs = attrs
+        self.thread = threading.current_thread().name
+
+class _NoopSpan:
+    """
+    Stand-in returned by span() when no run is recording; ignores everything.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    @property
+    def attrs(self):
+        return {}
+
+_NOOP = _NoopSpan()
+
+class _SpanContext:
+    __slots__ = ('run', 'name', 'attrs', 'span', 'token')
+
+    def __init__(self, run, name, attrs):
+        self.run, self.name, self.attrs = run, name, attrs
+
+    def __enter__(self):
+        self.span = self.run._open(self.name, self.attrs)
+        self.token = _span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _span.reset(self.token)
+        self.run._close(self.span, exc)
+        return False
+
+class Run:
+    """
+    The spans and messages recorded for one scan, render or job.
+
+    A run records while it is entered (`with run:`), which can happen
+    several times, e.g. once per Streamlit block. finish() closes it and
+    exports it: to the metrics registry and, with SENTRY_TRACE_FILE, to
+    that JSON lines file. record() does both in one block.
+
+    Args:
+        name (str): Kind of run, e.g. 'scan' or 'batch.job'.
+        memory (bool): Trace each span's peak memory with tracemalloc.
+            Peaks of spans in concurrent threads overlap.
+        **attrs: Context saved with the run (platform, keywords, ...).
+    """
+
+    def __init__(self, name, memory=TRACE_MEMORY, **attrs):
+        self.name = name
+        self.memory = memory
+        self.attrs = attrs
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.seconds = None
+        self.spans = []
+        self.messages = []
+        self._t0 = time.perf_counter()
+        self._tokens = []
+        self._lock = threading.Lock()
+        self._owns_tracemalloc = False
+
+    def __enter__(self):
+        if self.memory and not self._tokens:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracemalloc = True
+        self._tokens.append((_run.set(self), _span.set(None)))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        run_token, span_token = self._tokens.pop()
+        _span.reset(span_token)
+        _run.reset(run_token)
+        if self._owns_tracemalloc and not self._tokens:
+            import tracemalloc
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        return False
+
+    def _open(self, name, attrs):
+        span = Span(name, _span.get(), time.perf_counter() - self._t0, attrs)
+        if self.memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak is reset for the new span, so open spans keep what they saw so far
+            ancestor = span.parent
+            while ancestor is not None:
+                ancestor._peak = max(ancestor._peak, peak)
+                ancestor = ancestor.parent
+            tracemalloc.reset_peak()
+            span._traced, span._peak = current, current
+        span._started = time.perf_counter()
+        return span
+
+    def _close(self, span, exc):
+        span.seconds = time.perf_counter() - span._started
+        if exc is not None:
+            span.error = f"{type(exc).__name__}: {exc}"
+        if self.memory:
+            import tracemalloc
+            peak = max(tracemalloc.get_traced_memory()[1], span._peak)
+            span.peak_mib = (peak - span._traced) / 2**20
+            if span.parent is not None:
+                span.parent._peak = max(span.parent._peak, peak)
+        with self._lock:
+            if span.parent is not None:
+                span.parent.bytes += span.bytes
+                span.parent.api_calls += span.api_calls
+            self.spans.append(span)
+
+    def finish(self):
+        """
+        Stops the run's clock and exports it. Later calls do nothing.
+        """
+        if self.seconds is not None:
+            return self
+        self.seconds = time.perf_counter() - self._t0
+        registry.observe(self.to_records())
+        if TRACE_FILE:
+            write_jsonl(self, TRACE_FILE)
+        return self
+
+    # --- VIEWS AND EXPORT ---
+    def to_records(self):
+        """
+        Returns one dict per span, in start order, then one for the run.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        records = [{
+            'type': 'span', 'run_id': self.run_id, 'run': self.name, 'stage': s.name,
+            'parent': s.parent.name if s.parent else None, 'depth': s.depth,
+            'start': round(s.start, 6), 'seconds': round(s.seconds, 6), 'rows': s.rows, 'bytes': s.bytes,
+            'api_calls': s.api_calls, 'peak_mib': None if s.peak_mib is None else round(s.peak_mib, 3),
+            'thread': s.thread, 'error': s.error, **({'attrs': s.attrs} if s.attrs else {}),
+        } for s in spans]
+        records.append({
+            'type': 'run', 'run_id': self.run_id, 'run': self.name, 'started_at': self.started_at,
+            'seconds': None if self.seconds is None else round(self.seconds, 6), 'attrs': self.attrs,
+            'messages': list(self.messages),
+        })
+        return records
+
+    def to_jsonl(self):
+        return "".join(json.dumps(record, default=str) + "\n" for record in self.to_records())
+
+    def waterfall(self):
+        """
+        Returns the spans as a pandas.DataFrame in start order: stage, depth,
+        start and seconds (from the start of the run), rows, bytes,
+        api_calls, peak_mib, thread, error and details (the span's
+        attributes, e.g. cache=memory).
+        """
+        import pandas as pd
+        columns = ['stage', 'depth', 'start', 'seconds', 'rows', 'bytes', 'api_calls', 'peak_mib', 'thread', 'error',
+                   'details']
+        spans = [{**r, 'details': ", ".join(f"{k}={v}" for k, v in r.get('attrs', {}).items())}
+                 for r in self.to_records() if r['type'] == 'span']
+        return pd.DataFrame(spans, columns=columns)
+
+def span(name, **attrs):
+    """
+    Context manager timing a stage of the active run, yielding the Span
+    (a no-op outside a run).
+    """
+    run = _run.get()
+    if run is None:
+        return _NOOP
+    return _SpanContext(run, name, attrs)
+
+def _rows(result):
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    shape = getattr(result, 'shape', None)
+    return shape[0] if shape else None
+
+def timed(name=None):
+    """
+    Decorator recording every call as a span named `name` (default: the
+    function's qualified name). A DataFrame result, or a tuple starting with
+    one, sets the span's rows.
+    """
+    def decorate(func):
+        stage = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            run = _run.get()
+            if run is None:
+                return func(*args, **kwargs)
+            with _SpanContext(run, stage, {}) as current:
+                result = func(*args, **kwargs)
+                current.rows = _rows(result)
+                return result
+        return wrapper
+    return decorate
+
+def propagate(func):
+    """
+    Wraps a function that will run in another thread so its spans and
+    counts go to the run and span active here.
+    """
+    if _run.get() is None:
+        return func
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Each call gets its own copy: one context can't be entered by two threads at once
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+def count(api_calls=0, bytes=0):
+    """
+    Adds API calls and bytes fetched to the innermost open span.
+    """
+    run = _run.get()
+    if run is None:
+        return
+    current = _span.get()
+    if current is not None:
+        with run._lock:
+            current.api_calls += api_calls
+            current.bytes += bytes
+
+def message(level, text):
+    """
+    Keeps a warning or error shown to the user with the active run.
+    """
+    run = _run.get()
+    if run is None:
+        return
+    current = _span.get()
+    with run._lock:
+        run.messages.append({'level': level, 'message': str(text), 'stage': current.name if current else None,
+                             'at': round(time.perf_counter() - run._t0, 6)})
+
+def current_run():
+    return _run.get()
+
+@contextmanager
+def record(name, memory=TRACE_MEMORY, **attrs):
+    """
+    Records a block as one run and finishes it at the end of the block.
+    """
+    run = Run(name, memory=memory, **attrs)
+    try:
+        with run:
+            yield run
+    finally:
+        run.finish()
+
+# --- EXPORT ---
+_file_lock = threading.Lock()
+
+def write_jsonl(run, path):
+    """
+    Appends a run's span and run records to a JSON lines file. Each run is
+    one write, so processes appending to the same file don't interleave.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with _file_lock, open(path, 'a', encoding='utf-8') as f:
+        f.write(run.to_jsonl())
+
+def _label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+class MetricsRegistry:
+    """
+    Totals of every finished run in this process, per stage and per run
+    kind, in Prometheus text exposition format.
+    """
+
+    STAGE_METRICS = [
+        # (metric, type, help, record field)
+        ('sentry_stage_calls_total', 'counter', "Spans recorded per stage.", None),
+        ('sentry_stage_seconds_total', 'counter', "Wall time spent in each stage.", 'seconds'),
+        ('sentry_stage_rows_total', 'counter', "Rows produced by each stage.", 'rows'),
+        ('sentry_stage_api_calls_total', 'counter', "Platform API requests made in each stage.", 'api_calls'),
+        ('sentry_stage_bytes_total', 'counter', "Response bytes fetched in each stage.", 'bytes'),
+        ('sentry_stage_errors_total', 'counter', "Stage calls that raised.", 'error'),
+    ]
+
+    def __init__(self):
+        self._stages = {}
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def observe(self, records):
+        """
+        Adds the records of a run (Run.to_records, or read back from a trace file).
+        """
+        with self._lock:
+            for record in records:
+                if record['type'] == 'span':
+                    totals = self._stages.setdefault(record['stage'], {
+                        'calls': 0, 'seconds': 0.0, 'rows': 0, 'api_calls': 0, 'bytes': 0, 'error': 0,
+                        'last_seconds': 0.0, 'peak_mib': None})
+                    totals['calls'] += 1
+                    totals['seconds'] += record['seconds']
+                    totals['rows'] += record['rows'] or 0
+                    totals['api_calls'] += record['api_calls']
+                    totals['bytes'] += record['bytes']
+                    totals['error'] += record['error'] is not None
+                    totals['last_seconds'] = record['seconds']
+                    if record.get('peak_mib') is not None:
+                        totals['peak_mib'] = max(totals['peak_mib'] or 0.0, record['peak_mib'])
+                elif record['type'] == 'run':
+                    totals = self._runs.setdefault(record['run'], {'runs': 0, 'seconds': 0.0, 'errors': 0})
+                    totals['runs'] += 1
+                    totals['seconds'] += record['seconds'] or 0.0
+                    totals['errors'] += sum(m['level'] == 'error' for m in record.get('messages', []))
+
+    def prometheus_text(self):
+        with self._lock:
+            stages = {name: dict(totals) for name, totals in self._stages.items()}
+            runs = {name: dict(totals) for name, totals in self._runs.items()}
+        lines = []
+
+        def family(metric, kind, help_text, samples):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(f'{metric}{{{label}="{_label(name)}"}} {value:g}' for label, name, value in samples)
+
+        for metric, kind, help_text, field in self.STAGE_METRICS:
+            family(metric, kind, help_text,
+                   [('stage', name, totals['calls'] if field is None else totals[field]) for name, totals in sorted(stages.items())])
+        family('sentry_stage_last_seconds', 'gauge', "Wall time of each stage's most recent call.",
+               [('stage', name, totals['last_seconds']) for name, totals in sorted(stages.items())])
+        family('sentry_stage_peak_memory_mib', 'gauge', "Largest traced peak memory of each stage, in MiB.",
+               [('stage', name, totals['peak_mib']) for name, totals in sorted(stages.items())
+                if totals['peak_mib'] is not None])
+        family('sentry_runs_total', 'counter', "Finished runs per kind.",
+               [('run', name, totals['runs']) for name, totals in sorted(runs.items())])
+        family('sentry_run_seconds_total', 'counter', "Wall time of finished runs per kind.",
+               [('run', name, totals['seconds']) for name, totals in sorted(runs.items())])
+        family('sentry_run_errors_total', 'counter', "Errors reported to the user during runs, per kind.",
+               [('run', name, totals['errors']) for name, totals in sorted(runs.items())])
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+def write_metrics(path, metrics=None):
+    """
+    Writes the registry in Prometheus text format, e.g. for node_exporter's
+    textfile collector. Written under a temporary name and renamed.
+    """
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write((metrics or registry).prometheus_text())
+    os.replace(path + '.tmp', path)
+
+def serve_metrics(port, host='127.0.0.1', metrics=None):
+    """
+    Serves the registry at http://host:port/metrics from a daemon thread.
+
+    Returns:
+        http.server.ThreadingHTTPServer: Call shutdown() to stop it.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    metrics = metrics or registry
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
@@ -0,0 +1,113 @@
+from collections import Counter, deque
+from functools import lru_cache
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of keywords.
+
+    Scanning a text walks it once, character by character, and reports every
+    keyword occurrence regardless of how many keywords the automaton holds.
+    Matching is case-insensitive; keywords are stored lowercased.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(k.strip().lower() for k in keywords if k and k.strip()))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (index,)
+
+        # Breadth-first pass to set failure links and merge suffix outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def iter_matches(self, text):
+        """
+        Yields (keyword_index, start, end) for every occurrence in the text,
+        including overlapping ones.
+        """
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self.keywords
+        state = 0
+        for position, ch in enumerate(str(text).lower()):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                end = position + 1
+                yield index, end - len(keywords[index]), end
+
+    def scan(self, text):
+        """
+        Scans a text once and returns both views the analysis needs.
+
+        Returns:
+            tuple: (set of keywords found anywhere as a substring,
+                    Counter of whole-word, non-overlapping occurrences per keyword,
+                    matching re.findall(r'\\b' + keyword + r'\\b') semantics).
+        """
+        text = str(text).lower()
+        present = set()
+        occurrences = Counter()
+        last_end = {}
+        for index, start, end in self.iter_matches(text):
+            keyword = self.keywords[index]
+            present.add(keyword)
+            if start < last_end.get(index, 0):
+                continue
+            if _at_word_boundary(text, start) and _at_word_boundary(text, end):
+                occurrences[keyword] += 1
+                last_end[index] = end
+        return present, occurrences
+
+def _at_word_boundary(text, position):
+    before = position > 0 and _is_word_char(text[position - 1])
+    after = position < len(text) and _is_word_char(text[position])
+    return before != after
+
+@lru_cache(maxsize=32)
+def _cached_automaton(keywords):
+    return KeywordAutomaton(keywords)
+
+def get_automaton(keywords):
+    """
+    Returns a compiled automaton for a keyword set, building it only the
+    first time that set is seen.
+    """
+    return _cached_automaton(tuple(keywords))
+
+def count_occurrences(texts, keywords):
+    """
+    Counts whole-word occurrences of each keyword across many texts,
+    scanning every text once.
+
+    Returns:
+        collections.Counter: Occurrences per lowercased keyword.
+    """
+    automaton = get_automaton(keywords)
+    totals = Counter()
+    for text in texts:
+        totals.update(automaton.scan(text)[1])
+    return totals
@@ -0,0 +1,286 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from itertools import chain, compress
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+# --- NEAR-DUPLICATE DETECTION ---
+# Posts are reduced to sets of word shingles, each set to a MinHash
+# signature, and signatures are bucketed band by band (LSH). Only posts that
+# share a bucket are compared, so the cost grows with the number of posts
+# rather than the number of pairs.
+
+NUM_PERM = 64
+BANDS = 16 # 16 bands of 4 rows: pairs around 0.5 Jaccard or higher become candidates
+SHINGLE_SIZE = 2
+MIN_TOKENS = 5 # Shorter posts ("jai hind") match each other by chance, not by copying
+SIMILARITY_THRESHOLD = 0.6 # Estimated Jaccard a candidate pair needs to be linked
+CHUNK_POSTS = 5_000 # Posts hashed per vectorized MinHash step, bounds peak memory
+
+_HASH_SEED = 0x5EED
+_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+_STRIP_PATTERN = re.compile(r"https?://\S+|(?<!\S)[@#]\S+")
+
+# Column names of the post id, text and account in each collector's layout
+ID_COLUMNS = ('tweet_id', 'post_id', 'video_id', 'link')
+TEXT_COLUMNS = ('tweet_text', 'text_content')
+ACCOUNT_COLUMNS = ('username', 'author', 'channel_title', 'source')
+
+def _first_column(df, candidates):
+    return next((col for col in candidates if col in df.columns), None)
+
+def _permutations(num_perm):
+    # Multiply-shift hash family; fixed seed so signatures are stable across runs and processes
+    rng = np.random.default_rng(_HASH_SEED)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+def token_hashes(text):
+    """
+    Lowercases a post, drops URLs, @mentions and #hashtags (which templated
+    posts vary per copy), and returns the CRC32 of each remaining word.
+    """
+    return list(map(zlib.crc32, (t.encode() for t in _TOKEN_PATTERN.findall(_STRIP_PATTERN.sub(' ', str(text).lower())))))
+
+def minhash_signatures(texts, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, min_tokens=MIN_TOKENS):
+    """
+    Computes MinHash signatures of the word shingles of each text.
+
+    Returns:
+        tuple: (uint32 array of shape (len(texts), num_perm),
+                bool array marking texts with at least min_tokens words).
+                Rows of texts that are too short are all 0xFFFFFFFF.
+    """
+    min_tokens = max(min_tokens, shingle_size) # Every kept post needs at least one shingle
+    a, b = _permutations(num_perm)
+    signatures = np.full((len(texts), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    valid = np.zeros(len(texts), dtype=bool)
+
+    for start in range(0, len(texts), CHUNK_POSTS):
+        token_lists = [token_hashes(text) for text in texts[start:start + CHUNK_POSTS]]
+        lengths = np.fromiter((len(t) for t in token_lists), dtype=np.int64, count=len(token_lists))
+        keep = lengths >= min_tokens
+        valid[start:start + len(token_lists)] = keep
+        if not keep.any():
+            continue
+
+        # Shingle hashes in one flat array: shingle i of a post combines tokens i..i+k-1
+        counts = lengths[keep]
+        tokens = np.fromiter(chain.from_iterable(compress(token_lists, keep)), dtype=np.uint64, count=counts.sum())
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        shingle_counts = counts - shingle_size + 1
+        position = np.arange(len(tokens)) - np.repeat(offsets, counts)
+        starts = np.flatnonzero(position < np.repeat(shingle_counts, counts))
+        shingles = np.zeros(len(starts), dtype=np.uint64)
+        for offset in range(shingle_size):
+            shingles = shingles * np.uint64(0x9E3779B1) + tokens[starts + offset]
+        shingles &= np.uint64(0xFFFFFFFF)
+
+        # Minimum of each permutation over each post's shingles; permutations
+        # are rows so the reduction runs along contiguous memory
+        hashed = ((a[:, None] * shingles[None, :] + b[:, None]) >> np.uint64(32)).astype(np.uint32)
+        segment_starts = np.concatenate(([0], np.cumsum(shingle_counts)[:-1]))
+        rows = start + np.flatnonzero(keep)
+        signatures[rows] = np.minimum.reduceat(hashed, segment_starts, axis=1).T
+    return signatures, valid
+
+def lsh_clusters(signatures, valid, bands=BANDS, threshold=SIMILARITY_THRESHOLD):
+    """
+    Groups near-duplicate signatures with LSH banding.
+
+    In each band, signatures whose rows in that band are identical share a
+    bucket. Every bucket member is compared against the bucket's first
+    member only, and linked to it when their estimated Jaccard similarity
+    reaches the threshold. Connected components of the links are the clusters.
+
+    Returns:
+        numpy.ndarray: A component label per signature.
+    """
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    n, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f"Signature length {num_perm} is not a multiple of {bands} bands")
+    rows = num_perm // bands
+    indices = np.flatnonzero(valid)
+    if len(indices) < 2:
+        return np.arange(n)
+    multipliers = np.random.default_rng(_HASH_SEED + 1).integers(1, 2**63, size=rows, dtype=np.uint64) | np.uint64(1)
+    sources, targets = [], []
+
+    for band in range(bands):
+        block = signatures[indices, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (block * multipliers).sum(axis=1) # Wraps mod 2**64, which is fine for bucketing
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        new_bucket = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        bucket_first = order[np.maximum.accumulate(np.where(new_bucket, np.arange(len(order)), 0))]
+
+        members = order[~new_bucket]
+        if not len(members):
+            continue
+        representatives = bucket_first[~new_bucket]
+        similarity = (signatures[indices[members]] == signatures[indices[representatives]]).mean(axis=1)
+        linked = similarity >= threshold
+        sources.append(indices[members[linked]])
+        targets.append(indices[representatives[linked]])
+
+    if sources:
+        sources, targets = np.concatenate(sources), np.concatenate(targets)
+    else:
+        sources = targets = np.array([], dtype=np.int64)
+    graph = sparse.coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n, n))
+    return connected_components(graph, directed=False)[1]
+
+class SignatureCache:
+    """
+    Size-bounded LRU of MinHash signatures keyed by post id, so re-running
+    detection over a growing dataset only hashes posts it hasn't seen.
+
+    A cached signature is reused only while the post's text is unchanged
+    (edited Reddit posts are hashed again).
+    """
+
+    def __init__(self, max_items=1_000_000, num_perm=NUM_PERM):
+        self.max_items = max_items
+        self.num_perm = num_perm
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def signatures(self, ids, texts, shingle_size=SHINGLE_SIZE, min_tokens=MIN_TOKENS):
+        """
+        Returns (signatures, valid) like minhash_signatures, computing only
+        the posts that aren't cached.
+        """
+        text_hashes = [zlib.crc32(str(t).encode()) for t in texts]
+        keys = [f"{shingle_size}:{min_tokens}:{i}" for i in ids]
+        signatures = np.empty((len(ids), self.num_perm), dtype=np.uint32)
+        valid = np.zeros(len(ids), dtype=bool)
+
+        missing = []
+        with self._lock:
+            for row, (key, text_hash) in enumerate(zip(keys, text_hashes)):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == text_hash:
+                    self._entries.move_to_end(key)
+                    signatures[row] = np.frombuffer(entry[2], dtype=np.uint32)
+                    valid[row] = entry[1]
+                else:
+                    missing.append(row)
+            self.hits += len(ids) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed, computed_valid = minhash_signatures(
+                [texts[row] for row in missing], num_perm=self.num_perm,
+                shingle_size=shingle_size, min_tokens=min_tokens
+            )
+            signatures[missing] = computed
+            valid[missing] = computed_valid
+            with self._lock:
+                for row, signature, is_valid in zip(missing, computed, computed_valid):
+                    self._entries[keys[row]] = (text_hashes[row], bool(is_valid), signature.tobytes())
+                    self._entries.move_to_end(keys[row])
+                while len(self._entries) > self.max_items:
+                    self._entries.popitem(last=False)
+        return signatures, valid
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'items': len(self._entries)}
+
+@timed('analysis.near_duplicates')
+def find_near_duplicates(df, threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM, bands=BANDS,
+                         shingle_size=SHINGLE_SIZE, min_tokens=MIN_TOKENS, cache=None):
+    """
+    Clusters copy-pasted and lightly edited posts, the strongest sign of a
+    coordinated campaign.
+
+    Returns a copy of df with three columns added; df itself is left as it
+    is, since it may be a cached artifact:
+        dup_cluster_id: Cluster of near-identical posts, numbered from 0 by
+            size (largest first); -1 for posts with no near duplicate.
+        dup_cluster_size: Number of posts in the cluster (1 if none).
+        dup_cluster_accounts: Distinct accounts that posted in the cluster.
+
+    Args:
+        df (pandas.DataFrame): Posts in any collector's layout.
+        threshold (float): Estimated Jaccard similarity of word shingles
+            needed to link two posts.
+        num_perm (int): MinHash signature length; must be a multiple of bands.
+        bands (int): LSH bands. More bands find less similar pairs.
+        shingle_size (int): Words per shingle.
+        min_tokens (int): Posts with fewer words are never clustered.
+        cache (SignatureCache): Reuses signatures of posts seen before,
+            looked up by the post id column.
+    """
+    text_column = _first_column(df, TEXT_COLUMNS)
+    if text_column is None or df.empty:
+        return df.assign(dup_cluster_id=-1, dup_cluster_size=1, dup_cluster_accounts=1)
+
+    texts = df[text_column].fillna('').astype(str).tolist()
+    id_column = _first_column(df, ID_COLUMNS)
+    if cache is not None and id_column is not None and cache.num_perm == num_perm:
+        signatures, valid = cache.signatures(df[id_column].astype(str).tolist(), texts,
+                                             shingle_size=shingle_size, min_tokens=min_tokens)
+    else:
+        signatures, valid = minhash_signatures(texts, num_perm=num_perm, shingle_size=shingle_size, min_tokens=min_tokens)
+
+    labels = lsh_clusters(signatures, valid, bands=bands, threshold=threshold)
+    sizes = np.bincount(labels)
+    clustered = sizes[labels] > 1
+
+    # Renumber clustered components 0..k-1 by size, largest first
+    cluster_ids = np.full(len(df), -1, dtype=np.int64)
+    if clustered.any():
+        components, counts = np.unique(labels[clustered], return_counts=True)
+        rank = np.empty(labels.max() + 1, dtype=np.int64)
+        rank[components[np.lexsort((components, -counts))]] = np.arange(len(components))
+        cluster_ids[clustered] = rank[labels[clustered]]
+
+    cluster_accounts = 1
+    account_column = _first_column(df, ACCOUNT_COLUMNS)
+    if account_column is not None and clustered.any():
+        accounts = df.loc[clustered, account_column].groupby(cluster_ids[clustered], observed=True).nunique()
+        cluster_accounts = pd.Series(cluster_ids).map(accounts).fillna(1).astype(np.int64).to_numpy()
+    return df.assign(dup_cluster_id=cluster_ids, dup_cluster_size=np.where(clustered, sizes[labels], 1),
+                     dup_cluster_accounts=cluster_accounts)
+
+def duplicate_clusters(df, max_accounts=20):
+    """
+    Summarizes the clusters found by find_near_duplicates, one row per
+    cluster, largest first: its size, how many accounts posted it, which
+    ones (up to max_accounts), a sample post and when it was first and
+    last posted.
+    """
+    columns = ['dup_cluster_id', 'posts', 'accounts', 'account_list', 'sample_text', 'first_seen', 'last_seen']
+    if 'dup_cluster_id' not in df.columns:
+        return pd.DataFrame(columns=columns)
+    clustered = df[df['dup_cluster_id'] >= 0]
+    if clustered.empty:
+        return pd.DataFrame(columns=columns)
+
+    text_column = _first_column(df, TEXT_COLUMNS)
+    account_column = _first_column(df, ACCOUNT_COLUMNS)
+    date_column = next((col for col in ('tweet_created_at', 'created_at', 'published_at') if col in df.columns), None)
+    groups = clustered.groupby('dup_cluster_id', sort=True)
+
+    summary = pd.DataFrame({'posts': groups.size()})
+    if account_column:
+        summary['accounts'] = groups[account_column].nunique()
+        summary['account_list'] = groups[account_column].agg(
+            lambda accounts: ", ".join(map(str, accounts.astype(str).value_counts().index[:max_accounts])))
+    summary['sample_text'] = groups[text_column].first()
+    if date_column:
+        dates = pd.to_datetime(clustered[date_column], errors='coerce', utc=True, format='mixed')
+        summary['first_seen'] = dates.groupby(clustered['dup_cluster_id']).min()
+        summary['last_seen'] = dates.groupby(clustered['dup_cluster_id']).max()
+    return summary.reset_index().reindex(columns=[c for c in columns if c in summary.columns or c == 'dup_cluster_id'])
@@ -0,0 +1,33 @@
+import logging
+import sys
+
+import instrumentation
+
+logger = logging.getLogger('sentry')
+
+def _streamlit():
+    """
+    Returns the streamlit module when running inside a Streamlit app, so
+    messages reach the page; elsewhere (CLI jobs, worker processes) they go
+    to the 'sentry' logger and Streamlit is never imported.
+    """
+    st = sys.modules.get('streamlit')
+    if st is not None and st.runtime.exists():
+        return st
+    return None
+
+def warning(message):
+    instrumentation.message('warning', message) # Kept with the scan's timings, if one is being recorded
+    st = _streamlit()
+    if st:
+        st.warning(message)
+    else:
+        logger.warning(message)
+
+def error(message):
+    instrumentation.message('error', message)
+    st = _streamlit()
+    if st:
+        st.error(message)
+    else:
+        logger.error(message)
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from burst import DATE_COLUMNS
+from instrumentation import span
+
+# --- SERVER-SIDE QUERIES OVER ANALYZED FRAMES ---
+# The Raw Data and influencer tables used to send whole frames to the
+# browser on every rerun. A FrameQuery filters, sorts and pages a frame on
+# the server instead, so only the requested page is serialized.
+#
+# Each sort order is an argsort computed once per column and kept. A filter
+# combination is resolved once into the matching row positions in sort
+# order; every page of it is then a slice of those positions, so a page of
+# a million-row frame costs the same as a page of a thousand-row one.
+
+SEARCH_COLUMNS = ('tweet_text', 'text_content', 'title', 'headline')
+MAX_SELECTIONS = 16 # Filter and sort combinations kept per frame
+
+class FrameQuery:
+    """
+    Filters, sorts and pages one frame; the frame must not change afterwards.
+
+    Args:
+        df (pandas.DataFrame): Frame to query, not copied.
+        search_columns (list): Columns matched by a search, defaults to
+            those of SEARCH_COLUMNS present.
+        date_column (str): Column filtered by start/end, defaults to the
+            first of burst.DATE_COLUMNS present.
+    """
+
+    def __init__(self, df, search_columns=None, date_column=None):
+        self.df = df
+        self.search_columns = [col for col in (search_columns or SEARCH_COLUMNS) if col in df.columns]
+        self.date_column = date_column or next((col for col in DATE_COLUMNS if col in df.columns), None)
+        self._orders = {} # (column, descending) -> row positions
+        self._factorized = {} # column -> (codes, lowercased distinct values, distinct values)
+        self._lowered = {} # Search column -> lowercased text
+        self._dates = None
+        self._selections = OrderedDict()
+
+    def __len__(self):
+        return len(self.df)
+
+    def options(self, column):
+        """
+        Returns the distinct values of a column, sorted, for filter choices.
+        """
+        if column not in self.df.columns:
+            return []
+        return sorted(str(value) for value in self._factorize(column)[2])
+
+    def dates(self):
+        """
+        Returns the date column as UTC timestamps (NaT where unparseable), or None.
+        """
+        if self._dates is None and self.date_column:
+            self._dates = pd.to_datetime(self.df[self.date_column], errors='coerce', utc=True, format='mixed')
+        return self._dates
+
+    def sort_order(self, column, descending=True):
+        """
+        Returns the row positions of the frame sorted by a column, ties in
+        frame order and missing values last.
+        """
+        key = (column, descending)
+        if key not in self._orders:
+            with span('query.sort_index', column=column):
+                values = self._sort_values(column)
+                self._orders[key] = np.argsort(-values if descending else values, kind='stable')
+        return self._orders[key]
+
+    def select(self, sort_by=None, descending=True, equals=None, search=None, start=None, end=None):
+        """
+        Returns the row positions matching every filter, in sort order.
+
+        Args:
+            sort_by (str): Column to sort by, or None for frame order.
+            descending (bool): Sort direction.
+            equals (dict): Column -> value or list of values to keep,
+                compared case-insensitively as strings. Empty entries are ignored.
+            search (str): Case-insensitive substring of any search column.
+            start, end (pandas.Timestamp): Keep posts dated at or after
+                start and before end (UTC).
+        """
+        equals = tuple(sorted((column, tuple(sorted(str(v).lower() for v in _as_list(values))))
+                              for column, values in (equals or {}).items() if _as_list(values)))
+        search = (search or '').strip().lower()
+        start, end = _utc(start), _utc(end)
+        key = (sort_by, descending, equals, search, start, end)
+        if key in self._selections:
+            self._selections.move_to_end(key)
+            return self._selections[key]
+
+        with span('query.select') as current:
+            mask = None
+            for column, values in equals:
+                mask = _both(mask, self._equals_mask(column, values))
+            if search and self.search_columns:
+                mask = _both(mask, self._search_mask(search))
+            if (start is not None or end is not None) and self.dates() is not None:
+                dates = self.dates()
+                in_range = dates.notna().to_numpy(dtype=bool, copy=True)
+                if start is not None:
+                    in_range &= (dates >= start).to_numpy()
+                if end is not None:
+                    in_range &= (dates < end).to_numpy()
+                mask = _both(mask, in_range)
+
+            if sort_by:
+                order = self.sort_order(sort_by, descending)
+                positions = order if mask is None else order[mask[order]]
+            else:
+                positions = np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+            current.rows = len(positions)
+
+        self._selections[key] = positions
+        while len(self._selections) > MAX_SELECTIONS:
+            self._selections.popitem(last=False)
+        return positions
+
+    def page(self, page=0, page_size=50, columns=None, **query):
+        """
+        Returns one page of the rows a select() with `query` matches.
+
+        Returns:
+            tuple: (page frame with the original index, number of matching rows).
+        """
+        positions = self.select(**query)
+        frame = self.df.iloc[positions[page * page_size:(page + 1) * page_size]]
+        if columns:
+            frame = frame[[col for col in columns if col in frame.columns]]
+        return frame, len(positions)
+
+    def _sort_values(self, column):
+        """
+        Returns a float per row that orders like the column, NaN where missing.
+        """
+        if column == self.date_column:
+            dates = self.dates()
+            return np.where(dates.isna(), np.nan, dates.to_numpy(dtype='datetime64[ns]').astype('int64').astype(float))
+        series = self.df[column]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            return series.to_numpy(dtype=float, na_value=np.nan)
+        try:
+            codes, _ = pd.factorize(series, sort=True)
+        except TypeError: # Mixed types that don't compare
+            codes, _ = pd.factorize(series.astype(str), sort=True)
+        return np.where(codes < 0, np.nan, codes.astype(float))
+
+    def _factorize(self, column):
+        if column not in self._factorized:
+            codes, uniques = pd.factorize(self.df[column])
+            lowered = np.array([str(value).lower() for value in uniques], dtype=object)
+            self._factorized[column] = (codes, lowered, uniques)
+        return self._factorized[column]
+
+    def _equals_mask(self, column, values):
+        if column not in self.df.columns:
+            return np.zeros(len(self.df), dtype=bool)
+        codes, lowered, _ = self._factorize(column)
+        # One flag per distinct value, plus a False at -1 for missing values
+        wanted = np.append(np.isin(lowered, values), False)
+        return wanted[codes]
+
+    def _search_mask(self, search):
+        mask = np.zeros(len(self.df), dtype=bool)
+        for column in self.search_columns:
+            if column not in self._lowered:
+                self._lowered[column] = self.df[column].astype('string').str.lower()
+            mask |= self._lowered[column].str.contains(search, regex=False).fillna(False).to_numpy(dtype=bool)
+        return mask
+
+def _as_list(values):
+    if values is None or (isinstance(values, str) and not values.strip()):
+        return []
+    return list(values) if isinstance(values, (list, tuple, set)) else [values]
+
+def _utc(value):
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tzinfo is None else value.tz_convert('UTC')
+
+def _both(mask, other):
+    return other if mask is None else mask & other
@@ -0,0 +1,288 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+# --- SHARED RATE-LIMIT SCHEDULER ---
+# One token bucket per platform, shared by every client, session and worker
+# process using the same credentials. Capacity is reserved before each API
+# call (transport.py does this for all collectors), and a call the bucket
+# can't cover raises RateLimited at once with the time to resume, instead of
+# sleeping. Collectors stop there and return what they have.
+#
+# Buckets refill continuously from the quota tables below and are pulled
+# down to what the platforms report in their rate-limit headers. Once a
+# platform has said when its window resets, the bucket waits for that reset
+# instead of refilling. The YouTube quota is a daily one: it refills in full
+# at midnight UTC and is the only YouTube budget (youtube_ingest.py). Their
+# state is kept in a small JSON file under an exclusive file lock, so
+# Streamlit sessions, batch workers and the Reddit stream draw on one
+# budget. SENTRY_RATE_STATE moves the file; set it empty to keep the state
+# in this process only.
+
+DEFAULT_STATE_PATH = os.path.join('data', 'rate_limits.json')
+
+# Platform -> (requests or quota units, per this many seconds)
+DEFAULT_LIMITS = {
+    'twitter': (450, 900), # Recent search, app auth: 450 requests per 15 minutes
+    'reddit': (100, 60), # OAuth clients: 100 queries per minute
+    # Data API default quota: 10,000 units per day; SENTRY_YOUTUBE_QUOTA sets another
+    'youtube': (int(os.environ.get('SENTRY_YOUTUBE_QUOTA', 10_000)), 86_400),
+    'news': (30, 60), # No published limit; stays polite to the RSS endpoint
+}
+PLATFORM_NAMES = {'twitter': "Twitter", 'reddit': "Reddit", 'youtube': "YouTube", 'news': "Google News"}
+
+# Request host -> platform bucket it draws on. Reddit's token endpoint isn't rate limited.
+PLATFORM_HOSTS = {
+    'api.twitter.com': 'twitter',
+    'oauth.reddit.com': 'reddit',
+    'youtube.googleapis.com': 'youtube',
+    'www.googleapis.com': 'youtube',
+    'news.google.com': 'news',
+}
+# Platforms whose quota refills in full at midnight UTC instead of continuously
+DAILY_QUOTAS = {'youtube'}
+# Quota units of each YouTube Data API endpoint, by the last part of its URL path
+YOUTUBE_QUOTA_COSTS = {'search': 100, 'videos': 1, 'commentThreads': 1}
+# Reasons in a YouTube 403 body that mean the day's quota is spent
+YOUTUBE_QUOTA_REASONS = (b'quotaExceeded', b'dailyLimitExceeded')
+# PRAW paces itself (by sleeping) on these headers; they are taken off its responses once observed here
+REDDIT_HEADERS = ('x-ratelimit-remaining', 'x-ratelimit-used', 'x-ratelimit-reset')
+DEFAULT_BLOCK_SECONDS = 60 # Wait after a 429 that doesn't say how long
+
+class RateLimited(Exception):
+    """
+    Raised instead of waiting when a platform's budget can't cover a call.
+
+    Attributes:
+        platform (str): Bucket that ran out, e.g. 'twitter'.
+        resume_at (float): Epoch seconds when the call would be allowed.
+    """
+
+    def __init__(self, platform, resume_at):
+        self.platform = platform
+        self.resume_at = resume_at
+        super().__init__(f"{PLATFORM_NAMES.get(platform, platform)} rate limit reached; "
+                         f"resume at {format_resume_at(resume_at)}")
+
+def format_resume_at(resume_at):
+    return datetime.fromtimestamp(resume_at, timezone.utc).strftime('%H:%M:%S UTC')
+
+def next_utc_midnight(now):
+    day = datetime.fromtimestamp(now, timezone.utc).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+@contextmanager
+def _exclusive(f):
+    try:
+        import fcntl
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+    except ImportError: # Windows
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class Scheduler:
+    """
+    Token buckets per platform, optionally shared through a state file.
+
+    Args:
+        limits (dict): Platform -> (capacity, window seconds), defaults to
+            DEFAULT_LIMITS. Platforms without an entry are never limited.
+        state_path (str): JSON file holding the buckets for every process,
+            or None to keep them in this process only.
+    """
+
+    def __init__(self, limits=None, state_path=DEFAULT_STATE_PATH):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.state_path = state_path
+        self._state = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _buckets(self):
+        """
+        Yields the bucket state for a read-modify-write, locked against
+        other threads and (with a state file) other processes.
+        """
+        with self._lock:
+            if not self.state_path:
+                yield self._state
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            with open(self.state_path, 'a+', encoding='utf-8') as f, _exclusive(f):
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    state = {} # A torn or foreign file only costs the current estimates
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush() # Before the lock is released
+
+    def _bucket(self, state, platform, now):
+        capacity, window = self.limits[platform]
+        bucket = state.get(platform) or {'tokens': capacity, 'updated': now, 'blocked_until': 0}
+        reset_at = bucket.get('reset_at', 0)
+        if reset_at and now >= reset_at:
+            bucket['tokens'], reset_at = capacity, 0 # The platform's window started over
+        if platform in DAILY_QUOTAS and not reset_at:
+            reset_at = next_utc_midnight(now)
+        if not reset_at:
+            bucket['tokens'] = min(capacity, bucket['tokens'] + max(0.0, now - bucket['updated']) * capacity / window)
+        bucket['reset_at'] = reset_at # While set, the bucket waits for it instead of refilling
+        bucket['updated'] = now
+        state[platform] = bucket
+        return bucket
+
+    def _resume_at(self, platform, bucket, cost, now):
+        """
+        Epoch seconds when a bucket will cover `cost`, or None if it can now.
+        """
+        if now < bucket['blocked_until']:
+            return bucket['blocked_until']
+        if bucket['tokens'] >= cost:
+            return None
+        if bucket['reset_at']:
+            return bucket['reset_at']
+        capacity, window = self.limits[platform]
+        return now + (cost - bucket['tokens']) * window / capacity
+
+    def try_acquire(self, platform, cost=1):
+        """
+        Takes `cost` tokens from a platform's bucket if it has them.
+
+        Returns:
+            tuple: (True, None) when reserved, else (False, epoch seconds
+            when the bucket will cover the call).
+        """
+        if platform not in self.limits:
+            return True, None
+        now = time.time()
+        with self._buckets() as state:
+            bucket = self._bucket(state, platform, now)
+            resume_at = self._resume_at(platform, bucket, cost, now)
+            if resume_at is None:
+                bucket['tokens'] -= cost
+                return True, None
+            return False, resume_at
+
+    def acquire(self, platform, cost=1):
+        """
+        Like try_acquire, but raises RateLimited when the call can't be covered.
+        """
+        allowed, resume_at = self.try_acquire(platform, cost)
+        if not allowed:
+            raise RateLimited(platform, resume_at)
+
+    def observe(self, platform, remaining=None, reset_at=None):
+        """
+        Aligns a bucket with what the platform reported: never more tokens
+        than `remaining`, no refill before `reset_at`, and none at all until
+        then once `remaining` is 0.
+        """
+        if platform not in self.limits:
+            return
+        now = time.time()
+        with self._buckets() as state:
+            bucket = self._bucket(state, platform, now)
+            if reset_at and reset_at > now:
+                bucket['reset_at'] = reset_at
+            if remaining is not None:
+                bucket['tokens'] = min(bucket['tokens'], max(0.0, remaining))
+                if remaining <= 0:
+                    bucket['blocked_until'] = max(bucket['blocked_until'], reset_at or now + DEFAULT_BLOCK_SECONDS)
+
+    def status(self):
+        """
+        Returns platform -> {'available', 'capacity', 'resume_at'} for every
+        limited platform; resume_at is None while a call can be made.
+        """
+        now = time.time()
+        with self._buckets() as state:
+            buckets = {platform: dict(self._bucket(state, platform, now)) for platform in self.limits}
+        status = {}
+        for platform, bucket in buckets.items():
+            resume_at = self._resume_at(platform, bucket, 1, now)
+            status[platform] = {'available': int(bucket['tokens']) if resume_at is None else 0,
+                                'capacity': self.limits[platform][0], 'resume_at': resume_at}
+        return status
+
+    def resume_at(self, platform):
+        return self.status().get(platform, {}).get('resume_at')
+
+_scheduler = Scheduler(state_path=os.environ.get('SENTRY_RATE_STATE', DEFAULT_STATE_PATH) or None)
+
+def get_scheduler():
+    return _scheduler
+
+def configure(limits=None, state_path=DEFAULT_STATE_PATH):
+    """
+    Replaces the process's scheduler, e.g. with an in-process one for tests.
+    """
+    global _scheduler
+    _scheduler = Scheduler(limits=limits, state_path=state_path)
+    return _scheduler
+
+# --- REQUEST HOOKS (called by transport.py) ---
+def _platform_and_cost(url):
+    parts = urlsplit(url)
+    platform = PLATFORM_HOSTS.get(parts.hostname)
+    if platform == 'news' and parts.path.rstrip('/') != '/rss/search':
+        return None, 0 # Article links (/rss/articles/...) aren't feed requests
+    if platform == 'youtube':
+        return platform, YOUTUBE_QUOTA_COSTS.get(parts.path.rstrip('/').rsplit('/', 1)[-1], 1)
+    return platform, 1
+
+def reserve(url):
+    """
+    Reserves capacity for a request to a platform URL.
+
+    Raises:
+        RateLimited: The platform's budget can't cover the request now.
+    """
+    platform, cost = _platform_and_cost(url)
+    if platform:
+        _scheduler.acquire(platform, cost)
+
+def observe_response(url, status, headers, body=None):
+    """
+    Feeds a response's rate-limit headers (or its 429, or YouTube's 403
+    quotaExceeded, found in `body`) back into the platform's bucket.
+    Reddit's headers are removed afterwards, so PRAW doesn't sleep on them
+    as well.
+    """
+    platform, _ = _platform_and_cost(url)
+    if not platform:
+        return
+    remaining = reset_at = None
+    if platform == 'twitter' and 'x-rate-limit-remaining' in headers:
+        remaining = int(headers['x-rate-limit-remaining'])
+        reset_at = float(headers.get('x-rate-limit-reset') or 0) or None
+    elif platform == 'reddit' and 'x-ratelimit-remaining' in headers:
+        remaining = float(headers['x-ratelimit-remaining'])
+        reset_at = time.time() + float(headers.get('x-ratelimit-reset') or 0)
+        for name in REDDIT_HEADERS:
+            headers.pop(name, None)
+    if status == 429:
+        remaining = 0
+        if not reset_at and headers.get('retry-after', '').isdigit():
+            reset_at = time.time() + int(headers['retry-after'])
+    elif platform == 'youtube' and status == 403 and body and any(r in body for r in YOUTUBE_QUOTA_REASONS):
+        remaining, reset_at = 0, next_utc_midnight(time.time())
+    if remaining is not None:
+        _scheduler.observe(platform, remaining=remaining, reset_at=reset_at)
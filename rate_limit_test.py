@@ -0,0 +1,62 @@
+import pytest
+
+import rate_limit
+from rate_limit import Scheduler, next_utc_midnight
+
+START = 1_700_000_000.0 # 2023-11-14 22:13:20 UTC
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Frozen time.time for the scheduler; advance it by assigning clock.now.
+    """
+    class Clock:
+        now = START
+    monkeypatch.setattr(rate_limit.time, 'time', lambda: Clock.now)
+    # An in-process scheduler behind reserve() and observe_response()
+    monkeypatch.setattr(rate_limit, '_scheduler', Scheduler(state_path=None))
+    return Clock
+
+def test_no_refill_before_reported_reset(clock):
+    scheduler = Scheduler(state_path=None)
+    scheduler.observe('twitter', remaining=2, reset_at=START + 600)
+    clock.now += 60
+    assert scheduler.status()['twitter']['available'] == 2
+    assert scheduler.try_acquire('twitter') == (True, None)
+    assert scheduler.try_acquire('twitter') == (True, None)
+    assert scheduler.try_acquire('twitter') == (False, START + 600)
+
+    clock.now = START + 600
+    assert scheduler.status()['twitter']['available'] == 450
+    assert scheduler.try_acquire('twitter') == (True, None)
+
+def test_reddit_headers_hold_the_bucket_until_reset(clock):
+    url = 'https://oauth.reddit.com/r/all/search'
+    rate_limit.observe_response(url, 200, {'x-ratelimit-remaining': '1', 'x-ratelimit-reset': '30'})
+    clock.now += 20
+    rate_limit.reserve(url)
+    with pytest.raises(rate_limit.RateLimited) as limited:
+        rate_limit.reserve(url)
+    assert limited.value.resume_at == START + 30
+    clock.now = START + 30
+    rate_limit.reserve(url)
+
+def test_youtube_quota_resets_at_utc_midnight(clock):
+    scheduler = Scheduler(state_path=None)
+    for _ in range(100):
+        assert scheduler.try_acquire('youtube', 100)[0]
+    clock.now += 15 * 60
+    assert scheduler.try_acquire('youtube', 100) == (False, next_utc_midnight(START))
+
+    clock.now = next_utc_midnight(START)
+    assert scheduler.try_acquire('youtube', 100) == (True, None)
+    assert scheduler.status()['youtube']['available'] == 9_900
+
+def test_youtube_quota_exceeded_blocks_until_midnight(clock):
+    url = 'https://youtube.googleapis.com/youtube/v3/videos?id=x'
+    rate_limit.observe_response(url, 403, {}, b'{"error": {"errors": [{"reason": "commentsDisabled"}]}}')
+    rate_limit.reserve(url)
+    rate_limit.observe_response(url, 403, {}, b'{"error": {"errors": [{"reason": "quotaExceeded"}]}}')
+    with pytest.raises(rate_limit.RateLimited) as limited:
+        rate_limit.reserve(url)
+    assert limited.value.resume_at == next_utc_midnight(START)
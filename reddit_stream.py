@@ -0,0 +1,300 @@
+"""
+Continuous Reddit ingestion: PRAW submission and comment streams, filtered
+against the keyword set, feeding micro-batch analysis through a bounded queue.
+
+    python reddit_stream.py --subreddit worldnews --keywords "boycott india, free kashmir" [--store]
+"""
+import argparse
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+import notify
+from analysis import analyze_narrative_sentiment
+from clients import get_client
+from keyword_matcher import get_automaton
+from rate_limit import RateLimited, get_scheduler
+from schema import compact_frame
+
+_STOP = object()
+IDLE_POLL_SECONDS = 0.5 # Shortest wait after a poll that found nothing new
+STREAM_BUDGET_SHARE = 0.5 # Share of the Reddit rate limit the streams' idle polls may use together
+RECENT_IDS = 10_000 # Post ids remembered per stream, to skip repeats when it is re-opened
+
+def submission_record(post):
+    """
+    Normalizes a PRAW submission into the Reddit collector's record layout.
+    """
+    return {
+        'post_id': post.id, 'title': post.title, 'author': post.author.name if post.author else '[deleted]',
+        'score': post.score, 'num_comments': post.num_comments, 'url': post.url,
+        'created_at': datetime.fromtimestamp(post.created_utc, timezone.utc),
+        'text_content': post.title + " " + post.selftext,
+        'engagement': post.score + post.num_comments, 'kind': 'submission',
+    }
+
+def comment_record(comment):
+    """
+    Normalizes a PRAW comment into the Reddit collector's record layout.
+    """
+    return {
+        'post_id': comment.id, 'title': '', 'author': comment.author.name if comment.author else '[deleted]',
+        'score': comment.score, 'num_comments': 0, 'url': f"https://www.reddit.com{comment.permalink}",
+        'created_at': datetime.fromtimestamp(comment.created_utc, timezone.utc),
+        'text_content': comment.body,
+        'engagement': comment.score, 'kind': 'comment',
+    }
+
+class RedditStreamIngestor:
+    """
+    Long-running ingestion of new Reddit submissions and comments.
+
+    Producer threads read PRAW's submission and comment streams and put the
+    posts that match a keyword into a bounded queue. When the queue is full
+    they block, so a slow consumer slows down reading instead of growing
+    memory. A consumer thread drains the queue in micro-batches, closed by
+    count (batch_size) or by age (batch_seconds). Each batch runs through
+    `process` (narrative sentiment by default) and is appended to results
+    (unless keep_results is False) and handed to on_batch.
+    """
+
+    def __init__(self, keywords, subreddit='all', reddit=None, include_comments=True,
+                 batch_size=100, batch_seconds=5.0, queue_size=1000, process=None, on_batch=None,
+                 keep_results=True):
+        self.keywords = [k.strip() for k in keywords if k and k.strip()]
+        self.subreddit = subreddit
+        self.reddit = reddit
+        self.include_comments = include_comments
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.process = process or (lambda df: analyze_narrative_sentiment(df, keywords=self.keywords))
+        self.on_batch = on_batch
+        self.keep_results = keep_results
+        self.results = []
+
+        self._automaton = get_automaton(self.keywords)
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._poll_seconds = IDLE_POLL_SECONDS
+        self._seen = 0
+        self._matched = 0
+        self._processed = 0
+        self._batches = 0
+        self._latencies = deque(maxlen=10_000) # Recent posts only, so memory stays flat
+
+    # --- LIFECYCLE ---
+    def start(self):
+        reddit = self.reddit or get_client('reddit')
+        if not reddit:
+            notify.warning("Reddit client is not available due to initialization error.")
+            return False
+        stream = reddit.subreddit(self.subreddit).stream
+        sources = [('submission', stream.submissions, submission_record)]
+        if self.include_comments:
+            sources.append(('comment', stream.comments, comment_record))
+
+        # Each idle poll is one API call; spaced so the streams leave the rest
+        # of the budget to scans sharing it
+        capacity, window = get_scheduler().limits.get('reddit', (0, 0))
+        if capacity:
+            self._poll_seconds = max(IDLE_POLL_SECONDS, len(sources) * window / (capacity * STREAM_BUDGET_SHARE))
+
+        self._started_at = time.monotonic()
+        self._threads = [
+            threading.Thread(target=self._produce, args=(read, normalize), name=f"reddit-{kind}", daemon=True)
+            for kind, read, normalize in sources
+        ]
+        self._threads.append(threading.Thread(target=self._consume, name="reddit-batches", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self, timeout=10):
+        """
+        Stops reading the streams, processes whatever is still queued, and
+        waits for the threads to finish.
+        """
+        self._stop.set()
+        for thread in self._threads[:-1]:
+            thread.join(timeout)
+        self.queue.put(_STOP)
+        if self._threads:
+            self._threads[-1].join(timeout)
+
+    def results_df(self):
+        with self._lock:
+            return compact_frame(pd.concat(self.results, ignore_index=True)) if self.results else pd.DataFrame()
+
+    # --- PRODUCER / CONSUMER ---
+    def _produce(self, read, normalize):
+        recent = deque(maxlen=RECENT_IDS)
+        seen = set()
+        skip_existing = True
+        while not self._stop.is_set():
+            try:
+                self._read(read(skip_existing=skip_existing, pause_after=0), normalize, recent, seen)
+                return
+            except Exception as e:
+                # prawcore wraps transport errors, a RateLimited from the scheduler included
+                limited = getattr(e, 'original_exception', e)
+                if not isinstance(limited, RateLimited):
+                    notify.error(f"Reddit stream stopped: {e}")
+                    return
+                notify.warning(f"{limited}. The Reddit stream resumes then.")
+                self._stop.wait(max(0.0, limited.resume_at - time.time()))
+                # Re-opened with the latest posts, so those from the pause aren't lost; repeats are skipped
+                skip_existing = False
+
+    def _read(self, items, normalize, recent, seen):
+        # pause_after=0 yields None whenever the stream has nothing new,
+        # which gives the loop a chance to notice stop()
+        for item in items:
+            if self._stop.is_set():
+                return
+            if item is None:
+                self._stop.wait(self._poll_seconds)
+                continue
+            record = normalize(item)
+            if record['post_id'] in seen:
+                continue
+            if len(recent) == recent.maxlen:
+                seen.discard(recent[0])
+            recent.append(record['post_id'])
+            seen.add(record['post_id'])
+            with self._lock:
+                self._seen += 1
+            present, _ = self._automaton.scan(record['text_content'])
+            if not present:
+                continue
+            with self._lock:
+                self._matched += 1
+            record['_received'] = time.monotonic()
+            # Blocks while the queue is full; re-checks stop() every second
+            while not self._stop.is_set():
+                try:
+                    self.queue.put(record, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+
+    def _consume(self):
+        batch, deadline = [], None
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                self._flush(batch)
+                return
+            if record is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.batch_seconds
+                batch.append(record)
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch, deadline = [], None
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        df = pd.DataFrame(batch)
+        received = df.pop('_received').to_numpy()
+        compact_frame(df)
+        # One run per micro-batch, exported to the metrics endpoint and SENTRY_TRACE_FILE
+        with instrumentation.record('reddit_stream.batch', posts=len(df)):
+            try:
+                df = self.process(df)
+            except Exception as e:
+                notify.error(f"Could not analyze a batch of {len(df)} Reddit posts: {e}")
+                return
+        done = time.monotonic()
+        with self._lock:
+            if self.keep_results:
+                self.results.append(df)
+            self._processed += len(df)
+            self._batches += 1
+            self._latencies.extend((done - received).tolist())
+        if self.on_batch:
+            self.on_batch(df)
+
+    # --- METRICS ---
+    def stats(self):
+        """
+        Returns throughput and end-to-end latency so far. Latency runs from a
+        post arriving from the stream to its batch finishing analysis.
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+            latencies = np.array(self._latencies) if self._latencies else np.zeros(1)
+            return {
+                'seconds': elapsed, 'seen': self._seen, 'matched': self._matched,
+                'processed': self._processed, 'batches': self._batches, 'queued': self.queue.qsize(),
+                'posts_per_sec': self._processed / elapsed if elapsed else 0.0,
+                'seen_per_sec': self._seen / elapsed if elapsed else 0.0,
+                'latency_p50': float(np.percentile(latencies, 50)),
+                'latency_p95': float(np.percentile(latencies, 95)),
+            }
+
+def format_stats(stats):
+    return (f"{stats['seconds']:.0f}s: {stats['seen']} seen ({stats['seen_per_sec']:.1f}/s), "
+            f"{stats['matched']} matched, {stats['processed']} analyzed ({stats['posts_per_sec']:.1f}/s) "
+            f"in {stats['batches']} batches, queue {stats['queued']}, "
+            f"latency p50 {stats['latency_p50']:.2f}s p95 {stats['latency_p95']:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subreddit', default='all')
+    parser.add_argument('--keywords', required=True, help="Comma-separated keyword set.")
+    parser.add_argument('--no-comments', action='store_true', help="Only stream submissions.")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--batch-seconds', type=float, default=5.0)
+    parser.add_argument('--queue-size', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=0, help="Seconds to run; 0 runs until interrupted.")
+    parser.add_argument('--report-every', type=float, default=10.0)
+    parser.add_argument('--store', action='store_true', help="Save analyzed batches into the local post store.")
+    parser.add_argument('--metrics-port', type=int, help="Serve per-stage Prometheus metrics at :PORT/metrics.")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        instrumentation.serve_metrics(args.metrics_port)
+
+    keywords = args.keywords.split(',')
+    on_batch = None
+    if args.store:
+        from store import PostStore, query_key
+        post_store, key = PostStore(), query_key(keywords, args.subreddit)
+        on_batch = lambda df: post_store.save('Reddit', key, df)
+
+    ingestor = RedditStreamIngestor(
+        keywords, subreddit=args.subreddit, include_comments=not args.no_comments,
+        batch_size=args.batch_size, batch_seconds=args.batch_seconds, queue_size=args.queue_size,
+        on_batch=on_batch, keep_results=False
+    )
+    if not ingestor.start():
+        return
+    started = time.monotonic()
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            remaining = args.duration - (time.monotonic() - started) if args.duration else args.report_every
+            time.sleep(max(0, min(args.report_every, remaining)))
+            print(format_stats(ingestor.stats()), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ingestor.stop()
+        print(format_stats(ingestor.stats()))
+
+if __name__ == '__main__':
+    main()
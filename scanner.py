@@ -0,0 +1,153 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import pandas as pd
+
+from collector import get_tweets_df, get_reddit_posts_df, get_youtube_videos_df
+from instrumentation import propagate, span
+from rate_limit import get_scheduler
+from web_scraper import get_news_articles_df
+from schema import merge_posts, normalize_posts
+from store import query_key
+from youtube_ingest import ingest_youtube
+
+PLATFORMS = ['Twitter', 'Reddit', 'YouTube', 'News Articles']
+
+# Seconds each source may take before the scan moves on without it
+DEFAULT_TIMEOUTS = {'Twitter': 60, 'Reddit': 45, 'YouTube': 45, 'News Articles': 30}
+
+# Platform -> its bucket in the shared rate-limit scheduler
+RATE_LIMIT_BUCKETS = {'Twitter': 'twitter', 'Reddit': 'reddit', 'YouTube': 'youtube', 'News Articles': 'news'}
+
+# Recent search rejects a since_id older than its 7-day window
+TWITTER_SINCE_ID_WINDOW = pd.Timedelta(days=6)
+
+def build_search_query(keywords):
+    """
+    Joins keywords into an OR query of quoted phrases.
+    """
+    return " OR ".join(f'"{k}"' for k in keywords if k)
+
+def _since_id(mark_id, mark_time):
+    if mark_id and pd.Timestamp.now(tz='UTC') - mark_time < TWITTER_SINCE_ID_WINDOW:
+        return int(mark_id)
+    return None
+
+def twitter_since_id(store, keywords):
+    """
+    Returns the since_id for an incremental Twitter fetch of a keyword set,
+    or None when nothing recent enough is stored.
+    """
+    return _since_id(*store.high_water_mark('Twitter', query_key(keywords)))
+
+def fetch_platform(platform, keywords, max_results=50, subreddit='all', store=None, comment_videos=0):
+    """
+    Runs one platform's collector.
+
+    With a store.PostStore, only content newer than the query's stored
+    high-water mark is requested (Twitter since_id, YouTube publishedAfter,
+    Reddit created_utc). The new posts are saved, and the query's full stored
+    history is returned.
+
+    With comment_videos, YouTube is collected by youtube_ingest, which adds
+    comments from that many top videos. Those scans are stored apart from
+    plain video scans, whose column layout differs, and only their videos
+    set the high-water mark: a new comment on an old video says nothing
+    about which videos were already collected.
+    """
+    search_query = build_search_query(keywords)
+    key = query_key(keywords, subreddit if platform == 'Reddit' else None)
+    harvest = platform == 'YouTube' and comment_videos > 0
+    if harvest:
+        key = f"comments:{key}"
+    mark_id, mark_time = store.high_water_mark(platform, key, kind='video' if harvest else None) if store else (None, None)
+
+    if platform == 'Twitter':
+        df = get_tweets_df(search_query, max_results=max_results, since_id=_since_id(mark_id, mark_time))
+    elif platform == 'Reddit':
+        created_after = mark_time.timestamp() if mark_time is not None else None
+        df = get_reddit_posts_df(subreddit, search_query, limit=max_results, created_after=created_after)
+    elif harvest:
+        df = ingest_youtube(search_query, max_videos=max_results, comment_videos=comment_videos, published_after=mark_time)
+    elif platform == 'YouTube':
+        df = get_youtube_videos_df(search_query, max_results=max_results, published_after=mark_time)
+    else: # News Articles
+        df = get_news_articles_df(keywords, max_results=max_results)
+
+    if store is None:
+        return df
+    store.save(platform, key, df)
+    return store.load(platform, key)
+
+def resume_at(platform):
+    """
+    Returns when a platform's shared rate-limit budget allows calls again
+    (epoch seconds), or None if it has capacity now.
+    """
+    return get_scheduler().resume_at(RATE_LIMIT_BUCKETS[platform])
+
+def _fetch(platform, keywords, max_results, subreddit, store):
+    """
+    Runs fetch_platform and returns (frame, seconds taken).
+    """
+    started = time.monotonic()
+    with span(f"scan.{platform}") as current:
+        df = fetch_platform(platform, keywords, max_results=max_results, subreddit=subreddit, store=store)
+        current.rows = len(df)
+    return df, time.monotonic() - started
+
+def scan_all_platforms(keywords, max_results=50, subreddit='all', platforms=None, timeouts=None, store=None):
+    """
+    Queries several platforms concurrently and merges the results into one
+    frame in the shared post schema (see schema.POST_COLUMNS).
+
+    Every source runs in its own worker thread, so the scan takes as long as
+    the slowest source rather than the sum of all of them. A source that
+    fails or exceeds its timeout is left out and the scan returns what the
+    other sources found. A source whose rate limit runs out returns what it
+    collected up to then, with the time it can resume.
+
+    Args:
+        keywords (list): Search terms.
+        max_results (int): Maximum number of posts to fetch per platform.
+        subreddit (str): Subreddit to search on Reddit.
+        platforms (list): Platforms to query, defaults to PLATFORMS.
+        timeouts (dict): Per-platform timeout in seconds, defaults to DEFAULT_TIMEOUTS.
+        store (store.PostStore): Fetch incrementally and return stored history,
+            see fetch_platform.
+
+    Returns:
+        tuple: (pandas.DataFrame of merged posts,
+                dict of platform -> {'rows', 'seconds', 'error', 'resume_at'}),
+        resume_at being None unless the platform's rate limit is exhausted.
+    """
+    platforms = platforms or PLATFORMS
+    timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+    start = time.monotonic()
+    frames, status = [], {}
+
+    executor = ThreadPoolExecutor(max_workers=len(platforms), thread_name_prefix='scan')
+    futures = {
+        platform: executor.submit(propagate(_fetch), platform, keywords, max_results, subreddit, store)
+        for platform in platforms
+    }
+    try:
+        for platform, future in futures.items():
+            # Each deadline counts from the start of the scan, since all sources run at once
+            remaining = max(0, start + timeouts[platform] - time.monotonic())
+            try:
+                df, seconds = future.result(timeout=remaining)
+                df = normalize_posts(df, platform)
+                frames.append(df)
+                status[platform] = {'rows': len(df), 'seconds': seconds, 'error': None}
+            except FutureTimeoutError: # Not the builtin TimeoutError before Python 3.11
+                status[platform] = {'rows': 0, 'seconds': timeouts[platform],
+                                    'error': f"timed out after {timeouts[platform]}s"}
+            except Exception as e:
+                status[platform] = {'rows': 0, 'seconds': time.monotonic() - start, 'error': str(e)}
+            status[platform]['resume_at'] = resume_at(platform)
+    finally:
+        # Don't wait for sources that timed out; their threads finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return merge_posts(frames), status
@@ -0,0 +1,174 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Columns shared by posts from every platform once normalized
+POST_COLUMNS = ['platform', 'post_id', 'author', 'title', 'text_content', 'url', 'created_at', 'engagement']
+
+# Account metadata only Twitter provides; kept so bot scoring still works
+# on Twitter rows of a merged frame
+TWITTER_ACCOUNT_COLUMNS = ['user_created_at', 'followers_count', 'following_count', 'is_verified']
+
+# How each collector's columns map onto POST_COLUMNS
+PLATFORM_COLUMN_MAPS = {
+    'Twitter': {
+        'post_id': 'tweet_id', 'author': 'username', 'text_content': 'tweet_text',
+        'created_at': 'tweet_created_at', 'engagement': 'engagement',
+    },
+    'Reddit': {
+        'post_id': 'post_id', 'author': 'author', 'title': 'title', 'text_content': 'text_content',
+        'url': 'url', 'created_at': 'created_at', 'engagement': 'engagement',
+    },
+    'YouTube': {
+        'post_id': 'video_id', 'author': 'channel_title', 'title': 'title', 'text_content': 'text_content',
+        'url': 'video_url', 'created_at': 'published_at', 'engagement': 'engagement',
+    },
+    'News Articles': {
+        'post_id': 'link', 'author': 'source', 'title': 'headline', 'text_content': 'text_content',
+        'url': 'link', 'created_at': 'published_at', 'engagement': 'engagement',
+    },
+}
+
+# --- COMPACT COLUMN TYPES ---
+# Collected frames are mostly short strings repeated across many posts
+# (account names, sources, labels), long unique texts, small counts and
+# timestamps. compact_frame gives each its smallest faithful dtype once, at
+# ingestion, so later stages never re-parse or copy them.
+
+# Few distinct values, repeated across posts
+CATEGORY_COLUMNS = ['platform', 'username', 'author', 'source', 'channel_title', 'sentiment', 'kind', 'parent_id']
+# Mostly unique strings, stored Arrow-backed instead of as Python objects
+TEXT_COLUMNS = ['post_id', 'tweet_text', 'text_content', 'title', 'headline', 'description', 'body',
+                'url', 'link', 'video_url']
+TIMESTAMP_COLUMNS = ['tweet_created_at', 'user_created_at', 'created_at', 'published_at']
+# Counts stored as int32 when every value fits
+COUNT_COLUMNS = ['followers_count', 'following_count', 'tweet_count', 'retweet_count', 'like_count',
+                 'score', 'num_comments', 'view_count', 'comment_count', 'engagement']
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+def _text_dtype():
+    """
+    Arrow-backed strings with NaN for missing values (pandas' own default
+    string type from 3.0), or None when pyarrow or that dtype is unavailable.
+    """
+    try:
+        import pyarrow # noqa: F401
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except (ImportError, TypeError): # TypeError: pandas < 2.3 has no na_value
+        return None
+
+def parse_timestamps(values):
+    """
+    Parses a column of dates to UTC timestamps, NaT where unparseable.
+
+    The format is inferred from the first value and the whole column is
+    parsed in one vectorized pass; only values in some other format fall
+    back to slower per-value parsing. Feeds are consistent, so that is
+    usually none of them.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning) # "Could not infer format" when the first value is odd
+        parsed = pd.to_datetime(values, errors='coerce', utc=True)
+    missed = parsed.isna() & values.notna()
+    if missed.any():
+        parsed[missed] = pd.to_datetime(values[missed], errors='coerce', utc=True, format='mixed')
+    return parsed
+
+def compact_frame(df):
+    """
+    Converts a collected frame's known columns to compact dtypes in place:
+    CATEGORY_COLUMNS to categoricals, TEXT_COLUMNS to Arrow-backed strings,
+    TIMESTAMP_COLUMNS to UTC timestamps and COUNT_COLUMNS to int32 where
+    every value fits. Other columns are left as they are, and columns that
+    already have the target dtype are not touched, so calling it again
+    (e.g. after a concat) only converts what changed.
+
+    Returns:
+        pandas.DataFrame: The same frame, for chaining.
+    """
+    text_dtype = _text_dtype()
+    for column in df.columns.intersection(CATEGORY_COLUMNS):
+        if not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    if text_dtype is not None:
+        for column in df.columns.intersection(TEXT_COLUMNS):
+            series = df[column]
+            # Twitter's numeric tweet ids stay integers
+            if series.dtype != text_dtype and not pd.api.types.is_numeric_dtype(series):
+                df[column] = series.astype(text_dtype)
+    for column in df.columns.intersection(TIMESTAMP_COLUMNS):
+        dtype = df[column].dtype
+        if not (isinstance(dtype, pd.DatetimeTZDtype) and str(dtype.tz) == 'UTC'):
+            df[column] = parse_timestamps(df[column])
+    for column in df.columns.intersection(COUNT_COLUMNS):
+        series = df[column]
+        if pd.api.types.is_integer_dtype(series) and series.dtype != np.int32 and len(series) \
+                and INT32_MIN <= series.min() and series.max() <= INT32_MAX:
+            df[column] = series.astype(np.int32)
+    return df
+
+def memory_report(df):
+    """
+    Memory used by each column of a frame, strings and categories included.
+
+    Returns:
+        pandas.DataFrame: column, dtype, bytes and bytes_per_post, largest
+        first, with a final 'total' row.
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'column': usage.index,
+        'dtype': [str(df[column].dtype) for column in usage.index],
+        'bytes': usage.to_numpy(),
+    }).sort_values('bytes', ascending=False)
+    report = pd.concat([report, pd.DataFrame({'column': ['total'], 'dtype': [''], 'bytes': [int(usage.sum())]})],
+                       ignore_index=True)
+    report['bytes_per_post'] = (report['bytes'] / max(1, len(df))).round(1)
+    return report
+
+def normalize_posts(df, platform):
+    """
+    Converts a collector's platform-specific frame into the shared post schema.
+
+    Args:
+        df (pandas.DataFrame): Output of one of the collectors. Frames
+            that already have POST_COLUMNS are only compacted.
+        platform (str): A key of PLATFORM_COLUMN_MAPS.
+
+    Returns:
+        pandas.DataFrame: Frame with POST_COLUMNS (plus the Twitter account
+        columns for Twitter) in compact dtypes, see compact_frame.
+    """
+    column_map = PLATFORM_COLUMN_MAPS[platform]
+    extra_columns = TWITTER_ACCOUNT_COLUMNS if platform == 'Twitter' else []
+    if df.empty:
+        return pd.DataFrame(columns=POST_COLUMNS + extra_columns)
+
+    if set(POST_COLUMNS) <= set(df.columns): # Already shared-schema, e.g. from youtube_ingest
+        return compact_frame(df[POST_COLUMNS + extra_columns].reset_index(drop=True))
+
+    posts = pd.DataFrame(index=df.index)
+    for column in POST_COLUMNS:
+        source_column = column_map.get(column)
+        posts[column] = df[source_column] if source_column in df.columns else None
+    posts['platform'] = platform
+    posts['post_id'] = posts['post_id'].astype(str)
+    posts['engagement'] = pd.to_numeric(posts['engagement'], errors='coerce').fillna(0).astype('int64')
+
+    if platform == 'Twitter':
+        posts['url'] = 'https://twitter.com/' + posts['author'].astype(str) + '/status/' + posts['post_id']
+        for column in extra_columns:
+            posts[column] = df[column]
+    return compact_frame(posts.reset_index(drop=True))
+
+def merge_posts(frames):
+    """
+    Concatenates normalized frames from several platforms into one frame.
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=POST_COLUMNS)
+    # Categories differ between platforms, so concat falls back to plain strings; re-compact them
+    return compact_frame(pd.concat(frames, ignore_index=True)).sort_values('engagement', ascending=False)
@@ -0,0 +1,425 @@
+"""
+Local stand-in for the Twitter, Reddit, YouTube and Google News endpoints
+the collectors call, for offline ingestion testing and load tests. Point the
+transport layer at it (SENTRY_STANDIN_URL or transport.configure) and the
+collectors run unchanged, with any credentials.
+
+It serves a deterministic corpus per query: the same query always gets the
+same posts, newest first, that mention the query's terms. Pagination works
+like each platform's (next_token, after, pageToken), responses carry the
+platforms' rate-limit headers, and requests past --rate-limit in a --window
+get a 429. --latency adds a fixed delay (plus up to --jitter) per request.
+
+    python standin_server.py [--port 8765] [--results 1000] [--latency 0.05]
+                             [--rate-limit 450 [--window 900]]
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_PORT = 8765
+DEFAULT_RESULTS = 1000 # Posts per query, per platform
+COMMENTS_PER_VIDEO = 50
+NEWS_FEED_SIZE = 100 # Google News returns at most 100 items per feed
+POST_SPACING_SECONDS = 30 # Age difference between consecutive posts
+TWEET_ID_TOP = 2 * 10**18 # Newest tweet id; older tweets count down from it
+REDDIT_ID_BASE = 36**6 # Keeps submission ids at the real 7 base-36 digits
+
+FILLER = ("news report update video thread people government protest statement rally "
+          "border army election policy media story claim photo today region support").split()
+QUERY_TERM = re.compile(r'"([^"]+)"|(?<![\w:-])([^\s"():-][^\s"():]*)(?=\s|$)')
+QUERY_OPERATORS = {'OR', 'AND'}
+
+def query_terms(query):
+    """
+    The search terms of a platform query: quoted phrases and bare words,
+    without operators such as OR, -is:retweet or lang:en.
+    """
+    terms = [phrase or word for phrase, word in QUERY_TERM.findall(query or '')]
+    return [term for term in terms if term not in QUERY_OPERATORS] or ['news']
+
+def query_key(query):
+    """
+    Four hex digits identifying a query, embedded in the ids of its posts.
+    """
+    return f"{zlib.crc32((query or '').encode()) & 0xffff:04x}"
+
+class Corpus:
+    """
+    Deterministic posts per query: post i of a query always has the same
+    id, author, text and metrics, and is POST_SPACING_SECONDS older than
+    post i - 1.
+    """
+
+    def __init__(self, results=DEFAULT_RESULTS, seed=0, now=None):
+        self.results = results
+        self.seed = seed
+        self.now = now or time.time()
+        self.queries = {} # query key -> query, so ids can be traced back to their query
+        self._lock = threading.Lock()
+
+    def register(self, query):
+        key = query_key(query)
+        with self._lock:
+            self.queries.setdefault(key, query)
+        return key
+
+    def post(self, query, index, thread=''):
+        """
+        Returns the shared fields of post `index` of a query, or of the
+        replies under one of its posts with `thread`.
+        """
+        rng = random.Random(f"{self.seed}:{query}:{thread}:{index}")
+        terms = query_terms(query)
+        words = rng.choices(FILLER, k=rng.randint(6, 18))
+        words.insert(rng.randrange(len(words) + 1), terms[index % len(terms)])
+        author = rng.randrange(max(1, self.results // 10))
+        if rng.random() < 0.5:
+            words.append(f"@user{rng.randrange(max(1, self.results // 10))}")
+        return {
+            'text': " ".join(words),
+            'author': author,
+            'created': self.now - index * POST_SPACING_SECONDS,
+            'likes': int(rng.paretovariate(1.2)) - 1,
+            'shares': int(rng.paretovariate(1.5)) - 1,
+            'replies': rng.randrange(20),
+        }
+
+def iso(timestamp, millis=False):
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z' if millis else moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def page_bounds(token, size, total):
+    start = int(token) if token and str(token).isdigit() else 0
+    end = min(total, start + size)
+    return start, end, (str(end) if end < total else None)
+
+# --- PLATFORM ENDPOINTS ---
+# Each returns (status, headers, body) for a parsed GET or POST.
+def twitter_search(corpus, params):
+    query = params.get('query', '')
+    size = max(10, min(100, int(params.get('max_results', 10))))
+    total = corpus.results
+    if params.get('since_id'):
+        total = max(0, min(total, TWEET_ID_TOP - int(params['since_id'])))
+    start, end, next_token = page_bounds(params.get('next_token'), size, total)
+    tweets, users = [], {}
+    for i in range(start, end):
+        post = corpus.post(query, i)
+        author_id = str(10**9 + post['author'])
+        tweets.append({
+            'id': str(TWEET_ID_TOP - i), 'edit_history_tweet_ids': [str(TWEET_ID_TOP - i)], 'text': post['text'],
+            'author_id': author_id, 'created_at': iso(post['created'], millis=True),
+            'public_metrics': {'retweet_count': post['shares'], 'reply_count': post['replies'],
+                               'like_count': post['likes'], 'quote_count': 0},
+        })
+        users[author_id] = {
+            'id': author_id, 'name': f"User {post['author']}", 'username': f"user{post['author']}",
+            'created_at': iso(corpus.now - 86400 * (30 + post['author'] % 3000), millis=True), 'verified': False,
+            'public_metrics': {'followers_count': post['author'] * 7 % 5000, 'following_count': post['author'] * 3 % 2000,
+                               'tweet_count': post['author'] * 11 % 20000, 'listed_count': 0},
+        }
+    if not tweets:
+        return 200, {}, {'meta': {'result_count': 0}}
+    meta = {'newest_id': tweets[0]['id'], 'oldest_id': tweets[-1]['id'], 'result_count': len(tweets)}
+    if next_token:
+        meta['next_token'] = next_token
+    return 200, {}, {'data': tweets, 'includes': {'users': list(users.values())}, 'meta': meta}
+
+def reddit_token(corpus, params):
+    return 200, {}, {'access_token': 'standin-token', 'token_type': 'bearer', 'expires_in': 86400, 'scope': '*'}
+
+def reddit_search(corpus, params, subreddit):
+    query = params.get('q', '')
+    size = max(1, min(100, int(params.get('limit', 25))))
+    after = params.get('after', '')
+    start = int(after[3:], 36) - REDDIT_ID_BASE + 1 if after.startswith('t3_') else 0
+    end = min(corpus.results, start + size)
+    children = []
+    for i in range(start, end):
+        post = corpus.post(query, i)
+        post_id = base36(REDDIT_ID_BASE + i)
+        children.append({'kind': 't3', 'data': {
+            'id': post_id, 'name': f"t3_{post_id}", 'title': post['text'], 'author': f"user{post['author']}",
+            'selftext': "", 'score': post['likes'], 'num_comments': post['replies'], 'subreddit': subreddit,
+            'url': f"https://www.reddit.com/r/{subreddit}/comments/{post_id}/",
+            'permalink': f"/r/{subreddit}/comments/{post_id}/", 'created_utc': post['created'],
+        }})
+    after = children[-1]['data']['name'] if end < corpus.results and children else None
+    return 200, {}, {'kind': 'Listing', 'data': {'after': after, 'before': None, 'dist': len(children),
+                                                 'children': children}}
+
+def base36(number):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while number:
+        number, remainder = divmod(number, 36)
+        out = digits[remainder] + out
+    return out or "0"
+
+def video_id(key, index):
+    return f"{key}{index:07d}"
+
+def youtube_search(corpus, params):
+    query = params.get('q', '')
+    key = corpus.register(query)
+    start, end, next_token = page_bounds(params.get('pageToken'), max(1, min(50, int(params.get('maxResults', 5)))),
+                                         corpus.results)
+    body = {'kind': 'youtube#searchListResponse', 'pageInfo': {'totalResults': corpus.results, 'resultsPerPage': end - start},
+            'items': [{'kind': 'youtube#searchResult', 'id': {'kind': 'youtube#video', 'videoId': video_id(key, i)}}
+                      for i in range(start, end)]}
+    if next_token:
+        body['nextPageToken'] = next_token
+    return 200, {}, body
+
+def youtube_videos(corpus, params):
+    items = []
+    for vid in filter(None, params.get('id', '').split(',')):
+        query, index = corpus.queries.get(vid[:4], ''), int(vid[4:]) if vid[4:].isdigit() else 0
+        post = corpus.post(query, index)
+        items.append({'kind': 'youtube#video', 'id': vid, 'snippet': {
+            'title': post['text'][:100], 'description': post['text'], 'channelTitle': f"Channel {post['author']}",
+            'publishedAt': iso(post['created']),
+        }, 'statistics': {'viewCount': str(post['likes'] * 40 + post['shares']), 'likeCount': str(post['likes']),
+                          'commentCount': str(COMMENTS_PER_VIDEO)}})
+    return 200, {}, {'kind': 'youtube#videoListResponse', 'items': items}
+
+def youtube_comments(corpus, params):
+    vid = params.get('videoId', '')
+    start, end, next_token = page_bounds(params.get('pageToken'), max(1, min(100, int(params.get('maxResults', 20)))),
+                                         COMMENTS_PER_VIDEO)
+    query = corpus.queries.get(vid[:4], '')
+    items = []
+    for i in range(start, end):
+        post = corpus.post(query, i, thread=vid)
+        comment_id = f"Ug{vid}{i:05d}"
+        items.append({'kind': 'youtube#commentThread', 'id': comment_id, 'snippet': {
+            'videoId': vid, 'totalReplyCount': post['replies'],
+            'topLevelComment': {'kind': 'youtube#comment', 'id': comment_id, 'snippet': {
+                'videoId': vid, 'authorDisplayName': f"Viewer {post['author']}", 'textDisplay': post['text'],
+                'likeCount': post['likes'], 'publishedAt': iso(post['created']),
+            }},
+        }})
+    body = {'kind': 'youtube#commentThreadListResponse', 'items': items}
+    if next_token:
+        body['nextPageToken'] = next_token
+    return 200, {}, body
+
+def news_feed(corpus, params, if_none_match=None):
+    query = params.get('q', '')
+    key = corpus.register(query)
+    etag = f'"{key}-{corpus.results}"'
+    if if_none_match == etag:
+        return 304, {'ETag': etag}, b""
+    items = []
+    for i in range(min(corpus.results, NEWS_FEED_SIZE)):
+        post = corpus.post(query, i)
+        items.append(
+            f"<item><title>{escape(post['text'])}</title>"
+            f"<link>https://news.google.com/articles/{key}{i:07d}</link>"
+            f"<pubDate>{format_datetime(datetime.fromtimestamp(post['created'], timezone.utc), usegmt=True)}</pubDate>"
+            f"<source url=\"https://example.com\">Outlet {post['author'] % 50}</source></item>"
+        )
+    body = (f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><rss version=\"2.0\"><channel><title>{escape(query)}</title>"
+            f"{''.join(items)}</channel></rss>").encode()
+    return 200, {'Content-Type': 'application/rss+xml; charset=utf-8', 'ETag': etag}, body
+
+def news_article(corpus, article):
+    query, index = corpus.queries.get(article[:4], ''), int(article[4:]) if article[4:].isdigit() else 0
+    post = corpus.post(query, index)
+    paragraphs = "".join(f"<p>{escape(post['text'])}. {escape(' '.join(FILLER))}.</p>" for _ in range(3))
+    body = (f"<html><head><title>{escape(post['text'])}</title><script>var tracking = 1;</script></head>"
+            f"<body><nav>Home World India</nav><article>{paragraphs}</article><footer>Outlet</footer></body></html>")
+    return 200, {'Content-Type': 'text/html; charset=utf-8'}, body.encode()
+
+# Each platform's own rate-limit window in seconds (PRAW paces its requests
+# assuming Reddit's 600), used unless the server is given one
+PLATFORM_WINDOWS = {'twitter': 900, 'reddit': 600}
+DEFAULT_WINDOW = 60
+
+# Rate-limit headers per platform: (limit, remaining, reset epoch, reset in seconds) -> headers
+RATE_LIMIT_HEADERS = {
+    'twitter': lambda limit, remaining, reset_at, reset_in: {
+        'x-rate-limit-limit': str(limit), 'x-rate-limit-remaining': str(remaining), 'x-rate-limit-reset': str(reset_at)},
+    'reddit': lambda limit, remaining, reset_at, reset_in: {
+        'x-ratelimit-used': str(limit - remaining), 'x-ratelimit-remaining': f"{float(remaining):.1f}",
+        'x-ratelimit-reset': str(reset_in)},
+}
+
+class StandinServer:
+    """
+    The stand-in platforms, served from a background thread.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind, 0 for any free port.
+        results (int): Posts per query on each platform.
+        latency (float): Seconds added to every response.
+        jitter (float): Up to this many more seconds, random per request.
+        rate_limit (int): Requests per platform per window before 429s, or
+            None for no limit (headers then report a limit that is never hit).
+        window (float): Rate-limit window in seconds, by default each
+            platform's own (PLATFORM_WINDOWS).
+        seed (int): Varies the generated corpus.
+    """
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, results=DEFAULT_RESULTS, latency=0.0, jitter=0.0,
+                 rate_limit=None, window=None, seed=0):
+        self.corpus = Corpus(results=results, seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.window = window
+        self.stats = {}
+        self._windows = {} # platform -> (window start, requests in it)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), StandinHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.standin = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def serve_forever(self):
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def admit(self, platform):
+        """
+        Counts a request against its platform's window.
+
+        Returns:
+            tuple: (allowed, rate-limit headers for the response).
+        """
+        now = time.time()
+        limit = self.rate_limit or 10**6
+        window = self.window or PLATFORM_WINDOWS.get(platform, DEFAULT_WINDOW)
+        with self._lock:
+            started, used = self._windows.get(platform, (now, 0))
+            if now - started >= window:
+                started, used = now, 0
+            used += 1
+            self._windows[platform] = (started, used)
+            counts = self.stats.setdefault(platform, {'requests': 0, 'throttled': 0})
+            counts['requests'] += 1
+            allowed = self.rate_limit is None or used <= self.rate_limit
+            if not allowed:
+                counts['throttled'] += 1
+        reset_in = max(1, int(started + window - now))
+        make_headers = RATE_LIMIT_HEADERS.get(platform)
+        headers = make_headers(limit, max(0, limit - used), int(started + window), reset_in) if make_headers else {}
+        if not allowed:
+            headers['Retry-After'] = str(reset_in)
+        return allowed, headers
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive, like the real APIs
+    server_version = 'standin'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        self._handle()
+
+    def _route(self, path, params):
+        corpus = self.server.standin.corpus
+        if path == '/twitter/2/tweets/search/recent':
+            return 'twitter', lambda: twitter_search(corpus, params)
+        if path == '/reddit/api/v1/access_token':
+            return 'reddit-auth', lambda: reddit_token(corpus, params)
+        match = re.fullmatch(r'/reddit/r/([^/]+)/search/?(?:\.json)?', path)
+        if match:
+            return 'reddit', lambda: reddit_search(corpus, params, match.group(1))
+        youtube = {'/youtube/youtube/v3/search': youtube_search, '/youtube/youtube/v3/videos': youtube_videos,
+                   '/youtube/youtube/v3/commentThreads': youtube_comments}
+        if path in youtube:
+            return 'youtube', lambda: youtube[path](corpus, params)
+        if path == '/news/rss/search':
+            return 'news', lambda: news_feed(corpus, params, self.headers.get('If-None-Match'))
+        if path.startswith('/news/articles/'):
+            return 'news-articles', lambda: news_article(corpus, path.rsplit('/', 1)[-1])
+        return 'unknown', lambda: (404, {}, {'error': f"no stand-in endpoint for {path}"})
+
+    def _handle(self):
+        parts = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        platform, respond = self._route(parts.path, params)
+        standin = self.server.standin
+        allowed, headers = standin.admit(platform)
+        delay = standin.latency + (random.uniform(0, standin.jitter) if standin.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if allowed:
+            status, extra_headers, body = respond()
+            headers.update(extra_headers)
+        else:
+            status, body = 429, {'title': 'Too Many Requests', 'detail': 'Too Many Requests', 'status': 429}
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+            headers.setdefault('Content-Type', 'application/json; charset=utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--results', type=int, default=DEFAULT_RESULTS, help="Posts per query on each platform.")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many extra seconds per response.")
+    parser.add_argument('--rate-limit', type=int, help="Requests per platform per window before 429s.")
+    parser.add_argument('--window', type=float,
+                        help="Rate-limit window in seconds, by default each platform's own (Twitter 900, Reddit 600).")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = StandinServer(host=args.host, port=args.port, results=args.results, latency=args.latency,
+                           jitter=args.jitter, rate_limit=args.rate_limit, window=args.window, seed=args.seed)
+    print(f"Stand-in platforms on {server.url}; run the collectors with SENTRY_STANDIN_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
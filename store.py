@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from instrumentation import timed
+from schema import compact_frame, normalize_posts
+
+DEFAULT_STORE_PATH = os.path.join('data', 'sentry.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    platform TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    day TEXT,
+    created_at TEXT,
+    fetched_at TEXT NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (platform, post_id)
+);
+CREATE INDEX IF NOT EXISTS posts_by_day ON posts (platform, day);
+CREATE TABLE IF NOT EXISTS post_queries (
+    platform TEXT NOT NULL,
+    query TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    PRIMARY KEY (platform, query, post_id)
+);
+"""
+
+def query_key(keywords, subreddit=None):
+    """
+    Builds the key a scan's history is stored under. Keyword order and case
+    don't matter, so re-ordering the keyword box reuses the same history.
+    """
+    key = "|".join(sorted({k.strip().lower() for k in keywords if k and k.strip()}))
+    return f"r/{subreddit.lower()}:{key}" if subreddit else key
+
+class PostStore:
+    """
+    Embedded SQLite store of collected posts, de-duplicated by each platform's
+    native post id and partitioned by platform and day.
+
+    Posts are kept in the collector's own column layout, so frames loaded
+    from the store look the same as frames the collectors return. Every
+    operation opens its own connection, so one store can be shared by the
+    threads of a concurrent scan.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @timed('store.save')
+    def save(self, platform, query, df):
+        """
+        Upserts a collector's frame and links its posts to the query.
+        Re-fetched posts replace the stored copy, refreshing their metrics.
+
+        Returns:
+            int: Number of posts that were not stored before.
+        """
+        if df.empty:
+            return 0
+        posts = normalize_posts(df, platform)
+        records = df.to_json(orient='records', lines=True, date_format='iso').splitlines()
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (platform, post_id, None if pd.isna(created) else created.strftime('%Y-%m-%d'),
+             None if pd.isna(created) else created.isoformat(), fetched_at, record)
+            for post_id, created, record in zip(posts['post_id'], posts['created_at'], records)
+        ]
+        with closing(self._connect()) as conn, conn:
+            before = conn.execute("SELECT COUNT(*) FROM posts WHERE platform = ?", (platform,)).fetchone()[0]
+            conn.executemany("INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany(
+                "INSERT OR IGNORE INTO post_queries VALUES (?, ?, ?)",
+                [(platform, query, row[1]) for row in rows]
+            )
+            after = conn.execute("SELECT COUNT(*) FROM posts WHERE platform = ?", (platform,)).fetchone()[0]
+        return after - before
+
+    @timed('store.load')
+    def load(self, platform, query, since=None):
+        """
+        Loads the stored history of a query as a collector-shaped frame,
+        optionally only posts created on or after `since`.
+        """
+        sql = ("SELECT p.record FROM posts p JOIN post_queries q "
+               "ON p.platform = q.platform AND p.post_id = q.post_id "
+               "WHERE q.platform = ? AND q.query = ?")
+        params = [platform, query]
+        if since is not None:
+            sql += " AND p.created_at >= ?"
+            params.append(pd.Timestamp(since).isoformat())
+        with closing(self._connect()) as conn:
+            records = [json.loads(row[0]) for row in conn.execute(sql, params)]
+        if not records:
+            return pd.DataFrame()
+        df = compact_frame(pd.DataFrame(records)) # Timestamps come back as ISO strings
+        if 'engagement' in df.columns:
+            df = df.sort_values('engagement', ascending=False)
+        return df.reset_index(drop=True)
+
+    def high_water_mark(self, platform, query, kind=None):
+        """
+        Returns the newest stored post of a query as (post_id, created_at),
+        or (None, None) when nothing is stored yet. For Twitter the newest post
+        is the one with the highest tweet id. With `kind`, only posts whose
+        'kind' column has that value count (e.g. 'video' for YouTube harvests).
+        """
+        order = "CAST(p.post_id AS INTEGER)" if platform == 'Twitter' else "p.created_at"
+        sql = ("SELECT p.post_id, p.created_at FROM posts p JOIN post_queries q "
+               "ON p.platform = q.platform AND p.post_id = q.post_id "
+               "WHERE q.platform = ? AND q.query = ? AND p.created_at IS NOT NULL")
+        params = [platform, query]
+        if kind is not None:
+            sql += " AND json_extract(p.record, '$.kind') = ?"
+            params.append(kind)
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"{sql} ORDER BY {order} DESC LIMIT 1", params).fetchone()
+        if not row:
+            return None, None
+        return row[0], pd.Timestamp(row[1])
@@ -0,0 +1,231 @@
+import heapq
+import re
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+# --- TERM FREQUENCIES ---
+# Term and bigram counts per sentiment, updated one chunk of posts at a time.
+# Each table is a bounded Space-Saving sketch, so memory stays fixed however
+# large the corpus grows, while the top terms keep exact (or tightly bounded)
+# counts. The word cloud and top-terms tables read the counts directly
+# instead of re-tokenizing one concatenated corpus string.
+
+TOKEN_PATTERN = re.compile(r"[^\W\d_][^\W_]+") # Words of 2+ characters starting with a letter
+STRIP_PATTERN = re.compile(r"https?://\S+|(?<!\S)@\S+") # Links and @mentions are not terms
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren as at be because been before being below
+between both but by can cannot could couldn did didn do does doesn doing don down during each else ever few for
+from further get got had hadn has hasn have haven having he her here hers herself him himself his how however i
+if in into is isn it its itself just let ll me more most mustn my myself no nor not now of off on once only or
+other otherwise ought our ours ourselves out over own re rt same shall shan she should shouldn since so some
+such than that the their theirs them themselves then there these they this those through to too under until up
+us ve very via was wasn we were weren what when where which while who whom why will with won would wouldn you
+your yours yourself yourselves amp http https www com
+""".split())
+
+TOP_K_CAPACITY = 20_000 # Terms tracked per sentiment; the rarest are evicted beyond this
+CHUNK_POSTS = 5_000
+WORDCLOUD_MAX_WORDS = 200
+
+class SpaceSaving:
+    """
+    Bounded top-K frequency sketch (batched Space-Saving).
+
+    Holds at most `capacity` items. When a batch pushes it over capacity the
+    lowest counts are evicted and the largest evicted count becomes the
+    floor: an item first seen after that may have occurred up to `floor`
+    times before, so it enters with count + floor and error = floor. Counts
+    are never under-estimated, over-estimated by at most their error, and
+    every item that occurred more than `floor` times is still tracked. Until
+    the first eviction all counts are exact.
+    """
+
+    def __init__(self, capacity=TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.floor = 0
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def update(self, counts):
+        """
+        Adds a mapping of item -> occurrences (e.g. a Counter of one chunk).
+        """
+        tracked, errors, floor = self.counts, self.errors, self.floor
+        get = tracked.get
+        for item, count in counts.items():
+            previous = get(item)
+            if previous is None:
+                tracked[item] = count + floor
+                if floor:
+                    errors[item] = floor
+            else:
+                tracked[item] = previous + count
+        self.total += sum(counts.values())
+        self._evict()
+
+    def _evict(self):
+        tracked = self.counts
+        if len(tracked) > self.capacity:
+            # Rebuilding the kept items is cheaper than deleting the evicted ones
+            items = list(tracked)
+            values = np.fromiter(tracked.values(), dtype=np.int64, count=len(items))
+            order = np.argpartition(values, len(items) - self.capacity - 1)
+            evicted, kept = order[:len(items) - self.capacity], order[len(items) - self.capacity:]
+            self.floor = max(self.floor, int(values[evicted].max()))
+            self.counts = dict(zip(map(items.__getitem__, kept.tolist()), values[kept].tolist()))
+            self.errors = {item: error for item, error in self.errors.items() if item in self.counts}
+
+    def merge(self, other):
+        """
+        Adds another sketch, e.g. one filled from a different chunk of posts
+        (mergeable Space-Saving). An item one sketch didn't track may have
+        occurred up to that sketch's floor times in it, so the floor is
+        added to both the item's count and its error, and the floors add up.
+        """
+        counts, errors = {}, {}
+        for item in chain(self.counts, (item for item in other.counts if item not in self.counts)):
+            count, error = self.counts.get(item), self.errors.get(item, 0)
+            if count is None:
+                count = error = self.floor
+            if item in other.counts:
+                count, error = count + other.counts[item], error + other.errors.get(item, 0)
+            else:
+                count, error = count + other.floor, error + other.floor
+            counts[item] = count
+            if error:
+                errors[item] = error
+        self.counts, self.errors = counts, errors
+        self.floor += other.floor
+        self.total += other.total
+        self._evict()
+        return self
+
+    def most_common(self, n=None):
+        """
+        Returns [(item, count, error), ...] by count descending.
+        """
+        pairs = heapq.nlargest(n, self.counts.items(), key=lambda pair: pair[1]) if n is not None else \
+            sorted(self.counts.items(), key=lambda pair: pair[1], reverse=True)
+        return [(item, count, self.errors.get(item, 0)) for item, count in pairs]
+
+def tokenize(text, stopwords=STOPWORDS):
+    """
+    Lowercased word tokens of a post, links and @mentions removed.
+    Hashtags count as their word. Stopwords are kept in the sequence (as
+    None) so bigrams never join words that weren't adjacent.
+    """
+    tokens = TOKEN_PATTERN.findall(STRIP_PATTERN.sub(' ', text.lower()))
+    return [None if token in stopwords else token for token in tokens]
+
+class TermFrequency:
+    """
+    Incremental per-sentiment term and bigram frequencies.
+
+    Args:
+        capacity (int): Space-Saving capacity of each term and bigram table.
+        stopwords (set): Lowercase words that are never counted.
+        bigrams (bool): Whether to count adjacent non-stopword pairs.
+    """
+
+    def __init__(self, capacity=TOP_K_CAPACITY, stopwords=STOPWORDS, bigrams=True):
+        self.capacity = capacity
+        self.stopwords = frozenset(stopwords)
+        self.count_bigrams = bigrams
+        self.terms = {} # sentiment -> SpaceSaving of words
+        self.bigrams = {} # sentiment -> SpaceSaving of "word word" phrases
+        self.posts = Counter()
+
+    def _table(self, tables, sentiment):
+        if sentiment not in tables:
+            tables[sentiment] = SpaceSaving(self.capacity)
+        return tables[sentiment]
+
+    def update_texts(self, texts, sentiment):
+        """
+        Counts the terms of an iterable of post texts under one sentiment.
+        """
+        terms, pairs = [], []
+        posts = 0
+        for text in texts:
+            tokens = tokenize(str(text), self.stopwords)
+            terms += tokens
+            if self.count_bigrams:
+                pairs += map(' '.join, filter(all, zip(tokens, tokens[1:])))
+            posts += 1
+        terms = Counter(terms)
+        terms.pop(None, None) # Stopwords
+        self.posts[sentiment] += posts
+        self._table(self.terms, sentiment).update(terms)
+        if self.count_bigrams:
+            self._table(self.bigrams, sentiment).update(Counter(pairs))
+        return self
+
+    def merge(self, other):
+        """
+        Adds the counts of another TermFrequency, e.g. one built from a
+        different chunk of the same corpus.
+
+        Returns:
+            TermFrequency: self.
+        """
+        self.posts.update(other.posts)
+        for tables, other_tables in ((self.terms, other.terms), (self.bigrams, other.bigrams)):
+            for sentiment, table in other_tables.items():
+                self._table(tables, sentiment).merge(table)
+        return self
+
+    @timed('analysis.term_frequency')
+    def update(self, df, text_col=None, sentiment_col='sentiment', sentiments=None, chunk_size=CHUNK_POSTS):
+        """
+        Counts the terms of a frame of posts, chunk_size posts at a time.
+        Posts go under their sentiment_col value, or 'all' if the frame has
+        no such column. With sentiments, only posts of those sentiments are
+        counted.
+
+        Returns:
+            TermFrequency: self, so a new counter can be built and filled in
+            one expression.
+        """
+        text_col = text_col or ('text_content' if 'text_content' in df.columns else 'tweet_text')
+        if df.empty or text_col not in df.columns:
+            return self
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            texts = chunk[text_col].fillna('')
+            if sentiment_col not in chunk.columns:
+                self.update_texts(texts, 'all')
+                continue
+            for sentiment, group in texts.groupby(chunk[sentiment_col].astype(str), sort=False):
+                if sentiments is None or sentiment in sentiments:
+                    self.update_texts(group, sentiment)
+        return self
+
+    def frequencies(self, sentiment, n=WORDCLOUD_MAX_WORDS):
+        """
+        Returns the n most frequent terms of a sentiment as {term: count},
+        ready for WordCloud.generate_from_frequencies.
+        """
+        table = self.terms.get(sentiment)
+        return {term: count for term, count, _ in table.most_common(n)} if table else {}
+
+    def top_terms(self, sentiment, n=20, bigrams=False):
+        """
+        Returns the n most frequent terms (or bigrams) of a sentiment.
+
+        Returns:
+            pandas.DataFrame: term, count and max_overcount (how much the
+            count may exceed the true count; 0 unless the table overflowed).
+        """
+        table = (self.bigrams if bigrams else self.terms).get(sentiment)
+        rows = table.most_common(n) if table else []
+        return pd.DataFrame(rows, columns=['term', 'count', 'max_overcount'])
@@ -0,0 +1,44 @@
+import random
+from collections import Counter
+
+from term_frequency import SpaceSaving
+
+def sketch(counts, capacity):
+    table = SpaceSaving(capacity)
+    for chunk in counts:
+        table.update(chunk)
+    return table
+
+def assert_bounds(table, exact):
+    """
+    Every tracked count is an upper bound within its error, and every item
+    that occurred more than the floor is tracked.
+    """
+    for item, count, error in table.most_common():
+        assert count - error <= exact[item] <= count, (item, count, error, exact[item])
+    for item, true_count in exact.items():
+        if true_count > table.floor:
+            assert item in table.counts, (item, true_count, table.floor)
+
+def test_merge_adds_the_other_floor_to_untracked_items():
+    mine, other = SpaceSaving(2), SpaceSaving(2)
+    mine.update({'a': 10, 'b': 10})
+    other.update({'x': 5, 'y': 5, 'a': 4})
+    mine.merge(other)
+    assert_bounds(mine, Counter({'a': 14, 'b': 10, 'x': 5, 'y': 5}))
+    assert (mine.counts['a'], mine.errors['a']) == (14, 4)
+
+def test_merged_sketches_bound_the_exact_counts():
+    rng = random.Random(7)
+    words = [f"w{i}" for i in range(300)]
+    weights = [1 / (rank + 1) for rank in range(len(words))] # Zipf-like, as in post text
+    chunks = [Counter(rng.choices(words, weights, k=500)) for _ in range(12)]
+
+    merged = sketch(chunks[:4], 40)
+    for start in (4, 8):
+        merged.merge(sketch(chunks[start:start + 4], 40))
+    exact = sum(chunks, Counter())
+
+    assert len(merged) <= 40
+    assert merged.total == sum(exact.values())
+    assert_bounds(merged, exact)
@@ -0,0 +1,266 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+import rate_limit
+
+# --- TRANSPORT MODES ---
+# Every collector sends its HTTP through this layer, so the same ingestion
+# code can run against the platforms, a recording of them or a stand-in:
+#   live   - requests go out as usual (the default)
+#   record - requests go out and every response is also saved as a cassette
+#   replay - responses are served from cassettes; nothing leaves the machine
+# Independently, a stand-in URL (see standin_server.py) redirects live and
+# recorded traffic from the platform hosts to a local fake server.
+# SENTRY_TRANSPORT, SENTRY_CASSETTES and SENTRY_STANDIN_URL set these for a
+# process; configure() changes them at runtime.
+# Outside replay, each platform request first reserves capacity with the
+# shared rate-limit scheduler (rate_limit.py) and reports its rate-limit
+# headers back to it.
+
+MODES = ('live', 'record', 'replay')
+DEFAULT_CASSETTE_DIR = os.path.join('data', 'cassettes')
+
+# Platform API host -> path prefix it is served under on the stand-in server
+STANDIN_PREFIXES = {
+    'api.twitter.com': 'twitter',
+    'www.reddit.com': 'reddit',
+    'oauth.reddit.com': 'reddit',
+    'youtube.googleapis.com': 'youtube',
+    'www.googleapis.com': 'youtube',
+    'news.google.com': 'news',
+}
+SECRET_PARAMS = frozenset({'key', 'access_token', 'api_key'}) # Never written to disk or part of a cassette name
+# Not stored: cookies, framing of the original response, and httplib2's
+# content-location, which repeats the request URL with its API key
+DROPPED_HEADERS = frozenset({'set-cookie', 'content-encoding', 'content-length', 'transfer-encoding', 'connection',
+                             'content-location'})
+
+class ReplayMissError(requests.exceptions.ConnectionError):
+    """
+    Raised in replay mode for a request that has no recorded response.
+    It is a ConnectionError, so collectors handle it like a network failure.
+    """
+
+class Transport:
+    """
+    Where collector HTTP goes, and the cassette store behind record/replay.
+
+    Args:
+        mode (str): 'live', 'record' or 'replay'.
+        cassette_dir (str): Directory cassettes are written to and read from.
+        standin_url (str): Base URL of a stand-in server to send platform
+            traffic to instead of the real hosts, or None.
+    """
+
+    def __init__(self, mode='live', cassette_dir=DEFAULT_CASSETTE_DIR, standin_url=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown transport mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.cassette_dir = cassette_dir
+        self.standin_url = standin_url.rstrip('/') if standin_url else None
+        self.stats = {'requests': 0, 'recorded': 0, 'replayed': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def offline(self):
+        """
+        Whether no request reaches a real platform, so credentials aren't needed.
+        """
+        return self.mode == 'replay' or self.standin_url is not None
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def rewrite(self, url):
+        """
+        Points a platform URL at the stand-in server, if one is configured.
+        Hosts the stand-in doesn't serve (e.g. news article pages) keep going
+        through it under their own host name.
+        """
+        if not self.standin_url:
+            return url
+        parts = urlsplit(url)
+        prefix = STANDIN_PREFIXES.get(parts.hostname, f"site/{parts.hostname}")
+        return urlunsplit(urlsplit(f"{self.standin_url}/{prefix}{parts.path}")[:3] + (parts.query, ''))
+
+    def cassette_path(self, method, url):
+        """
+        File a request's response is stored under: one directory per host, the
+        file named by a hash of the method and URL with its query parameters
+        sorted and credentials removed.
+        """
+        parts = urlsplit(url)
+        query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS)
+        name = f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}?{urlencode(query)}"
+        return os.path.join(self.cassette_dir, parts.hostname or 'unknown',
+                            hashlib.sha1(name.encode()).hexdigest() + '.json')
+
+    def save(self, method, url, status, reason, headers, body):
+        """
+        Writes one response as a cassette and returns it as a record dict.
+        """
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS]
+        record = {
+            'method': method.upper(),
+            'url': urlunsplit(parts[:3] + (urlencode(query), '')),
+            'status': status,
+            'reason': reason,
+            'headers': {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+        }
+        try:
+            record['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            record['body_b64'] = base64.b64encode(body).decode('ascii')
+
+        path = self.cassette_path(method, url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(temp_path, path) # Concurrent recorders never leave a half-written cassette
+        self._count('recorded')
+        return record
+
+    def load(self, method, url):
+        """
+        Reads the recorded response for a request.
+
+        Raises:
+            ReplayMissError: Nothing was recorded for this method and URL.
+        """
+        path = self.cassette_path(method, url)
+        try:
+            with open(path, encoding='utf-8') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            self._count('misses')
+            raise ReplayMissError(f"No recorded response for {method.upper()} {url} in {self.cassette_dir}") from None
+        self._count('replayed')
+        return record
+
+def record_body(record):
+    if 'body_b64' in record:
+        return base64.b64decode(record['body_b64'])
+    return record['body'].encode('utf-8')
+
+_transport = Transport(
+    mode=os.environ.get('SENTRY_TRANSPORT', 'live'),
+    cassette_dir=os.environ.get('SENTRY_CASSETTES', DEFAULT_CASSETTE_DIR),
+    standin_url=os.environ.get('SENTRY_STANDIN_URL') or None,
+)
+
+def get_transport():
+    return _transport
+
+def configure(mode='live', cassette_dir=DEFAULT_CASSETTE_DIR, standin_url=None):
+    """
+    Switches every collector to a new transport. Sessions and clients that
+    are already built pick it up on their next request.
+
+    Returns:
+        Transport: The new transport, whose stats count its requests.
+    """
+    global _transport
+    _transport = Transport(mode=mode, cassette_dir=cassette_dir, standin_url=standin_url)
+    return _transport
+
+# --- REQUESTS (TWITTER, REDDIT, NEWS) ---
+class TransportAdapter(HTTPAdapter):
+    """
+    requests adapter that sends through the current transport. Mounted on
+    the sessions tweepy, PRAW and the news scraper use.
+    """
+
+    def send(self, request, **kwargs):
+        transport = get_transport()
+        transport._count('requests')
+        if transport.mode == 'replay':
+            record = transport.load(request.method, request.url)
+            instrumentation.count(api_calls=1, bytes=len(record_body(record)))
+            return self._from_record(request, record)
+
+        url = request.url
+        rate_limit.reserve(url)
+        if transport.standin_url:
+            request = request.copy()
+            request.url = transport.rewrite(url)
+        response = super().send(request, **kwargs)
+        if transport.mode != 'record':
+            # A streamed body isn't read yet; its declared length stands in for it
+            size = int(response.headers.get('Content-Length') or 0) if kwargs.get('stream') else len(response.content)
+            instrumentation.count(api_calls=1, bytes=size)
+        else:
+            with response:
+                record = transport.save(request.method, url, response.status_code, response.reason,
+                                        response.headers, response.content)
+            instrumentation.count(api_calls=1, bytes=len(response.content))
+            response = self._from_record(request, record)
+        rate_limit.observe_response(url, response.status_code, response.headers)
+        return response
+
+    def _from_record(self, request, record):
+        from urllib3 import HTTPResponse
+        raw = HTTPResponse(body=io.BytesIO(record_body(record)), headers=record['headers'], status=record['status'],
+                           reason=record['reason'], preload_content=False, decode_content=False)
+        return self.build_response(request, raw)
+
+def mount(session, **adapter_kwargs):
+    """
+    Routes a requests session through the transport layer.
+
+    Returns:
+        requests.Session: The same session.
+    """
+    adapter = TransportAdapter(**adapter_kwargs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# --- HTTPLIB2 (YOUTUBE) ---
+_http_class = None
+
+def httplib2_http(timeout=None):
+    """
+    Returns an httplib2.Http for the YouTube client that sends through the
+    current transport. httplib2 is imported on first use.
+    """
+    global _http_class
+    if _http_class is None:
+        import httplib2
+
+        class TransportHttp(httplib2.Http):
+            def request(self, uri, method='GET', body=None, headers=None, *args, **kwargs):
+                transport = get_transport()
+                transport._count('requests')
+                if transport.mode == 'replay':
+                    record = transport.load(method, uri)
+                    response = httplib2.Response({**record['headers'], 'status': str(record['status'])})
+                    response.reason = record['reason']
+                    content = record_body(record)
+                    instrumentation.count(api_calls=1, bytes=len(content))
+                    return response, content
+
+                rate_limit.reserve(uri)
+                response, content = super().request(transport.rewrite(uri), method, body, headers, *args, **kwargs)
+                instrumentation.count(api_calls=1, bytes=len(content))
+                if transport.mode == 'record':
+                    headers = {k: v for k, v in response.items() if k != 'status' and not k.startswith('-')}
+                    transport.save(method, uri, response.status, response.reason, headers, content)
+                rate_limit.observe_response(uri, response.status, response, content)
+                return response, content
+
+        _http_class = TransportHttp
+    http = _http_class(timeout=timeout)
+    http.redirect_codes = http.redirect_codes - {308} # As googleapiclient's own build_http
+    return http
@@ -1,66 +1,210 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree, html
+
+import notify
+import transport
+from instrumentation import propagate, timed
+from rate_limit import RateLimited
+from schema import compact_frame
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+REQUEST_TIMEOUT = (5, 15) # (connect, read) seconds
+MAX_ARTICLE_WORKERS = 8
+MIN_BODY_LENGTH = 200 # Shorter extractions are consent pages or redirects, not articles
+
+_session = None
+_session_lock = threading.Lock()
+
+# Feed URL -> validators and records of the last 200 response, for conditional GETs.
+# Least recently used feeds are dropped, so distinct queries don't pile up
+MAX_CACHED_FEEDS = 32
+_feed_cache = OrderedDict()
+_feed_cache_lock = threading.Lock()
+
+def get_session():
+    """
+    Returns the shared keep-alive session, sized for the article worker pool.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            # Routed through the transport layer, which can record, replay or redirect it
+            _session = transport.mount(session, pool_connections=MAX_ARTICLE_WORKERS,
+                                       pool_maxsize=MAX_ARTICLE_WORKERS * 2)
+        return _session
+
+def parse_rss_items(stream, max_results):
+    """
+    Incrementally parses RSS <item> elements from a file-like byte stream,
+    stopping once max_results unique links are collected.
+
+    Each item is discarded after it is read, so memory stays flat however
+    large the feed is.
+    """
+    records = []
+    seen_links = set()
+    for _, item in etree.iterparse(stream, events=('end',), tag='item', recover=True):
+        link = (item.findtext('link') or "").strip()
+        if link and link not in seen_links:
+            seen_links.add(link)
+            title = item.findtext('title') or "No Title"
+            records.append({
+                'headline': title,
+                'source': item.findtext('source') or "No Source",
+                'link': link,
+                'published_at': item.findtext('pubDate'),
+                'text_content': title,
+                'engagement': 0
+            })
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
+        if len(records) >= max_results:
+            break
+    return records
+
+@timed('collect.news.rss')
+def fetch_feed(url, max_results):
+    """
+    Fetches and parses an RSS feed with a conditional GET.
+
+    The ETag and Last-Modified validators of the last successful response are
+    sent back, so an unchanged feed costs a 304 and its cached items are
+    reused without parsing.
+
+    Returns:
+        tuple: (list of item records, bool whether the feed was unchanged).
+    """
+    with _feed_cache_lock:
+        cached = _feed_cache.get(url)
+        if cached:
+            _feed_cache.move_to_end(url)
+    if cached and cached['truncated'] and len(cached['records']) < max_results:
+        cached = None # The cached parse stopped short of what is asked for now
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    with get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True) as response:
+        if response.status_code == 304 and cached:
+            return cached['records'][:max_results], True
+        response.raise_for_status()
+        response.raw.decode_content = True
+        records = parse_rss_items(response.raw, max_results)
+        validators = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+
+    if validators['etag'] or validators['last_modified']:
+        with _feed_cache_lock:
+            _feed_cache[url] = {**validators, 'records': records, 'truncated': len(records) >= max_results}
+            _feed_cache.move_to_end(url)
+            while len(_feed_cache) > MAX_CACHED_FEEDS:
+                _feed_cache.popitem(last=False)
+    return records, False
 
-def get_news_articles_df(keywords, max_results=50):
+def extract_article_text(page):
+    """
+    Extracts readable body text from an article page: the text of its
+    paragraphs, skipping scripts, navigation and other page furniture.
+    """
+    try:
+        tree = html.fromstring(page)
+    except (etree.ParserError, ValueError):
+        return ""
+    for element in tree.xpath('//script|//style|//nav|//header|//footer|//aside|//form'):
+        element.drop_tree()
+    paragraphs = (" ".join(p.text_content().split()) for p in tree.iter('p'))
+    return "\n".join(p for p in paragraphs if p)
+
+@timed('collect.news.articles')
+def fetch_article_bodies(links, max_workers=MAX_ARTICLE_WORKERS):
+    """
+    Downloads and extracts article bodies concurrently over the shared session.
+
+    Returns:
+        list: Body text per link, in the same order; "" where the page could
+        not be fetched or had no usable text. Once a rate limit is reached,
+        the remaining links are skipped and get "" too.
+    """
+    limited = []
+
+    def fetch(link):
+        if limited:
+            return ""
+        try:
+            response = get_session().get(link, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+        except RateLimited as e:
+            limited.append(e)
+            return ""
+        except requests.exceptions.RequestException:
+            return ""
+        body = extract_article_text(response.content)
+        return body if len(body) >= MIN_BODY_LENGTH else ""
+
+    if not links:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='news') as executor:
+        bodies = list(executor.map(propagate(fetch), links))
+    if limited:
+        notify.warning(f"{limited[0]}. Some articles are analyzed by headline only.")
+    return bodies
+
+@timed('collect.news')
+def get_news_articles_df(keywords, max_results=50, fetch_bodies=True):
     """
     Fetches news articles from the Google News RSS feed by combining all
     keywords into a single, efficient query.
-    
+
     Args:
         keywords (list): A list of search terms.
         max_results (int): The maximum number of articles to return in total.
-        
+        fetch_bodies (bool): Download each article and analyze its body text
+            along with the headline, instead of the headline only.
+
     Returns:
         pandas.DataFrame: DataFrame containing news article data.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    
-    all_records = []
-    seen_links = set()
-
     if not keywords:
         return pd.DataFrame()
-        
+
     search_query = " OR ".join(f'"{k.strip()}"' for k in keywords if k.strip())
-    
+
     try:
         url_query = requests.utils.quote(search_query)
         url = f"https://news.google.com/rss/search?q={url_query}&hl=en-IN&gl=IN&ceid=IN:en"
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'lxml')
-        items = soup.find_all('item', limit=max_results)
-        
-        for item in items:
-            link = item.link.text if item.link else ""
-            if link in seen_links:
-                continue
-            
-            seen_links.add(link)
-            title = item.title.text if item.title else "No Title"
-            source = item.source.text if item.source else "No Source"
-            
-            all_records.append({
-                'headline': title,
-                'source': source,
-                'link': link,
-                'text_content': title,
-                'engagement': 0
-            })
-
+        all_records, _ = fetch_feed(url, max_results)
+    except RateLimited as e:
+        notify.warning(f"{e}. No news articles were fetched.")
+        return pd.DataFrame()
     except requests.exceptions.RequestException as e:
-        print(f"Could not fetch news for query '{search_query}': {e}")
+        notify.error(f"Could not fetch news for query '{search_query}': {e}")
         return pd.DataFrame()
     except Exception as e:
-        print(f"An error occurred while parsing news: {e}")
+        notify.error(f"An error occurred while parsing news: {e}")
         return pd.DataFrame()
 
     if not all_records:
         return pd.DataFrame()
-        
-    return pd.DataFrame(all_records)
+
+    df = pd.DataFrame(all_records)
+    if fetch_bodies:
+        try:
+            df['body'] = fetch_article_bodies(df['link'].tolist())
+        except RateLimited as e:
+            notify.warning(f"{e}. Articles are analyzed by headline only.")
+            df['body'] = ""
+        has_body = df['body'] != ""
+        df.loc[has_body, 'text_content'] = df.loc[has_body, 'headline'] + "\n" + df.loc[has_body, 'body']
+    return compact_frame(df)
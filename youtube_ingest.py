@@ -0,0 +1,222 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import notify
+import transport
+from clients import get_client
+from instrumentation import propagate, timed
+from rate_limit import YOUTUBE_QUOTA_REASONS, RateLimited, get_scheduler, next_utc_midnight
+from schema import POST_COLUMNS, compact_frame
+
+SEARCH_PAGE_SIZE = 50 # search().list maxResults upper bound
+VIDEOS_BATCH_SIZE = 50 # videos().list accepts at most 50 ids per call
+COMMENTS_PAGE_SIZE = 100 # commentThreads().list maxResults upper bound
+
+def quota_status():
+    """
+    Returns (units used today, daily quota) of the shared YouTube budget.
+    """
+    status = get_scheduler().status()['youtube']
+    return status['capacity'] - status['available'], status['capacity']
+
+def _execute(request, http=None):
+    """
+    Runs a Data API request. The transport reserves its quota units from the
+    shared scheduler (rate_limit.py); an API quotaExceeded error is raised as
+    RateLimited, like a budget that has run out.
+    """
+    try:
+        return request.execute(http=http) if http is not None else request.execute()
+    except Exception as e:
+        content = getattr(e, 'content', None) or b''
+        if isinstance(content, bytes) and any(reason in content for reason in YOUTUBE_QUOTA_REASONS):
+            raise RateLimited('youtube', get_scheduler().resume_at('youtube') or next_utc_midnight(time.time())) from e
+        raise
+
+@timed('collect.youtube.search')
+def search_video_ids(client, query, max_results, published_after=None):
+    """
+    Pages through search().list results until max_results video ids are found.
+
+    Returns:
+        list: Unique video ids in result order. Stops early when results run
+        out or the shared YouTube quota can't cover another page.
+    """
+    params = {'q': query, 'part': 'id', 'type': 'video'}
+    if published_after is not None:
+        params['publishedAfter'] = pd.Timestamp(published_after).tz_convert('UTC').strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    video_ids, seen = [], set()
+    page_token = None
+    while len(video_ids) < max_results:
+        try:
+            response = _execute(
+                client.search().list(maxResults=min(SEARCH_PAGE_SIZE, max_results - len(video_ids)),
+                                     pageToken=page_token, **params),
+            )
+        except RateLimited as e:
+            notify.warning(f"YouTube search stopped early: {e}")
+            break
+        for item in response.get('items', []):
+            video_id = item['id']['videoId']
+            if video_id not in seen:
+                seen.add(video_id)
+                video_ids.append(video_id)
+        page_token = response.get('nextPageToken')
+        if not page_token or not response.get('items'):
+            break
+    return video_ids[:max_results]
+
+@timed('collect.youtube.videos')
+def fetch_video_details(client, video_ids):
+    """
+    Looks up snippet and statistics for video ids in batches of 50.
+
+    Returns:
+        list: videos().list items. Stops early if the shared YouTube quota
+        runs out.
+    """
+    videos = []
+    for start in range(0, len(video_ids), VIDEOS_BATCH_SIZE):
+        batch = video_ids[start:start + VIDEOS_BATCH_SIZE]
+        try:
+            response = _execute(
+                client.videos().list(part='snippet,statistics', id=','.join(batch), maxResults=len(batch)),
+            )
+        except RateLimited as e:
+            notify.warning(f"YouTube video lookup stopped early: {e}")
+            break
+        videos.extend(response.get('items', []))
+    return videos
+
+@timed('collect.youtube.comments')
+def fetch_comment_threads(client, video_id, max_comments, http=None):
+    """
+    Pages through a video's top-level comment threads, most relevant first.
+
+    Returns:
+        list: commentThreads().list items. Videos with comments disabled, or
+        a shared YouTube quota that has run out, give the threads
+        fetched so far.
+    """
+    threads = []
+    page_token = None
+    while len(threads) < max_comments:
+        try:
+            response = _execute(
+                client.commentThreads().list(
+                    part='snippet', videoId=video_id, order='relevance', textFormat='plainText',
+                    maxResults=min(COMMENTS_PAGE_SIZE, max_comments - len(threads)), pageToken=page_token
+                ),
+                http=http
+            )
+        except RateLimited:
+            break
+        except Exception as e:
+            # commentsDisabled and similar per-video errors shouldn't fail the scan
+            if 'commentsDisabled' not in str(e):
+                notify.warning(f"Could not fetch comments for video {video_id}: {e}")
+            break
+        threads.extend(response.get('items', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+    return threads[:max_comments]
+
+def video_posts(videos):
+    """
+    Converts videos().list items into records in the shared post schema.
+    """
+    records = []
+    for video in videos:
+        snippet, stats = video['snippet'], video.get('statistics', {})
+        records.append({
+            'platform': 'YouTube', 'post_id': video['id'], 'author': snippet['channelTitle'],
+            'title': snippet['title'], 'text_content': snippet['title'] + " " + snippet.get('description', ''),
+            'url': f"https://www.youtube.com/watch?v={video['id']}", 'created_at': snippet['publishedAt'],
+            'engagement': int(stats.get('viewCount', 0)) + int(stats.get('likeCount', 0)) + int(stats.get('commentCount', 0)),
+            'kind': 'video', 'parent_id': None,
+        })
+    return records
+
+def comment_posts(threads, video_titles):
+    """
+    Converts commentThreads().list items into records in the shared post schema.
+    """
+    records = []
+    for thread in threads:
+        comment = thread['snippet']['topLevelComment']
+        snippet = comment['snippet']
+        video_id = snippet.get('videoId') or thread['snippet'].get('videoId')
+        records.append({
+            'platform': 'YouTube', 'post_id': comment['id'], 'author': snippet.get('authorDisplayName', ''),
+            'title': video_titles.get(video_id, ''), 'text_content': snippet.get('textDisplay', ''),
+            'url': f"https://www.youtube.com/watch?v={video_id}&lc={comment['id']}", 'created_at': snippet.get('publishedAt'),
+            'engagement': int(snippet.get('likeCount', 0)) + int(thread['snippet'].get('totalReplyCount', 0)),
+            'kind': 'comment', 'parent_id': video_id,
+        })
+    return records
+
+@timed('collect.youtube_ingest')
+def ingest_youtube(query, max_videos=50, comment_videos=10, max_comments_per_video=100,
+                   client=None, published_after=None, max_workers=4):
+    """
+    Collects videos matching a query plus comments on the most engaged ones.
+
+    Search results are paged, video details are looked up 50 ids per call,
+    and comment threads for the top `comment_videos` videos are fetched
+    concurrently. Every call is charged against the shared YouTube quota
+    (rate_limit.py), and the ingestion returns what it has collected once
+    the quota runs out.
+
+    Args:
+        query (str): YouTube search query.
+        max_videos (int): Maximum number of videos to collect.
+        comment_videos (int): Number of top videos (by engagement) to harvest comments from.
+        max_comments_per_video (int): Maximum comment threads per video.
+        client: YouTube Data API client, defaults to the configured one.
+            Injected clients (e.g. fakes) are shared across worker threads;
+            the configured client gets a separate HTTP connection per thread.
+        published_after (datetime): Only collect videos published after this time.
+        max_workers (int): Concurrent comment fetches.
+
+    Returns:
+        pandas.DataFrame: Video and comment posts in the shared post schema,
+        with 'kind' ('video' or 'comment') and 'parent_id' (the commented video).
+    """
+    thread_http = client is None
+    client = client or get_client('youtube')
+    columns = POST_COLUMNS + ['kind', 'parent_id']
+    if not client:
+        notify.warning("YouTube client is not available due to initialization error.")
+        return pd.DataFrame(columns=columns)
+
+    video_ids = search_video_ids(client, query, max_videos, published_after=published_after)
+    videos = video_posts(fetch_video_details(client, video_ids))
+    if not videos:
+        return pd.DataFrame(columns=columns)
+
+    top_videos = sorted(videos, key=lambda v: v['engagement'], reverse=True)[:comment_videos]
+    video_titles = {v['post_id']: v['title'] for v in videos}
+    local = threading.local()
+
+    def harvest(video_id):
+        http = None
+        if thread_http:
+            # httplib2 connections are not thread-safe; give each worker its own
+            if not hasattr(local, 'http'):
+                local.http = transport.httplib2_http(timeout=30)
+            http = local.http
+        return fetch_comment_threads(client, video_id, max_comments_per_video, http=http)
+
+    comments = []
+    if top_videos and max_comments_per_video > 0:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='yt-comments') as executor:
+            for threads in executor.map(propagate(harvest), [v['post_id'] for v in top_videos]):
+                comments.extend(comment_posts(threads, video_titles))
+
+    df = pd.DataFrame(videos + comments, columns=columns)
+    return compact_frame(df).sort_values('engagement', ascending=False).reset_index(drop=True)